@@ -0,0 +1,155 @@
+from datetime import datetime
+
+from database import db
+from notifications import email_notifier
+from ia_prediction import fire_model
+from predictions import prediction_buffer
+from anomaly import anomaly_engine, ANOMALY_TYPES
+from features import node_features, to_epoch
+from utils.logger import logger
+from utils import metrics
+
+def evaluate_threshold(alerte, valeur):
+    """Évalue une alerte à seuil; retourne le message si elle est déclenchée, sinon None"""
+    if alerte['type_alerte'] == 'seuil_min' and alerte['seuil_min']:
+        if valeur < alerte['seuil_min']:
+            return f"Valeur {valeur} inferieure au seuil minimum {alerte['seuil_min']}"
+    
+    elif alerte['type_alerte'] == 'seuil_max' and alerte['seuil_max']:
+        if valeur > alerte['seuil_max']:
+            return f"Valeur {valeur} superieure au seuil maximum {alerte['seuil_max']}"
+    
+    return None
+
+def raise_prediction_alert(noeud_id, prediction, temperature, humidity, mesure_id=None):
+    """Enregistre (et notifie) une alerte IA via l'alerte 'anomalie' du noeud"""
+    query_alerte = """
+        SELECT id, email_notification FROM alertes 
+        WHERE noeud_id = %s 
+        AND type_alerte = 'anomalie'
+        AND actif = TRUE
+        LIMIT 1
+    """
+    alerte_existante = db.execute_query(query_alerte, (noeud_id,))
+    
+    if not alerte_existante:
+        logger.warning(f"Prediction {prediction['status']} mais aucune alerte 'anomalie' configuree pour noeud {noeud_id}")
+        return None
+    
+    alerte_id = alerte_existante[0]['id']
+    
+    message = f"IA: {prediction['status']} - Risque: {prediction['fire_risk_percent']:.1f}% | T={temperature}°C, H={humidity}%, Fumee={prediction['smoke_level']:.0f}ppm"
+    
+    log_query = """
+        INSERT INTO logs_alertes (alerte_id, mesure_id, valeur_mesuree, message)
+        VALUES (%s, %s, %s, %s)
+    """
+    result = db.execute_query(log_query, (alerte_id, mesure_id, prediction['fire_risk_percent'], message))
+    
+    if alerte_existante[0]['email_notification']:
+        email_notifier.send_alert_notification(
+            alerte_id,
+            result['lastrowid'],
+            prediction['fire_risk_percent'],
+            message
+        )
+    logger.warning(f"Alerte IA declenchee noeud {noeud_id}")
+    return result['lastrowid']
+
+# Repli quand la fenêtre est incomplète: dernière mesure de chaque type
+LATEST_VALUES_QUERY = """
+    SELECT c.type, m.valeur 
+    FROM mesures m
+    JOIN capteurs c ON m.capteur_id = c.id
+    WHERE m.noeud_id = %s 
+    AND c.type IN ('temperature', 'humidite', 'co2')
+    AND m.id = (
+        SELECT MAX(m2.id) 
+        FROM mesures m2 
+        JOIN capteurs c2 ON m2.capteur_id = c2.id
+        WHERE m2.noeud_id = %s AND c2.type = c.type
+    )
+"""
+
+def predict_node(noeud_id, instant):
+    """
+    Prédiction du noeud: fenêtre alignée des 3 signaux, ou dernières valeurs si
+    un signal n'a aucune mesure dans la fenêtre
+
+    Returns:
+        tuple: (prédiction ou None, temperature, humidity, smoke)
+    """
+    features = node_features(noeud_id, instant)
+    if features is not None:
+        temperature, humidity, smoke = (round(float(v), 4) for v in features[:3])
+        return fire_model.predict_window(features), temperature, humidity, smoke
+    
+    latest = {row['type']: row['valeur'] for row in db.execute_query(LATEST_VALUES_QUERY, (noeud_id, noeud_id))}
+    temperature, humidity, smoke = latest.get('temperature'), latest.get('humidite'), latest.get('co2')
+    if temperature is None or humidity is None or smoke is None:
+        return None, temperature, humidity, smoke
+    prediction = fire_model.predict_fire_risk(temperature=temperature, humidity=humidity, smoke_level=smoke)
+    return prediction, temperature, humidity, smoke
+
+def check_alerts(capteur_id, noeud_id, valeur, mesure_id, timestamp=None):
+    """Vérifie les alertes avec IA (3 capteurs)"""
+    with metrics.timed(metrics.ALERT_EVALUATION_DURATION):
+        _check_alerts(capteur_id, noeud_id, valeur, mesure_id, timestamp)
+
+def _check_alerts(capteur_id, noeud_id, valeur, mesure_id, timestamp=None):
+    try:
+        instant = to_epoch(timestamp)
+        prediction, temperature, humidity, smoke = predict_node(noeud_id, instant)
+        
+        logger.info(f"Noeud {noeud_id}: T={temperature}, H={humidity}, Fumee={smoke}")
+        
+        if prediction is not None:
+            logger.info(f"Prediction IA Noeud {noeud_id}: {prediction}")
+            prediction_buffer.add((
+                noeud_id, datetime.fromtimestamp(instant), fire_model.version, prediction['fire_risk_percent'],
+                prediction['status'], prediction.get('confidence'), 'mesure'
+            ))
+            
+            if prediction['status'] in ['WARNING', 'CRITICAL']:
+                raise_prediction_alert(noeud_id, prediction, temperature, humidity, mesure_id)
+        
+        query = """
+            SELECT * FROM alertes 
+            WHERE capteur_id = %s 
+            AND actif = TRUE
+            AND (noeud_id = %s OR noeud_id IS NULL)
+        """
+        alertes = db.execute_query(query, (capteur_id, noeud_id))
+        
+        # État glissant (transaction verrouillée sur etats_anomalie) seulement si
+        # une alerte ewma/zscore/variation surveille ce capteur
+        observation = None
+        if any(alerte['type_alerte'] in ANOMALY_TYPES for alerte in alertes):
+            observation = anomaly_engine.observe(noeud_id, capteur_id, valeur, instant)
+        
+        for alerte in alertes:
+            if alerte['type_alerte'] in ANOMALY_TYPES:
+                message = anomaly_engine.evaluate(alerte, observation)
+            else:
+                message = evaluate_threshold(alerte, valeur)
+            
+            if message:
+                log_query = """
+                    INSERT INTO logs_alertes (alerte_id, mesure_id, valeur_mesuree, message)
+                    VALUES (%s, %s, %s, %s)
+                """
+                result = db.execute_query(log_query, (alerte['id'], mesure_id, valeur, message))
+                log_alerte_id = result['lastrowid']
+                
+                if alerte['email_notification']:
+                    email_notifier.send_alert_notification(
+                        alerte['id'], 
+                        log_alerte_id, 
+                        valeur, 
+                        message
+                    )
+                
+                logger.warning(f"Alerte declenchee: {alerte['id']} - {message}")
+        
+    except Exception as e:
+        logger.error(f"Erreur check_alerts: {e}")
@@ -0,0 +1,185 @@
+"""
+Détection d'anomalies en continu, par couple (noeud, capteur).
+
+Chaque mesure met à jour en O(1) un état glissant:
+- moyenne et variance à décroissance exponentielle (EWMA, ANOMALY_EWMA_ALPHA);
+- z-score de la mesure par rapport à l'état précédent;
+- variation par minute sur les ANOMALY_WINDOW dernières mesures, gardées dans
+  un tampon circulaire de taille fixe (array 'd').
+
+Types d'alertes évalués (table alertes):
+- 'ewma': moyenne lissée hors de [seuil_min, seuil_max];
+- 'zscore': |z| supérieur à seuil_max (ANOMALY_ZSCORE par défaut);
+- 'variation': variation par minute hors de [seuil_min, seuil_max].
+
+L'état d'un couple est la ligne de etats_anomalie: les mesures d'un noeud
+arrivent par plusieurs processus (workers gunicorn, passerelle MQTT, ASGI),
+chaque mise à jour lit donc la ligne verrouillée (SELECT ... FOR UPDATE),
+l'avance et l'écrit dans la même transaction. Les mises à jour d'un même
+couple sont sérialisées; celles de couples différents ne s'attendent pas.
+
+L'état n'est tenu que pour les couples surveillés par une alerte active de
+ANOMALY_TYPES (alerts.check_alerts): les autres mesures ne coûtent aucune
+requête. Un état commence à la création de l'alerte (ANOMALY_MIN_SAMPLES
+mesures avant le premier z-score).
+"""
+import math
+import threading
+from array import array
+
+from mysql.connector import Error, errorcode
+
+from config import Config
+from database import db
+from features import to_epoch
+
+ANOMALY_TYPES = ('ewma', 'zscore', 'variation')
+
+# Ligne vide créée au premier passage: le verrou de ligne porte ensuite sur une ligne existante
+CREATE_STATE = """
+    INSERT INTO etats_anomalie (noeud_id, capteur_id, n, moyenne, variance, position)
+    VALUES (%s, %s, 0, 0, 0, 0)
+"""
+
+LOCK_STATE = """
+    SELECT n, moyenne, variance, position, valeurs, instants
+    FROM etats_anomalie
+    WHERE noeud_id = %s AND capteur_id = %s
+    FOR UPDATE
+"""
+
+SAVE_STATE = """
+    UPDATE etats_anomalie
+    SET n = %s, moyenne = %s, variance = %s, position = %s, valeurs = %s, instants = %s
+    WHERE noeud_id = %s AND capteur_id = %s
+"""
+
+class RollingState:
+    """État glissant d'un capteur d'un noeud (taille fixe)"""
+
+    __slots__ = ('n', 'mean', 'var', 'pos', 'values', 'times')
+
+    def __init__(self, size):
+        self.n = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.pos = 0
+        self.values = array('d', bytes(8 * size))
+        self.times = array('d', bytes(8 * size))
+
+    def update(self, valeur, instant, alpha, min_samples):
+        """
+        Ajoute une mesure
+
+        Returns:
+            tuple: (z-score avant mise à jour ou None, variation par minute ou None)
+        """
+        size = len(self.values)
+        zscore = None
+        if self.n >= min_samples and self.var > 0:
+            zscore = (valeur - self.mean) / math.sqrt(self.var)
+
+        if self.n == 0:
+            self.mean = valeur
+        else:
+            diff = valeur - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.var = (1 - alpha) * (self.var + diff * increment)
+
+        # Plus ancienne mesure du tampon: la case écrasée quand il est plein
+        # (une case jamais écrite a un instant nul)
+        variation = None
+        oldest = self.pos if self.n >= size else 0
+        if self.n and self.times[oldest]:
+            elapsed = instant - self.times[oldest]
+            if elapsed > 0:
+                variation = (valeur - self.values[oldest]) * 60 / elapsed
+
+        self.values[self.pos] = valeur
+        self.times[self.pos] = instant
+        self.pos = (self.pos + 1) % size
+        self.n += 1
+        return zscore, variation
+
+class AnomalyEngine:
+    """États glissants partagés (table etats_anomalie) et évaluation des alertes 'ewma', 'zscore' et 'variation'"""
+
+    def __init__(self, alpha, window, min_samples):
+        self.alpha = alpha
+        self.window = window
+        self.min_samples = min_samples
+        # Couples dont la ligne existe déjà (évite l'INSERT à chaque mesure)
+        self._known = set()
+        self._lock = threading.Lock()
+
+    def _ensure(self, key):
+        if key in self._known:
+            return
+        try:
+            db.execute_query(CREATE_STATE, key)
+        except Error as e:
+            if e.errno != errorcode.ER_DUP_ENTRY:
+                raise
+        with self._lock:
+            self._known.add(key)
+
+    def _restore(self, row):
+        state = RollingState(self.window)
+        state.n = row['n']
+        state.mean = float(row['moyenne'])
+        state.var = float(row['variance'])
+        values = array('d', bytes(row['valeurs'] or b''))
+        times = array('d', bytes(row['instants'] or b''))
+        if len(values) == self.window and len(times) == self.window:
+            state.values, state.times, state.pos = values, times, row['position']
+        else:
+            # Taille de fenêtre modifiée: seules la moyenne et la variance sont reprises
+            state.n = min(state.n, self.min_samples)
+            state.pos = 0
+        return state
+
+    def observe(self, noeud_id, capteur_id, valeur, timestamp=None):
+        """
+        Met à jour l'état du couple (noeud, capteur) avec une mesure
+
+        Returns:
+            dict: {'ewma', 'zscore', 'variation'} (None tant que la valeur n'est pas calculable)
+        """
+        key = (noeud_id, capteur_id)
+        self._ensure(key)
+        with db.transaction() as cursor:
+            cursor.execute(LOCK_STATE, key)
+            state = self._restore(cursor.fetchone())
+            zscore, variation = state.update(float(valeur), to_epoch(timestamp), self.alpha, self.min_samples)
+            cursor.execute(SAVE_STATE, (state.n, state.mean, state.var, state.pos,
+                                        state.values.tobytes(), state.times.tobytes()) + key)
+        return {'ewma': state.mean, 'zscore': zscore, 'variation': variation}
+
+    def evaluate(self, alerte, observation):
+        """Évalue une alerte de ANOMALY_TYPES; retourne le message si elle est déclenchée, sinon None"""
+        seuil_min = float(alerte['seuil_min']) if alerte['seuil_min'] is not None else None
+        seuil_max = float(alerte['seuil_max']) if alerte['seuil_max'] is not None else None
+
+        if alerte['type_alerte'] == 'zscore':
+            zscore = observation['zscore']
+            limite = seuil_max or Config.ANOMALY_ZSCORE
+            if zscore is not None and abs(zscore) > limite:
+                return f"Z-score {zscore:.1f} au-dela de {limite} (moyenne lissee {observation['ewma']:.2f})"
+            return None
+
+        label = 'Moyenne lissee' if alerte['type_alerte'] == 'ewma' else 'Variation par minute'
+        valeur = observation[alerte['type_alerte']]
+        if valeur is None:
+            return None
+        if seuil_min is not None and valeur < seuil_min:
+            return f"{label} {valeur:.2f} inferieure au seuil minimum {seuil_min}"
+        if seuil_max is not None and valeur > seuil_max:
+            return f"{label} {valeur:.2f} superieure au seuil maximum {seuil_max}"
+        return None
+
+# Instance globale (alimentée par alerts.check_alerts)
+anomaly_engine = AnomalyEngine(
+    Config.ANOMALY_EWMA_ALPHA, Config.ANOMALY_WINDOW,
+    Config.ANOMALY_MIN_SAMPLES
+)
@@ -1,67 +1,109 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Blueprint, Flask, request, jsonify, render_template
 from flask_cors import CORS
-from datetime import datetime
-import json
+from datetime import datetime, timedelta
+import math
+import os
+import threading
 
 from config import Config
 from database import db
 from auth import (token_required, api_key_required, role_required, 
-                  generate_token, verify_token)
-from notifications import email_notifier
-from utils.validators import DataValidator
+                  generate_token, verify_token, verify_api_key)
+from utils.validators import (DataValidator, IngestValidator, MANQUANT, HORS_LIMITES,
+                              to_local_datetime)
 from utils.security import generate_api_key, hash_password, verify_password
 from utils.logger import logger, log_to_database
+from utils import compression, metrics, profiling
+from utils.http_cache import response_cache
+from utils.json_provider import OrjsonProvider
 
+from anomaly import ANOMALY_TYPES
 from ia_prediction import fire_model
-# Initialisation de l'application
-app = Flask(__name__)
-app.config.from_object(Config)
-CORS(app, resources={
-    r"/api/*": {
-        "origins": "*",  # Permet toutes les origines (pour le développement)
-        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization", "X-API-Key"]
-    }
-})
+from ingestion import ingest_readings, write_buffer
+from liveness import LivenessMonitor
+from predictions import risk_curves
+from risk_sweep import RiskSweep
+from series import METHODES as SERIES_METHODES, range_series, recent_series
+from spatial import fleet_state
+from utils.binary_frame import decode_frame, frame_to_rows, FrameError
+# Routes de l'application (enregistrées par create_app)
+api = Blueprint('api', __name__)
 
 # Validator instance
 validator = DataValidator()
+ingest_validator = IngestValidator()
+
+# Types d'alertes (ewma, zscore, variation: détection d'anomalies, voir anomaly.py)
+TYPES_ALERTE = ['seuil_min', 'seuil_max', 'anomalie', 'hors_ligne', 'autre'] + list(ANOMALY_TYPES)
+
+# Processus dans lequel les tâches de fond ont été lancées
+_services_pid = None
+_services_lock = threading.Lock()
+
+@api.before_app_request
+def start_background_services():
+    """
+    Lance les tâches de fond du worker à sa première requête (une fois par processus)
+
+    Un maître gunicorn qui précharge l'application ne lance donc aucun thread:
+    chaque worker démarre les siens après le fork.
+    """
+    global _services_pid
+    if _services_pid == os.getpid():
+        return
+    with _services_lock:
+        if _services_pid == os.getpid():
+            return
+        
+        # Rejoue le journal du tampon d'écriture laissé par une exécution précédente
+        if write_buffer is not None:
+            write_buffer.start()
+        
+        # Détection des noeuds hors ligne (un seul worker actif, élu par verrou)
+        if Config.LIVENESS_MONITOR_ENABLED:
+            LivenessMonitor().start()
+        
+        # Réévaluation périodique du risque de toute la flotte (un seul worker actif)
+        if Config.RISK_SWEEP_ENABLED:
+            RiskSweep().start()
+        
+        _services_pid = os.getpid()
 
 # ==================== ROUTES WEB (INTERFACE) ====================
 
-@app.route('/')
+@api.route('/')
 def index():
     """Page d'accueil"""
     return render_template('index.html')
 
-@app.route('/utilisateurs')
+@api.route('/utilisateurs')
 def utilisateurs_page():
     """Page de gestion des utilisateurs"""
     return render_template('utilisateurs.html')
 
-@app.route('/dashboard')
+@api.route('/dashboard')
 def dashboard():
     """Tableau de bord principal"""
     return render_template('dashboard.html')
 
-@app.route('/capteurs')
+@api.route('/capteurs')
 def capteurs_page():
     """Page de gestion des capteurs"""
     return render_template('capteurs.html')
 
-@app.route('/noeuds')
+@api.route('/noeuds')
 def noeuds_page():
     """Page de gestion des noeuds"""
     return render_template('noeuds.html')
 
-@app.route('/alertes')
+@api.route('/alertes')
 def alertes_page():
     """Page de gestion des alertes"""
     return render_template('alertes.html')
 
 # ==================== AUTHENTIFICATION ====================
 
-@app.route('/api/auth/login', methods=['POST'])
+@api.route('/api/auth/login', methods=['POST'])
 def login():
     """Connexion utilisateur"""
     try:
@@ -100,6 +142,7 @@ def login():
         # Mettre à jour la dernière connexion
         update_query = "UPDATE utilisateurs SET derniere_connexion = NOW() WHERE id = %s"
         db.execute_query(update_query, (user['id'],))
+        response_cache.bump('utilisateurs')
         
         log_to_database('info', 'login_success', f'User logged in: {username}')
         
@@ -117,13 +160,13 @@ def login():
         logger.error(f"Erreur login: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/auth/verify', methods=['GET'])
+@api.route('/api/auth/verify', methods=['GET'])
 @token_required
 def verify_auth(payload):
     """Vérifie un token"""
     return jsonify({'valid': True, 'user': payload}), 200
 
-@app.route('/api/auth/register', methods=['POST'])
+@api.route('/api/auth/register', methods=['POST'])
 @token_required
 @role_required('admin')
 def register(payload):
@@ -162,6 +205,7 @@ def register(payload):
         """
         result = db.execute_query(insert_query, (username, email, password_hash, role, api_token))
         
+        response_cache.bump('utilisateurs')
         log_to_database('info', 'user_created', f'New user: {username}')
         
         return jsonify({
@@ -176,9 +220,10 @@ def register(payload):
 
 # ==================== API UTILISATEURS (GESTION) ====================
 
-@app.route('/api/utilisateurs', methods=['GET'])
+@api.route('/api/utilisateurs', methods=['GET'])
 @token_required
 @role_required('admin')
+@response_cache.cached('utilisateurs')
 def get_utilisateurs(payload):
     """Récupérer tous les utilisateurs (admin seulement)"""
     try:
@@ -194,7 +239,7 @@ def get_utilisateurs(payload):
         logger.error(f"Erreur get_utilisateurs: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/utilisateurs/<int:id>', methods=['PUT'])
+@api.route('/api/utilisateurs/<int:id>', methods=['PUT'])
 @token_required
 @role_required('admin')
 def update_utilisateur(payload, id):
@@ -212,6 +257,7 @@ def update_utilisateur(payload, id):
         if result['rowcount'] == 0:
             return jsonify({'error': 'Utilisateur non trouvé'}), 404
         
+        response_cache.bump('utilisateurs')
         log_to_database('info', 'user_updated', f'Utilisateur {id} {"activé" if actif else "désactivé"}')
         
         return jsonify({'message': 'Utilisateur mis à jour'}), 200
@@ -220,7 +266,7 @@ def update_utilisateur(payload, id):
         logger.error(f"Erreur update_utilisateur: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/utilisateurs/<int:id>', methods=['DELETE'])
+@api.route('/api/utilisateurs/<int:id>', methods=['DELETE'])
 @token_required
 @role_required('admin')
 def delete_utilisateur(payload, id):
@@ -232,6 +278,7 @@ def delete_utilisateur(payload, id):
         if result['rowcount'] == 0:
             return jsonify({'error': 'Utilisateur non trouvé'}), 404
         
+        response_cache.bump('utilisateurs')
         log_to_database('warning', 'user_deleted', f'Utilisateur {id} supprimé par {payload["username"]}')
         
         return jsonify({'message': 'Utilisateur supprimé'}), 200
@@ -242,8 +289,9 @@ def delete_utilisateur(payload, id):
 
 # ==================== API CAPTEURS ====================
 
-@app.route('/api/capteurs', methods=['GET'])
+@api.route('/api/capteurs', methods=['GET'])
 @token_required
+@response_cache.cached('capteurs')
 def get_capteurs(payload):
     """Récupérer tous les capteurs"""
     try:
@@ -270,8 +318,9 @@ def get_capteurs(payload):
         logger.error(f"Erreur get_capteurs: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/capteurs/<int:id>', methods=['GET'])
+@api.route('/api/capteurs/<int:id>', methods=['GET'])
 @token_required
+@response_cache.cached('capteurs')
 def get_capteur(payload, id):
     """Récupérer un capteur spécifique"""
     try:
@@ -287,7 +336,7 @@ def get_capteur(payload, id):
         logger.error(f"Erreur get_capteur: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/capteurs', methods=['POST'])
+@api.route('/api/capteurs', methods=['POST'])
 @token_required
 @role_required('user')
 def add_capteur(payload):
@@ -309,6 +358,7 @@ def add_capteur(payload):
         """
         result = db.execute_query(query, (nom, type_capteur, unite, description))
         
+        response_cache.bump('capteurs')
         log_to_database('info', 'capteur_created', f'Capteur créé: {nom}')
         
         return jsonify({
@@ -320,7 +370,7 @@ def add_capteur(payload):
         logger.error(f"Erreur add_capteur: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/capteurs/<int:id>', methods=['PUT'])
+@api.route('/api/capteurs/<int:id>', methods=['PUT'])
 @token_required
 @role_required('user')
 def update_capteur(payload, id):
@@ -344,6 +394,7 @@ def update_capteur(payload, id):
         if result['rowcount'] == 0:
             return jsonify({'error': 'Capteur non trouvé'}), 404
         
+        response_cache.bump('capteurs')
         log_to_database('info', 'capteur_updated', f'Capteur mis à jour: {id}')
         
         return jsonify({'message': 'Capteur mis à jour'}), 200
@@ -352,7 +403,7 @@ def update_capteur(payload, id):
         logger.error(f"Erreur update_capteur: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/capteurs/<int:id>', methods=['DELETE'])
+@api.route('/api/capteurs/<int:id>', methods=['DELETE'])
 @token_required
 @role_required('admin')
 def delete_capteur(payload, id):
@@ -364,6 +415,7 @@ def delete_capteur(payload, id):
         if result['rowcount'] == 0:
             return jsonify({'error': 'Capteur non trouvé'}), 404
         
+        response_cache.bump('capteurs')
         log_to_database('warning', 'capteur_deleted', f'Capteur supprimé: {id}')
         
         return jsonify({'message': 'Capteur supprimé'}), 200
@@ -374,8 +426,9 @@ def delete_capteur(payload, id):
 
 # ==================== API NOEUDS ====================
 
-@app.route('/api/noeuds', methods=['GET'])
+@api.route('/api/noeuds', methods=['GET'])
 @token_required
+@response_cache.cached('noeuds', 'connexions')
 def get_noeuds(payload):
     """Récupérer tous les noeuds"""
     try:
@@ -403,8 +456,9 @@ def get_noeuds(payload):
         logger.error(f"Erreur get_noeuds: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/noeuds/<int:id>', methods=['GET'])
+@api.route('/api/noeuds/<int:id>', methods=['GET'])
 @token_required
+@response_cache.cached('noeuds', 'connexions', 'capteurs')
 def get_noeud(payload, id):
     """Récupérer un noeud spécifique"""
     try:
@@ -432,7 +486,7 @@ def get_noeud(payload, id):
         logger.error(f"Erreur get_noeud: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/noeuds', methods=['POST'])
+@api.route('/api/noeuds', methods=['POST'])
 @token_required
 @role_required('user')
 def add_noeud(payload):
@@ -444,6 +498,9 @@ def add_noeud(payload):
         adresse_mac = data.get('adresse_mac', '').upper()
         adresse_ip = data.get('adresse_ip')
         localisation = validator.sanitize_string(data.get('localisation'), 200)
+        zone = validator.sanitize_string(data.get('zone'), 50) or None
+        latitude = data.get('latitude')
+        longitude = data.get('longitude')
         modele = validator.sanitize_string(data.get('modele'), 100)
         
         # Validation
@@ -456,15 +513,21 @@ def add_noeud(payload):
         if adresse_ip and not validator.validate_ip_address(adresse_ip):
             return jsonify({'error': 'Adresse IP invalide'}), 400
         
+        if not validator.validate_coordinates(latitude, longitude):
+            return jsonify({'error': 'Coordonnées invalides'}), 400
+        
         # Générer une clé API unique
         api_key = generate_api_key('noeud_api_key')
         
         query = """
-            INSERT INTO noeuds (nom, adresse_mac, adresse_ip, localisation, modele, api_key)
-            VALUES (%s, %s, %s, %s, %s, %s)
+            INSERT INTO noeuds (nom, adresse_mac, adresse_ip, localisation, zone, latitude, longitude,
+                                modele, api_key)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
-        result = db.execute_query(query, (nom, adresse_mac, adresse_ip, localisation, modele, api_key))
+        result = db.execute_query(query, (nom, adresse_mac, adresse_ip, localisation, zone,
+                                          latitude, longitude, modele, api_key))
         
+        response_cache.bump('noeuds')
         log_to_database('info', 'noeud_created', f'Noeud créé: {nom}')
         
         return jsonify({
@@ -479,7 +542,7 @@ def add_noeud(payload):
             return jsonify({'error': 'Adresse MAC déjà existante'}), 409
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/noeuds/<int:id>', methods=['PUT'])
+@api.route('/api/noeuds/<int:id>', methods=['PUT'])
 @token_required
 @role_required('user')
 def update_noeud(payload, id):
@@ -490,6 +553,9 @@ def update_noeud(payload, id):
         nom = validator.sanitize_string(data.get('nom'), 100)
         adresse_ip = data.get('adresse_ip')
         localisation = validator.sanitize_string(data.get('localisation'), 200)
+        zone = validator.sanitize_string(data.get('zone'), 50) or None
+        latitude = data.get('latitude')
+        longitude = data.get('longitude')
         modele = validator.sanitize_string(data.get('modele'), 100)
         firmware_version = validator.sanitize_string(data.get('firmware_version'), 50)
         statut = data.get('statut')
@@ -500,18 +566,23 @@ def update_noeud(payload, id):
         if statut and statut not in ['actif', 'inactif', 'maintenance', 'erreur']:
             return jsonify({'error': 'Statut invalide'}), 400
         
+        if not validator.validate_coordinates(latitude, longitude):
+            return jsonify({'error': 'Coordonnées invalides'}), 400
+        
         query = """
             UPDATE noeuds 
-            SET nom = %s, adresse_ip = %s, localisation = %s, 
+            SET nom = %s, adresse_ip = %s, localisation = %s, zone = %s,
+                latitude = %s, longitude = %s,
                 modele = %s, firmware_version = %s, statut = %s
             WHERE id = %s
         """
-        result = db.execute_query(query, (nom, adresse_ip, localisation, modele, 
-                                         firmware_version, statut, id))
+        result = db.execute_query(query, (nom, adresse_ip, localisation, zone, latitude, longitude,
+                                         modele, firmware_version, statut, id))
         
         if result['rowcount'] == 0:
             return jsonify({'error': 'Noeud non trouvé'}), 404
         
+        response_cache.bump('noeuds')
         log_to_database('info', 'noeud_updated', f'Noeud mis à jour: {id}')
         
         return jsonify({'message': 'Noeud mis à jour'}), 200
@@ -520,7 +591,7 @@ def update_noeud(payload, id):
         logger.error(f"Erreur update_noeud: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/noeuds/<int:id>', methods=['DELETE'])
+@api.route('/api/noeuds/<int:id>', methods=['DELETE'])
 @token_required
 @role_required('admin')
 def delete_noeud(payload, id):
@@ -532,6 +603,7 @@ def delete_noeud(payload, id):
         if result['rowcount'] == 0:
             return jsonify({'error': 'Noeud non trouvé'}), 404
         
+        response_cache.bump('noeuds')
         log_to_database('warning', 'noeud_deleted', f'Noeud supprimé: {id}')
         
         return jsonify({'message': 'Noeud supprimé'}), 200
@@ -540,7 +612,7 @@ def delete_noeud(payload, id):
         logger.error(f"Erreur delete_noeud: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/noeuds/<int:noeud_id>/capteurs/<int:capteur_id>', methods=['POST'])
+@api.route('/api/noeuds/<int:noeud_id>/capteurs/<int:capteur_id>', methods=['POST'])
 @token_required
 @role_required('user')
 def associer_capteur_noeud(payload, noeud_id, capteur_id):
@@ -552,6 +624,7 @@ def associer_capteur_noeud(payload, noeud_id, capteur_id):
         """
         db.execute_query(query, (noeud_id, capteur_id))
         
+        response_cache.bump('noeuds')
         log_to_database('info', 'capteur_associated', 
                        f'Capteur {capteur_id} associé au noeud {noeud_id}')
         
@@ -563,7 +636,7 @@ def associer_capteur_noeud(payload, noeud_id, capteur_id):
             return jsonify({'error': 'Association déjà existante'}), 409
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/noeuds/<int:noeud_id>/capteurs/<int:capteur_id>', methods=['DELETE'])
+@api.route('/api/noeuds/<int:noeud_id>/capteurs/<int:capteur_id>', methods=['DELETE'])
 @token_required
 @role_required('user')
 def dissocier_capteur_noeud(payload, noeud_id, capteur_id):
@@ -578,6 +651,7 @@ def dissocier_capteur_noeud(payload, noeud_id, capteur_id):
         if result['rowcount'] == 0:
             return jsonify({'error': 'Association non trouvée'}), 404
         
+        response_cache.bump('noeuds')
         log_to_database('info', 'capteur_dissociated', 
                        f'Capteur {capteur_id} dissocié du noeud {noeud_id}')
         
@@ -589,53 +663,39 @@ def dissocier_capteur_noeud(payload, noeud_id, capteur_id):
 
 # ==================== API MESURES (RÉCEPTION DES DONNÉES) ====================
 
-@app.route('/api/mesures', methods=['POST'])
+@api.route('/api/mesures', methods=['POST'])
 @api_key_required
 def add_mesure(noeud):
     """Recevoir et enregistrer une mesure (protégé par API key)"""
     try:
         data = request.get_json()
         
-        capteur_id = data.get('capteur_id')
-        valeur = data.get('valeur')
-        timestamp = data.get('timestamp')
-        metadata = data.get('metadata')
-        
-        if not capteur_id or valeur is None:
+        mesure, error = ingest_validator.validate(data)
+        if error == MANQUANT:
             return jsonify({'error': 'capteur_id et valeur requis'}), 400
-        
-        # Validation de la valeur
-        if not validator.validate_sensor_value(valeur, -100, 10000):
+        if error == HORS_LIMITES:
             return jsonify({'error': 'Valeur hors limites'}), 400
+        if error:
+            return jsonify({'error': 'Mesure invalide'}), 400
         
-        # Vérifier que le capteur est associé au noeud
-        check_query = """
-            SELECT 1 FROM noeud_capteur 
-            WHERE noeud_id = %s AND capteur_id = %s
-        """
-        association = db.execute_query(check_query, (noeud['id'], capteur_id))
+        # Association, déduplication (msg_id/seq) et insertion: même pipeline que /bulk
+        mesure['index'] = 0
+        ids, errors, doublons = ingest_readings(noeud, [mesure], 'json')
         
-        if not association:
+        if errors:
             return jsonify({'error': 'Capteur non associé à ce noeud'}), 403
         
-        # Insérer la mesure
-        insert_query = """
-            INSERT INTO mesures (noeud_id, capteur_id, valeur, timestamp, metadata)
-            VALUES (%s, %s, %s, %s, %s)
-        """
-        
-        ts = timestamp if timestamp else datetime.now()
-        meta_json = json.dumps(metadata) if metadata else None
+        if doublons:
+            # Renvoi d'un message déjà reçu: acquitté sans nouvelle insertion ni alerte
+            return jsonify({'message': 'Mesure déjà enregistrée', 'id': None, 'doublon': True}), 200
         
-        result = db.execute_query(insert_query, (noeud['id'], capteur_id, valeur, ts, meta_json))
-        mesure_id = result['lastrowid']
-        
-        # Vérifier les alertes
-        check_alerts(capteur_id, noeud['id'], valeur, mesure_id)
+        if write_buffer is not None:
+            # Acquittement après écriture dans le journal local (insertion différée)
+            return jsonify({'message': 'Mesure acceptée', 'id': None}), 202
         
         return jsonify({
             'message': 'Mesure enregistrée',
-            'id': mesure_id
+            'id': ids[0]
         }), 201
         
     except Exception as e:
@@ -643,7 +703,7 @@ def add_mesure(noeud):
         log_to_database('error', 'mesure_failed', str(e), noeud['id'])
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/mesures/bulk', methods=['POST'])
+@api.route('/api/mesures/bulk', methods=['POST'])
 @api_key_required
 def add_mesures_bulk(noeud):
     """Recevoir plusieurs mesures en une fois"""
@@ -657,57 +717,60 @@ def add_mesures_bulk(noeud):
         if len(mesures) > 100:
             return jsonify({'error': 'Maximum 100 mesures par requête'}), 400
         
-        inserted_count = 0
-        errors = []
-        
-        for idx, mesure in enumerate(mesures):
-            try:
-                capteur_id = mesure.get('capteur_id')
-                valeur = mesure.get('valeur')
-                timestamp = mesure.get('timestamp', datetime.now())
-                
-                if not capteur_id or valeur is None:
-                    errors.append({'index': idx, 'error': 'Données manquantes'})
-                    continue
-                
-                # Vérifier l'association
-                check_query = """
-                    SELECT 1 FROM noeud_capteur 
-                    WHERE noeud_id = %s AND capteur_id = %s
-                """
-                if not db.execute_query(check_query, (noeud['id'], capteur_id)):
-                    errors.append({'index': idx, 'error': 'Capteur non associé'})
-                    continue
-                
-                # Insérer
-                insert_query = """
-                    INSERT INTO mesures (noeud_id, capteur_id, valeur, timestamp)
-                    VALUES (%s, %s, %s, %s)
-                """
-                result = db.execute_query(insert_query, (noeud['id'], capteur_id, valeur, timestamp))
-                
-                # Vérifier les alertes
-                check_alerts(capteur_id, noeud['id'], valeur, result['lastrowid'])
-                
-                inserted_count += 1
-                
-            except Exception as e:
-                errors.append({'index': idx, 'error': str(e)})
+        # Validation de tout le lot en une passe (erreurs par index)
+        rows, errors = ingest_validator.validate_bulk(mesures)
+        
+        # Association vérifiée en une requête, insertion en une transaction
+        ids, association_errors, doublons = ingest_readings(noeud, rows, 'bulk')
+        errors = sorted(errors + association_errors, key=lambda e: e['index'])
         
         return jsonify({
-            'message': f'{inserted_count} mesures enregistrées',
-            'inserted': inserted_count,
+            'message': f'{len(ids)} mesures enregistrées',
+            'inserted': len(ids),
+            'doublons': doublons,
             'errors': errors if errors else None
-        }), 201
+        }), 202 if write_buffer is not None else 201
         
     except Exception as e:
         logger.error(f"Erreur add_mesures_bulk: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
+@api.route('/api/mesures/binaire', methods=['POST'])
+def add_mesures_binaire():
+    """Recevoir une trame binaire compacte (voir utils/binary_frame.py)"""
+    try:
+        try:
+            token, timestamps, capteur_ids, valeurs = decode_frame(
+                request.get_data(cache=False), Config.BINARY_MAX_MESURES
+            )
+        except FrameError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Le jeton de la trame est la clé API du noeud
+        noeud = verify_api_key(token)
+        if not noeud:
+            log_to_database('warning', 'api_auth_failed', f'Clé API invalide: {token[:10]}...')
+            return jsonify({'error': 'Clé API invalide'}), 401
+        
+        # Même validation et même pipeline d'insertion que /api/mesures/bulk
+        mask, errors = ingest_validator.validate_arrays(timestamps, capteur_ids, valeurs)
+        rows = frame_to_rows(timestamps, capteur_ids, valeurs, mask)
+        ids, association_errors, doublons = ingest_readings(noeud, rows, 'binaire')
+        errors = sorted(errors + association_errors, key=lambda e: e['index'])
+        
+        return jsonify({
+            'inserted': len(ids),
+            'doublons': doublons,
+            'errors': errors if errors else None
+        }), 202 if write_buffer is not None else 201
+        
+    except Exception as e:
+        logger.error(f"Erreur add_mesures_binaire: {e}")
+        return jsonify({'error': 'Erreur serveur'}), 500
 
 # ==================== API LECTURE DES DONNÉES ====================
 
-@app.route('/api/mesures', methods=['GET'])
+@api.route('/api/mesures', methods=['GET'])
 @token_required
 def get_mesures(payload):
     """Récupérer les mesures avec filtres"""
@@ -755,7 +818,7 @@ def get_mesures(payload):
         logger.error(f"Erreur get_mesures: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/mesures/derniere/<int:capteur_id>', methods=['GET'])
+@api.route('/api/mesures/derniere/<int:capteur_id>', methods=['GET'])
 @token_required
 def get_derniere_mesure(payload, capteur_id):
     """Récupérer la dernière mesure d'un capteur"""
@@ -789,7 +852,7 @@ def get_derniere_mesure(payload, capteur_id):
         logger.error(f"Erreur get_derniere_mesure: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/mesures/statistiques', methods=['GET'])
+@api.route('/api/mesures/statistiques', methods=['GET'])
 @token_required
 def get_statistiques_mesures(payload):
     """Statistiques des mesures"""
@@ -843,7 +906,7 @@ def get_statistiques_mesures(payload):
         logger.error(f"Erreur get_statistiques_mesures: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/mesures/historique', methods=['GET'])
+@api.route('/api/mesures/historique', methods=['GET'])
 @token_required
 def get_historique(payload):
     """Historique des mesures avec agrégation temporelle"""
@@ -886,9 +949,47 @@ def get_historique(payload):
         logger.error(f"Erreur get_historique: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
+@api.route('/api/mesures/serie', methods=['GET'])
+@token_required
+def get_serie(payload):
+    """Série d'un capteur d'un noeud réduite à un nombre de points (LTTB ou min/max)"""
+    try:
+        try:
+            noeud_id = int(request.args['noeud_id'])
+            capteur_id = int(request.args['capteur_id'])
+            # Dates avec fuseau ramenées à l'heure locale naïve (comme le défaut et la base)
+            fin = to_local_datetime(request.args['fin']) if request.args.get('fin') else datetime.now()
+            debut = to_local_datetime(request.args['debut']) if request.args.get('debut') \
+                else fin - timedelta(hours=24)
+            points = min(int(request.args.get('points', Config.SERIES_POINTS)), Config.SERIES_MAX_POINTS)
+        except (KeyError, ValueError):
+            return jsonify({'error': 'noeud_id et capteur_id requis (entiers, dates ISO 8601)'}), 400
+        
+        methode = request.args.get('methode', 'lttb')
+        if methode not in SERIES_METHODES:
+            return jsonify({'error': f"Méthode invalide ({', '.join(SERIES_METHODES)})"}), 400
+        
+        if debut >= fin or points < 4:
+            return jsonify({'error': 'Période ou nombre de points invalide'}), 400
+        
+        serie = range_series(noeud_id, capteur_id, debut, fin, points, methode)
+        
+        return jsonify({
+            'noeud_id': noeud_id,
+            'capteur_id': capteur_id,
+            'debut': debut.isoformat(),
+            'fin': fin.isoformat(),
+            **serie
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Erreur get_serie: {e}")
+        return jsonify({'error': 'Erreur serveur'}), 500
+
 # ==================== API ALERTES ====================
-@app.route('/api/alertes/<int:id>', methods=['GET'])
+@api.route('/api/alertes/<int:id>', methods=['GET'])
 @token_required
+@response_cache.cached('alertes', 'capteurs', 'noeuds')
 def get_alerte(payload, id):
     """Récupérer une alerte spécifique"""
     try:
@@ -911,8 +1012,9 @@ def get_alerte(payload, id):
         return jsonify({'error': 'Erreur serveur'}), 500
 
 
-@app.route('/api/alertes', methods=['GET'])
+@api.route('/api/alertes', methods=['GET'])
 @token_required
+@response_cache.cached('alertes', 'capteurs', 'noeuds')
 def get_alertes(payload):
     """Récupérer toutes les alertes"""
     try:
@@ -946,7 +1048,7 @@ def get_alertes(payload):
         logger.error(f"Erreur get_alertes: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/alertes', methods=['POST'])
+@api.route('/api/alertes', methods=['POST'])
 @token_required
 @role_required('user')
 def add_alerte(payload):
@@ -967,9 +1069,12 @@ def add_alerte(payload):
         if not capteur_id or not type_alerte or not severite:
             return jsonify({'error': 'Données incomplètes'}), 400
         
-        if type_alerte not in ['seuil_min', 'seuil_max', 'anomalie', 'hors_ligne', 'autre']:
+        if type_alerte not in TYPES_ALERTE:
             return jsonify({'error': 'Type alerte invalide'}), 400
         
+        if type_alerte in ('ewma', 'variation') and seuil_min is None and seuil_max is None:
+            return jsonify({'error': 'Seuil minimum ou maximum requis'}), 400
+        
         if severite not in ['info', 'warning', 'critical']:
             return jsonify({'error': 'Sévérité invalide'}), 400
         
@@ -981,6 +1086,7 @@ def add_alerte(payload):
         result = db.execute_query(query, (capteur_id, noeud_id, type_alerte, severite,
                                          seuil_min, seuil_max, message, email_notification))
         
+        response_cache.bump('alertes')
         log_to_database('info', 'alerte_created', f'Alerte créée pour capteur {capteur_id}')
         
         return jsonify({
@@ -992,7 +1098,7 @@ def add_alerte(payload):
         logger.error(f"Erreur add_alerte: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/alertes/<int:id>', methods=['PUT'])
+@api.route('/api/alertes/<int:id>', methods=['PUT'])
 @token_required
 @role_required('user')
 def update_alerte(payload, id):
@@ -1011,9 +1117,12 @@ def update_alerte(payload, id):
         noeud_id = data.get('noeud_id')
         
         # Validation
-        if type_alerte and type_alerte not in ['seuil_min', 'seuil_max', 'anomalie', 'hors_ligne', 'autre']:
+        if type_alerte and type_alerte not in TYPES_ALERTE:
             return jsonify({'error': 'Type alerte invalide'}), 400
         
+        if type_alerte in ('ewma', 'variation') and seuil_min is None and seuil_max is None:
+            return jsonify({'error': 'Seuil minimum ou maximum requis'}), 400
+        
         if severite and severite not in ['info', 'warning', 'critical']:
             return jsonify({'error': 'Sévérité invalide'}), 400
         
@@ -1046,6 +1155,7 @@ def update_alerte(payload, id):
         if result['rowcount'] == 0:
             return jsonify({'error': 'Alerte non trouvée'}), 404
         
+        response_cache.bump('alertes')
         log_to_database('info', 'alerte_updated', f'Alerte mise à jour: {id}')
         
         return jsonify({'message': 'Alerte mise à jour'}), 200
@@ -1054,7 +1164,7 @@ def update_alerte(payload, id):
         logger.error(f"Erreur update_alerte: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/alertes/<int:id>', methods=['DELETE'])
+@api.route('/api/alertes/<int:id>', methods=['DELETE'])
 @token_required
 @role_required('admin')
 def delete_alerte(payload, id):
@@ -1066,6 +1176,7 @@ def delete_alerte(payload, id):
         if result['rowcount'] == 0:
             return jsonify({'error': 'Alerte non trouvée'}), 404
         
+        response_cache.bump('alertes')
         log_to_database('warning', 'alerte_deleted', f'Alerte supprimée: {id}')
         
         return jsonify({'message': 'Alerte supprimée'}), 200
@@ -1074,7 +1185,7 @@ def delete_alerte(payload, id):
         logger.error(f"Erreur delete_alerte: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/alertes/logs', methods=['GET'])
+@api.route('/api/alertes/logs', methods=['GET'])
 @token_required
 def get_logs_alertes(payload):
     """Récupérer l'historique des alertes déclenchées"""
@@ -1109,126 +1220,9 @@ def get_logs_alertes(payload):
         return jsonify({'error': 'Erreur serveur'}), 500
 
 
-# ==================== FONCTION VÉRIFICATION ALERTES ====================
-def check_alerts(capteur_id, noeud_id, valeur, mesure_id):
-    """Vérifie les alertes avec IA (3 capteurs)"""
-    try:
-        # CORRECTION : Utiliser 'co2' au lieu de 'fumee'
-        query_mesures = """
-            SELECT c.type, m.valeur 
-            FROM mesures m
-            JOIN capteurs c ON m.capteur_id = c.id
-            WHERE m.noeud_id = %s 
-            AND c.type IN ('temperature', 'humidite', 'co2')
-            AND m.id = (
-                SELECT MAX(m2.id) 
-                FROM mesures m2 
-                JOIN capteurs c2 ON m2.capteur_id = c2.id
-                WHERE m2.noeud_id = %s AND c2.type = c.type
-            )
-        """
-        mesures_recentes = db.execute_query(query_mesures, (noeud_id, noeud_id))
-        
-        temperature = None
-        humidity = None
-        smoke = None
-        
-        for mesure in mesures_recentes:
-            if mesure['type'] == 'temperature':
-                temperature = mesure['valeur']
-            elif mesure['type'] == 'humidite':
-                humidity = mesure['valeur']
-            elif mesure['type'] == 'co2':  # CORRECTION ICI
-                smoke = mesure['valeur']
-        
-        logger.info(f"Noeud {noeud_id}: T={temperature}, H={humidity}, Fumee={smoke}")
-        
-        if temperature is not None and humidity is not None and smoke is not None:
-            prediction = fire_model.predict_fire_risk(
-                temperature=temperature,
-                humidity=humidity,
-                smoke_level=smoke
-            )
-            
-            logger.info(f"Prediction IA Noeud {noeud_id}: {prediction}")
-            
-            if prediction['status'] in ['WARNING', 'CRITICAL']:
-                query_alerte = """
-                    SELECT id, email_notification FROM alertes 
-                    WHERE noeud_id = %s 
-                    AND type_alerte = 'anomalie'
-                    AND actif = TRUE
-                    LIMIT 1
-                """
-                alerte_existante = db.execute_query(query_alerte, (noeud_id,))
-                
-                if alerte_existante:
-                    alerte_id = alerte_existante[0]['id']
-                    
-                    message = f"IA: {prediction['status']} - Risque: {prediction['fire_risk_percent']:.1f}% | T={temperature}°C, H={humidity}%, Fumee={prediction['smoke_level']:.0f}ppm"
-                    
-                    log_query = """
-                        INSERT INTO logs_alertes (alerte_id, mesure_id, valeur_mesuree, message)
-                        VALUES (%s, %s, %s, %s)
-                    """
-                    result = db.execute_query(log_query, (alerte_id, mesure_id, prediction['fire_risk_percent'], message))
-                    
-                    if alerte_existante[0]['email_notification']:
-                        email_notifier.send_alert_notification(
-                            alerte_id,
-                            result['lastrowid'],
-                            prediction['fire_risk_percent'],
-                            message
-                        )
-                    logger.warning(f"Alerte IA declenchee noeud {noeud_id}")
-                else:
-                    logger.warning(f"Prediction {prediction['status']} mais aucune alerte 'anomalie' configuree pour noeud {noeud_id}")
-        
-        query = """
-            SELECT * FROM alertes 
-            WHERE capteur_id = %s 
-            AND actif = TRUE
-            AND (noeud_id = %s OR noeud_id IS NULL)
-        """
-        alertes = db.execute_query(query, (capteur_id, noeud_id))
-        
-        for alerte in alertes:
-            triggered = False
-            message = None
-            
-            if alerte['type_alerte'] == 'seuil_min' and alerte['seuil_min']:
-                if valeur < alerte['seuil_min']:
-                    triggered = True
-                    message = f"Valeur {valeur} inferieure au seuil minimum {alerte['seuil_min']}"
-            
-            elif alerte['type_alerte'] == 'seuil_max' and alerte['seuil_max']:
-                if valeur > alerte['seuil_max']:
-                    triggered = True
-                    message = f"Valeur {valeur} superieure au seuil maximum {alerte['seuil_max']}"
-            
-            if triggered:
-                log_query = """
-                    INSERT INTO logs_alertes (alerte_id, mesure_id, valeur_mesuree, message)
-                    VALUES (%s, %s, %s, %s)
-                """
-                result = db.execute_query(log_query, (alerte['id'], mesure_id, valeur, message))
-                log_alerte_id = result['lastrowid']
-                
-                if alerte['email_notification']:
-                    email_notifier.send_alert_notification(
-                        alerte['id'], 
-                        log_alerte_id, 
-                        valeur, 
-                        message
-                    )
-                
-                logger.warning(f"Alerte declenchee: {alerte['id']} - {message}")
-        
-    except Exception as e:
-        logger.error(f"Erreur check_alerts: {e}")
 # ==================== API LOGS SYSTÈME ====================
 
-@app.route('/api/logs', methods=['GET'])
+@api.route('/api/logs', methods=['GET'])
 @token_required
 @role_required('admin')
 def get_logs(payload):
@@ -1268,7 +1262,7 @@ def get_logs(payload):
 
 #====================Endpoint pour prediction manuelle==============
 
-@app.route('/api/ia/predict', methods=['POST'])
+@api.route('/api/ia/predict', methods=['POST'])
 @token_required
 def predict_fire_risk_api(payload):
     """Endpoint pour prédiction IA manuelle"""
@@ -1296,100 +1290,337 @@ def predict_fire_risk_api(payload):
         logger.error(f"Erreur prédiction API: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
-@app.route('/api/ia/status', methods=['GET'])
+@api.route('/api/ia/status', methods=['GET'])
 @token_required
 def ia_status(payload):
     """Vérifier si le modèle IA est chargé"""
     return jsonify({
         'model_loaded': fire_model.model is not None,
-        'model_path': fire_model.model_path
+        'model_path': fire_model.model_path,
+        'version': fire_model.version,
+        'serveur_inference': fire_model.client.socket_path if fire_model.client else None
     }), 200
 
+@api.route('/api/predictions/risque', methods=['GET'])
+@token_required
+def get_courbes_risque(payload):
+    """Courbes de risque d'incendie sous-échantillonnées (par noeud ou par zone)"""
+    try:
+        try:
+            # Dates avec fuseau ramenées à l'heure locale naïve (comme le défaut et la base)
+            fin = to_local_datetime(request.args['fin']) if request.args.get('fin') else datetime.now()
+            debut = to_local_datetime(request.args['debut']) if request.args.get('debut') \
+                else fin - timedelta(hours=24)
+            noeud_id = request.args.get('noeud_id', type=int)
+            points = min(int(request.args.get('points', Config.PREDICTION_CURVE_POINTS)),
+                         Config.PREDICTION_CURVE_MAX_POINTS)
+            intervalle = int(request.args['intervalle']) if request.args.get('intervalle') else None
+        except ValueError:
+            return jsonify({'error': 'Paramètres invalides (dates ISO 8601, entiers)'}), 400
+
+        zone = request.args.get('zone')
+        if not noeud_id and not zone:
+            # Sans filtre: une courbe par noeud de toute la flotte
+            return jsonify({'error': 'noeud_id ou zone requis'}), 400
+
+        duree = (fin - debut).total_seconds()
+        if duree <= 0 or points <= 0:
+            return jsonify({'error': 'Période ou nombre de points invalide'}), 400
+
+        # Intervalle minimal imposé par le nombre de points demandé
+        intervalle = max(intervalle or 0, math.ceil(duree / points), 1)
+        courbes = risk_curves(debut, fin, intervalle, noeud_id=noeud_id, zone=zone)
+
+        return jsonify({
+            'debut': debut.isoformat(),
+            'fin': fin.isoformat(),
+            'intervalle': intervalle,
+            'courbes': courbes
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Erreur get_courbes_risque: {e}")
+        return jsonify({'error': 'Erreur serveur'}), 500
+
+# ==================== ZONES / VOISINS ====================
+
+def _voisins_params():
+    """Paramètres k et rayon_km des recherches de voisins (rayon borné par SPATIAL_MAX_RAYON_KM)"""
+    k = min(request.args.get('k', 5, type=int), Config.SPATIAL_MAX_VOISINS)
+    rayon_km = min(request.args.get('rayon_km', Config.SPATIAL_MAX_RAYON_KM, type=float),
+                   Config.SPATIAL_MAX_RAYON_KM)
+    return max(k, 1), rayon_km
+
+@api.route('/api/zones', methods=['GET'])
+@token_required
+def get_zones(payload):
+    """Agrégats par zone (risque max, température moyenne, noeuds hors ligne)"""
+    try:
+        return jsonify(fleet_state.zones()), 200
+    except Exception as e:
+        logger.error(f"Erreur get_zones: {e}")
+        return jsonify({'error': 'Erreur serveur'}), 500
+
+@api.route('/api/zones/<zone>', methods=['GET'])
+@token_required
+def get_zone(payload, zone):
+    """Agrégat d'une zone et état courant de ses noeuds"""
+    try:
+        agregat = next((z for z in fleet_state.zones() if z['zone'] == zone), None)
+        if agregat is None:
+            return jsonify({'error': 'Zone non trouvée'}), 404
+        agregat['noeuds'] = fleet_state.zone_nodes(zone)
+        return jsonify(agregat), 200
+    except Exception as e:
+        logger.error(f"Erreur get_zone: {e}")
+        return jsonify({'error': 'Erreur serveur'}), 500
+
+@api.route('/api/noeuds/<int:id>/voisins', methods=['GET'])
+@token_required
+def get_voisins_noeud(payload, id):
+    """Noeuds les plus proches d'un noeud (corrélation d'un front de feu)"""
+    try:
+        k, rayon_km = _voisins_params()
+        fleet_state.refresh()
+        noeud = fleet_state.nodes.get(id)
+        if noeud is None:
+            return jsonify({'error': 'Noeud non trouvé'}), 404
+        if noeud['latitude'] is None or noeud['longitude'] is None:
+            return jsonify({'error': 'Noeud sans coordonnées'}), 400
+
+        voisins = fleet_state.neighbours(noeud['latitude'], noeud['longitude'], k, rayon_km, exclude=id)
+        return jsonify({
+            'noeud': fleet_state.describe(id),
+            'voisins': voisins,
+            'voisins_a_risque': sum(v['statut_risque'] in ('WARNING', 'CRITICAL') for v in voisins)
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Erreur get_voisins_noeud: {e}")
+        return jsonify({'error': 'Erreur serveur'}), 500
+
+@api.route('/api/voisins', methods=['GET'])
+@token_required
+def get_voisins(payload):
+    """Noeuds les plus proches d'un point (lat, lon)"""
+    try:
+        latitude = request.args.get('lat', type=float)
+        longitude = request.args.get('lon', type=float)
+        if latitude is None or longitude is None or not validator.validate_coordinates(latitude, longitude):
+            return jsonify({'error': 'Coordonnées invalides'}), 400
+
+        k, rayon_km = _voisins_params()
+        return jsonify(fleet_state.neighbours(latitude, longitude, k, rayon_km)), 200
+
+    except Exception as e:
+        logger.error(f"Erreur get_voisins: {e}")
+        return jsonify({'error': 'Erreur serveur'}), 500
+
 # ==================== DASHBOARD / STATISTIQUES ====================
 
-@app.route('/api/dashboard/summary', methods=['GET'])
+def dashboard_summary():
+    """Compteurs et dernières mesures du dashboard"""
+    # Nombre total de capteurs actifs
+    capteurs_query = "SELECT COUNT(*) as total FROM capteurs WHERE actif = TRUE"
+    capteurs_count = db.execute_query(capteurs_query)[0]['total']
+    
+    # Nombre total de noeuds actifs
+    noeuds_query = "SELECT COUNT(*) as total FROM noeuds WHERE statut = 'actif'"
+    noeuds_count = db.execute_query(noeuds_query)[0]['total']
+    
+    # Nombre total de mesures
+    mesures_query = "SELECT COUNT(*) as total FROM mesures"
+    mesures_count = db.execute_query(mesures_query)[0]['total']
+    
+    # Mesures des dernières 24h
+    mesures_24h_query = """
+        SELECT COUNT(*) as total 
+        FROM mesures 
+        WHERE timestamp >= DATE_SUB(NOW(), INTERVAL 24 HOUR)
+    """
+    mesures_24h = db.execute_query(mesures_24h_query)[0]['total']
+    
+    # Alertes actives
+    alertes_query = "SELECT COUNT(*) as total FROM alertes WHERE actif = TRUE"
+    alertes_count = db.execute_query(alertes_query)[0]['total']
+    
+    # Alertes déclenchées aujourd'hui
+    alertes_today_query = """
+        SELECT COUNT(*) as total 
+        FROM logs_alertes 
+        WHERE DATE(timestamp) = CURDATE()
+    """
+    alertes_today = db.execute_query(alertes_today_query)[0]['total']
+    
+    # Dernières mesures par capteur
+    dernieres_mesures_query = """
+        SELECT c.nom as capteur, c.type, c.unite,
+               m.valeur, m.timestamp, n.nom as noeud
+        FROM capteurs c
+        JOIN mesures m ON c.id = m.capteur_id
+        JOIN noeuds n ON m.noeud_id = n.id
+        WHERE m.id IN (
+            SELECT MAX(id) FROM mesures GROUP BY capteur_id
+        )
+        LIMIT 10
+    """
+    dernieres_mesures = db.execute_query(dernieres_mesures_query)
+    
+    return {
+        'capteurs_actifs': capteurs_count,
+        'noeuds_actifs': noeuds_count,
+        'total_mesures': mesures_count,
+        'mesures_24h': mesures_24h,
+        'alertes_actives': alertes_count,
+        'alertes_aujourd_hui': alertes_today,
+        'dernieres_mesures': dernieres_mesures
+    }
+
+@api.route('/api/dashboard/summary', methods=['GET'])
 @token_required
 def get_dashboard_summary(payload):
     """Résumé pour le dashboard"""
     try:
-        # Nombre total de capteurs actifs
-        capteurs_query = "SELECT COUNT(*) as total FROM capteurs WHERE actif = TRUE"
-        capteurs_count = db.execute_query(capteurs_query)[0]['total']
-        
-        # Nombre total de noeuds actifs
-        noeuds_query = "SELECT COUNT(*) as total FROM noeuds WHERE statut = 'actif'"
-        noeuds_count = db.execute_query(noeuds_query)[0]['total']
-        
-        # Nombre total de mesures
-        mesures_query = "SELECT COUNT(*) as total FROM mesures"
-        mesures_count = db.execute_query(mesures_query)[0]['total']
-        
-        # Mesures des dernières 24h
-        mesures_24h_query = """
-            SELECT COUNT(*) as total 
-            FROM mesures 
-            WHERE timestamp >= DATE_SUB(NOW(), INTERVAL 24 HOUR)
-        """
-        mesures_24h = db.execute_query(mesures_24h_query)[0]['total']
-        
-        # Alertes actives
-        alertes_query = "SELECT COUNT(*) as total FROM alertes WHERE actif = TRUE"
-        alertes_count = db.execute_query(alertes_query)[0]['total']
+        return jsonify(dashboard_summary()), 200
         
-        # Alertes déclenchées aujourd'hui
-        alertes_today_query = """
-            SELECT COUNT(*) as total 
-            FROM logs_alertes 
-            WHERE DATE(timestamp) = CURDATE()
-        """
-        alertes_today = db.execute_query(alertes_today_query)[0]['total']
-        
-        # Dernières mesures par capteur
-        dernieres_mesures_query = """
-            SELECT c.nom as capteur, c.type, c.unite,
-                   m.valeur, m.timestamp, n.nom as noeud
-            FROM capteurs c
-            JOIN mesures m ON c.id = m.capteur_id
-            JOIN noeuds n ON m.noeud_id = n.id
-            WHERE m.id IN (
-                SELECT MAX(id) FROM mesures GROUP BY capteur_id
-            )
-            LIMIT 10
-        """
-        dernieres_mesures = db.execute_query(dernieres_mesures_query)
-        
-        summary = {
-            'capteurs_actifs': capteurs_count,
-            'noeuds_actifs': noeuds_count,
-            'total_mesures': mesures_count,
-            'mesures_24h': mesures_24h,
-            'alertes_actives': alertes_count,
-            'alertes_aujourd_hui': alertes_today,
-            'dernieres_mesures': dernieres_mesures
-        }
+    except Exception as e:
+        logger.error(f"Erreur get_dashboard_summary: {e}")
+        return jsonify({'error': 'Erreur serveur'}), 500
+
+@api.route('/api/dashboard/bundle', methods=['GET'])
+@token_required
+def get_dashboard_bundle(payload):
+    """Résumé, une page de noeuds (avec leurs capteurs) et leurs séries récentes en une réponse"""
+    try:
+        statut = request.args.get('statut', 'actif')
+        # resume=0: actualisation des séries seules (le résumé compte les mesures sur 24 h)
+        avec_resume = request.args.get('resume', '1') != '0'
+        limit = min(request.args.get('limit', Config.DASHBOARD_SERIES_LIMIT, type=int),
+                    Config.DASHBOARD_SERIES_MAX_LIMIT)
+        points = request.args.get('points', type=int)
+        page = request.args.get('page', 1, type=int)
+        par_page = min(request.args.get('par_page', Config.DASHBOARD_MAX_NOEUDS, type=int),
+                       Config.DASHBOARD_MAX_NOEUDS)
+        
+        if limit <= 0 or page < 1 or par_page < 1 or (points is not None and points < 4):
+            return jsonify({'error': 'limit, points ou page invalide'}), 400
+        
+        total = db.execute_query("SELECT COUNT(*) AS total FROM noeuds WHERE statut = %s", (statut,))[0]['total']
+        noeuds = db.execute_query(
+            "SELECT * FROM noeuds WHERE statut = %s ORDER BY nom, id LIMIT %s OFFSET %s",
+            (statut, par_page, (page - 1) * par_page)
+        )
+        for noeud in noeuds:
+            noeud['api_key'] = noeud['api_key'][:10] + '...'
+            noeud['capteurs'] = []
+        
+        # Capteurs associés des noeuds de la page en une requête
+        par_id = {noeud['id']: noeud for noeud in noeuds}
+        if par_id:
+            placeholders = ', '.join(['%s'] * len(par_id))
+            associations = db.execute_query(f"""
+                SELECT nc.noeud_id, c.id, c.nom, c.type, c.unite
+                FROM noeud_capteur nc
+                JOIN capteurs c ON c.id = nc.capteur_id
+                WHERE nc.noeud_id IN ({placeholders})
+                ORDER BY c.nom
+            """, tuple(par_id))
+            for row in associations:
+                par_id[row.pop('noeud_id')]['capteurs'].append(row)
+        
+        # limit mesures au rythme attendu: la numérotation ne parcourt pas 24 h de mesures
+        fenetre = min(limit * Config.DASHBOARD_SERIES_PERIOD, Config.DASHBOARD_SERIES_WINDOW)
+        series = recent_series(list(par_id), limit, fenetre, points)
         
-        return jsonify(summary), 200
+        return jsonify({
+            'resume': dashboard_summary() if avec_resume else None,
+            'noeuds': noeuds,
+            'series': series,
+            'pagination': {'page': page, 'par_page': par_page, 'total': total}
+        }), 200
         
     except Exception as e:
-        logger.error(f"Erreur get_dashboard_summary: {e}")
+        logger.error(f"Erreur get_dashboard_bundle: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
 # ==================== GESTION DES ERREURS ====================
 
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Route non trouvée'}), 404
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
     logger.error(f"Erreur 500: {error}")
     return jsonify({'error': 'Erreur interne du serveur'}), 500
 
-@app.errorhandler(Exception)
+@api.app_errorhandler(Exception)
 def handle_exception(e):
     logger.error(f"Exception non gérée: {e}")
     return jsonify({'error': 'Une erreur est survenue'}), 500
 
+# ==================== DISPONIBILITÉ ====================
+
+@api.route('/api/ready', methods=['GET'])
+def readiness():
+    """
+    Disponibilité du worker (sonde du load balancer / orchestrateur)
+
+    Vérifie la base et charge le modèle IA s'il ne l'est pas encore: le coût
+    du premier chargement est payé par la sonde, pas par une mesure.
+    """
+    checks = {}
+    ready = True
+    try:
+        db.ping()
+        checks['base'] = 'ok'
+    except Exception as e:
+        logger.error(f"Erreur readiness base: {e}")
+        checks['base'] = 'indisponible'
+        ready = False
+    
+    # Sans modèle (ou serveur d'inférence arrêté), les seuils simples prennent le relais
+    checks['modele'] = fire_model.version
+    checks['serveur_inference'] = fire_model.client.socket_path if fire_model.client else None
+    
+    return jsonify({'pret': ready, 'verifications': checks}), 200 if ready else 503
+
+# ==================== APPLICATION ====================
+
+def create_app(config=Config):
+    """
+    Crée l'application Flask
+
+    Rien n'est initialisé à l'import: le pool MySQL, le modèle IA et les tâches
+    de fond démarrent au premier usage dans chaque worker.
+    """
+    application = Flask(__name__)
+    application.config.from_object(config)
+    CORS(application, resources={
+        r"/api/*": {
+            "origins": "*",  # Permet toutes les origines (pour le développement)
+            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization", "X-API-Key"]
+        }
+    })
+    
+    # Métriques Prometheus (/metrics + latence par route)
+    metrics.init_app(application)
+    # Profilage à la demande (admin) ou échantillonné
+    profiling.init_app(application)
+    # JSON rapide et compression (enregistrée en dernier: exécutée avant les hooks
+    # de métriques et de profilage, qui mesurent donc aussi la compression)
+    if config.JSON_PROVIDER == 'orjson':
+        application.json = OrjsonProvider(application)
+    if config.COMPRESSION_ENABLED:
+        compression.init_app(application)
+    
+    application.register_blueprint(api)
+    return application
+
+# Instance globale (gunicorn app:app, wsgi.py)
+app = create_app()
+
 # ==================== LANCEMENT ====================
 
 if __name__ == '__main__':
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Service d'ingestion asynchrone (ASGI, Starlette + aiomysql).
+
+Sert POST /api/mesures et POST /api/mesures/bulk avec les mêmes réponses que
+app.py, sans bloquer un thread par requête en attente (noeuds cellulaires lents):
+l'authentification, la vérification des associations et l'insertion utilisent
+un pool MySQL asynchrone. La validation (IngestValidator), les requêtes
+d'authentification (auth.py), le découpage des lots (ingestion.py) et
+l'évaluation des alertes (alerts.py) sont partagés avec l'application Flask,
+qui continue de servir l'interface d'administration.
+
+Lancement:
+    uvicorn asgi_ingest:app --host 0.0.0.0 --port 5001 --workers 2
+"""
+import asyncio
+import functools
+import json
+import time
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.background import BackgroundTasks
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from config import Config
+from auth import API_KEY_QUERY
+from alerts import check_alerts
+from database_async import create_async_db
+from liveness import last_seen
+from ingestion import (INSERT_MESURE, association_query, split_batches, mesure_params,
+                       remember, write_buffer)
+from utils.logger import logger, log_to_database
+from utils.validators import IngestValidator, MANQUANT, HORS_LIMITES
+from utils import metrics
+
+adb = create_async_db()
+ingest_validator = IngestValidator()
+
+class RequestError(Exception):
+    """Erreur renvoyée telle quelle au client"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+async def read_json(request):
+    """Corps JSON de la requête (taille bornée par MAX_CONTENT_LENGTH)"""
+    length = request.headers.get('content-length')
+    if length and length.isdigit() and int(length) > Config.MAX_CONTENT_LENGTH:
+        raise RequestError('Requête trop volumineuse', 413)
+    body = await request.body()
+    if len(body) > Config.MAX_CONTENT_LENGTH:
+        raise RequestError('Requête trop volumineuse', 413)
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        raise RequestError('Format invalide', 400)
+
+async def verify_api_key(api_key):
+    """Équivalent asynchrone de auth.verify_api_key"""
+    try:
+        result = await adb.execute_query(API_KEY_QUERY, (api_key,))
+        if result:
+            last_seen.touch(result[0]['id'])
+            return result[0]
+        return None
+    except Exception as e:
+        logger.error(f"Erreur vérification API key: {e}")
+        return None
+
+async def authenticate(request, data, tasks):
+    """Équivalent de auth.api_key_required (header X-API-Key ou champ api_key)"""
+    api_key = request.headers.get('x-api-key')
+    if not api_key and isinstance(data, dict):
+        api_key = data.get('api_key')
+
+    if not api_key:
+        tasks.add_task(log_to_database, 'warning', 'api_auth_failed', 'Clé API manquante')
+        raise RequestError('Clé API manquante', 401)
+
+    noeud = await verify_api_key(api_key)
+    if not noeud:
+        tasks.add_task(log_to_database, 'warning', 'api_auth_failed',
+                       f'Clé API invalide: {api_key[:10]}...')
+        raise RequestError('Clé API invalide', 401)
+    return noeud
+
+async def ingest(noeud, rows, source, tasks):
+    """
+    Insère des mesures validées; les alertes sont évaluées après l'envoi de la réponse
+
+    Returns:
+        tuple: (ids insérés, erreurs par index, nombre de doublons)
+    """
+    associations = await adb.execute_query(association_query(1), (noeud['id'],))
+    allowed = {(row['noeud_id'], row['capteur_id']) for row in associations}
+    [[_, errors, doublons]], accepted = split_batches([(noeud, rows)], allowed)
+    if not accepted:
+        return [], errors, doublons
+
+    params = mesure_params(accepted)
+    if write_buffer is not None:
+        # Insertion et alertes différées au vidage du tampon d'écriture
+        await asyncio.to_thread(write_buffer.append, params, source)
+        remember(params)
+        return [None] * len(params), errors, doublons
+
+    inserted = await adb.insert_many(INSERT_MESURE, params)
+    remember(params, inserted)
+    ids = [mesure_id for mesure_id in inserted if mesure_id is not None]
+    metrics.INGEST_ROWS.labels(source).inc(len(ids))
+
+    # check_alerts est synchrone (modèle IA, emails): exécuté dans le pool de threads
+    for (noeud_id, capteur_id, valeur, timestamp, _, _), mesure_id in zip(params, inserted):
+        if mesure_id is not None:
+            tasks.add_task(check_alerts, capteur_id, noeud_id, valeur, mesure_id, timestamp)
+    return ids, errors, doublons + len(inserted) - len(ids)
+
+def instrumented(path):
+    """Endpoint instrumenté (métriques HTTP, erreurs client et serveur)"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def endpoint(request):
+            start = time.perf_counter()
+            tasks = BackgroundTasks()
+            try:
+                body, status = await handler(request, tasks)
+            except RequestError as e:
+                body, status = {'error': str(e)}, e.status
+            except Exception as e:
+                logger.error(f"Erreur {handler.__name__}: {e}")
+                body, status = {'error': 'Erreur serveur'}, 500
+            metrics.HTTP_REQUEST_DURATION.labels(
+                request.method, path, status
+            ).observe(time.perf_counter() - start)
+            return JSONResponse(body, status_code=status, background=tasks)
+        return endpoint
+    return decorator
+
+@instrumented('/api/mesures')
+async def add_mesure(request, tasks):
+    """Recevoir et enregistrer une mesure (protégé par API key)"""
+    data = await read_json(request)
+    noeud = await authenticate(request, data, tasks)
+
+    mesure, error = ingest_validator.validate(data)
+    if error == MANQUANT:
+        raise RequestError('capteur_id et valeur requis', 400)
+    if error == HORS_LIMITES:
+        raise RequestError('Valeur hors limites', 400)
+    if error:
+        raise RequestError('Mesure invalide', 400)
+
+    mesure['index'] = 0
+    ids, errors, doublons = await ingest(noeud, [mesure], 'json', tasks)
+    if errors:
+        raise RequestError('Capteur non associé à ce noeud', 403)
+
+    if doublons:
+        return {'message': 'Mesure déjà enregistrée', 'id': None, 'doublon': True}, 200
+    if ids[0] is None:
+        return {'message': 'Mesure acceptée', 'id': None}, 202
+    return {'message': 'Mesure enregistrée', 'id': ids[0]}, 201
+
+@instrumented('/api/mesures/bulk')
+async def add_mesures_bulk(request, tasks):
+    """Recevoir plusieurs mesures en une fois"""
+    data = await read_json(request)
+    noeud = await authenticate(request, data, tasks)
+
+    mesures = data.get('mesures', []) if isinstance(data, dict) else None
+    if not mesures or not isinstance(mesures, list):
+        raise RequestError('Format invalide', 400)
+    if len(mesures) > 100:
+        raise RequestError('Maximum 100 mesures par requête', 400)
+
+    rows, errors = ingest_validator.validate_bulk(mesures)
+    ids, association_errors, doublons = await ingest(noeud, rows, 'bulk', tasks)
+    errors = sorted(errors + association_errors, key=lambda e: e['index'])
+
+    return {
+        'message': f'{len(ids)} mesures enregistrées',
+        'inserted': len(ids),
+        'doublons': doublons,
+        'errors': errors if errors else None
+    }, 202 if write_buffer is not None else 201
+
+async def health(request):
+    """Vérification de l'état du service"""
+    try:
+        await adb.execute_query("SELECT 1")
+        return JSONResponse({'status': 'healthy', 'database': 'connected'})
+    except Exception as e:
+        return JSONResponse({'status': 'unhealthy', 'error': str(e)}, status_code=503)
+
+async def metrics_endpoint(request):
+    """Métriques au format Prometheus"""
+    client = request.client.host if request.client else None
+    if not metrics.scrape_allowed(request.headers.get('authorization'), client):
+        return JSONResponse({'error': 'Accès aux métriques refusé'}, status_code=403)
+    data, content_type = metrics.generate_metrics()
+    return Response(data, headers={'Content-Type': content_type})
+
+@asynccontextmanager
+async def lifespan(app):
+    await adb.connect()
+    logger.info("Service d'ingestion ASGI démarré")
+    yield
+    await adb.close()
+
+app = Starlette(
+    routes=[
+        Route('/api/mesures', add_mesure, methods=['POST']),
+        Route('/api/mesures/bulk', add_mesures_bulk, methods=['POST']),
+        Route('/health', health),
+    ] + ([Route('/metrics', metrics_endpoint)] if Config.METRICS_ENABLED else []),
+    lifespan=lifespan
+)
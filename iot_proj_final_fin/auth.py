@@ -4,6 +4,7 @@ from functools import wraps
 from flask import request, jsonify
 from config import Config
 from database import db
+from liveness import last_seen
 from utils.logger import logger, log_to_database
 
 def generate_token(user_id, username, role):
@@ -29,16 +30,17 @@ def verify_token(token):
     except jwt.InvalidTokenError:
         return None
 
+# Requête partagée avec le service d'ingestion asynchrone (asgi_ingest.py)
+API_KEY_QUERY = "SELECT id, nom, statut FROM noeuds WHERE api_key = %s AND statut = 'actif'"
+
 def verify_api_key(api_key):
     """Vérifie une clé API de noeud"""
     try:
-        query = "SELECT id, nom, statut FROM noeuds WHERE api_key = %s AND statut = 'actif'"
-        result = db.execute_query(query, (api_key,))
+        result = db.execute_query(API_KEY_QUERY, (api_key,))
         
         if result:
-            # Mettre à jour la dernière connexion
-            update_query = "UPDATE noeuds SET derniere_connexion = NOW() WHERE id = %s"
-            db.execute_query(update_query, (result[0]['id'],))
+            # Mettre à jour la dernière connexion (écrite par lots, voir liveness.py)
+            last_seen.touch(result[0]['id'])
             return result[0]
         return None
     except Exception as e:
@@ -0,0 +1,79 @@
+# Création d'une flotte simulée de noeuds ESP32 pour les benchmarks
+import random
+
+from utils.security import generate_api_key
+
+# Types de capteurs d'un noeud forestier (mêmes types que check_alerts)
+TYPES_CAPTEURS = [
+    ('temperature', '°C'),
+    ('humidite', '%'),
+    ('co2', 'ppm'),
+]
+
+PREFIXE = 'bench'
+
+def _capteurs(db):
+    """Crée (ou retrouve) les capteurs partagés par la flotte"""
+    capteurs = {}
+    for type_capteur, unite in TYPES_CAPTEURS:
+        nom = f"{PREFIXE}-{type_capteur}"
+        result = db.execute_query("SELECT id FROM capteurs WHERE nom = %s", (nom,))
+        if result:
+            capteurs[type_capteur] = result[0]['id']
+        else:
+            insert = db.execute_query(
+                "INSERT INTO capteurs (nom, type, unite) VALUES (%s, %s, %s)",
+                (nom, type_capteur, unite)
+            )
+            capteurs[type_capteur] = insert['lastrowid']
+    return capteurs
+
+def ensure_fleet(db, nb_noeuds):
+    """Garantit l'existence de nb_noeuds noeuds de benchmark et les retourne"""
+    capteurs = _capteurs(db)
+    existants = db.execute_query(
+        "SELECT id, nom, api_key FROM noeuds WHERE nom LIKE %s ORDER BY id",
+        (f"{PREFIXE}-%",)
+    )
+    noeuds = [{'id': n['id'], 'api_key': n['api_key'], 'capteurs': capteurs}
+              for n in existants[:nb_noeuds]]
+
+    for index in range(len(existants), nb_noeuds):
+        api_key = generate_api_key('bench')[:64]
+        mac = 'BE:0C:' + ':'.join(f"{(index >> s) & 0xFF:02X}" for s in (24, 16, 8, 0))
+        result = db.execute_query(
+            "INSERT INTO noeuds (nom, adresse_mac, localisation, modele, api_key) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            (f"{PREFIXE}-{index:05d}", mac, 'Benchmark', 'ESP32-sim', api_key)
+        )
+        noeud_id = result['lastrowid']
+        db.execute_many(
+            "INSERT INTO noeud_capteur (noeud_id, capteur_id) VALUES (%s, %s)",
+            [(noeud_id, capteur_id) for capteur_id in capteurs.values()]
+        )
+        # Alertes sans email: exercent le chemin d'évaluation sans SMTP
+        db.execute_query(
+            "INSERT INTO alertes (capteur_id, noeud_id, type_alerte, severite, "
+            "seuil_max, message, email_notification) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            (capteurs['temperature'], noeud_id, 'seuil_max', 'warning', 45, 'bench', False)
+        )
+        db.execute_query(
+            "INSERT INTO alertes (capteur_id, noeud_id, type_alerte, severite, "
+            "message, email_notification) VALUES (%s, %s, %s, %s, %s, %s)",
+            (capteurs['co2'], noeud_id, 'anomalie', 'critical', 'bench', False)
+        )
+        noeuds.append({'id': noeud_id, 'api_key': api_key, 'capteurs': capteurs})
+
+    return noeuds
+
+def simulate_reading(rng, type_capteur):
+    """Valeur plausible d'un capteur (avec de rares épisodes de feu)"""
+    feu = rng.random() < 0.01
+    if type_capteur == 'temperature':
+        return round(rng.gauss(55 if feu else 24, 5), 2)
+    if type_capteur == 'humidite':
+        return round(min(max(rng.gauss(15 if feu else 55, 12), 0), 100), 2)
+    return round(max(rng.gauss(600 if feu else 150, 60), 0), 1)
+
+def make_rng(seed):
+    return random.Random(seed)
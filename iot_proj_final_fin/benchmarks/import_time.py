@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Temps d'import de l'application (python -X importtime) et budget de démarrage.
+
+Importe le module (app par défaut) dans un processus neuf, --repetitions
+fois, et garde le plus rapide. Affiche les modules les plus coûteux (temps
+cumulé) et échoue (code de sortie 1) si:
+- le temps total dépasse --budget-ms (IMPORT_TIME_BUDGET_MS);
+- un module dont le chargement doit rester différé (--interdits: pandas,
+  scikit-learn, joblib) est importé.
+
+Exemples (depuis le dossier du projet):
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --module asgi_ingest --budget-ms 800 --top 30
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+from config import Config
+
+INTERDITS = ('pandas', 'sklearn', 'joblib')
+LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def measure(module, env, cwd=None):
+    """
+    Un import dans un processus neuf
+
+    Returns:
+        list: [(module, temps propre µs, temps cumulé µs, profondeur)]
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=env, cwd=cwd
+    )
+    if result.returncode:
+        raise RuntimeError(f"Import de {module} en échec:\n{result.stderr[-2000:]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            entries.append((name, int(own), int(cumulative), (len(indent) - 1) // 2))
+    return entries
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--budget-ms', type=float, default=Config.IMPORT_TIME_BUDGET_MS)
+    parser.add_argument('--interdits', nargs='*', default=list(INTERDITS),
+                        help="paquets qui ne doivent pas être importés au démarrage")
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args(argv)
+
+    # Base SQLite jetable: la mesure ne dépend pas d'un serveur MySQL
+    env = dict(os.environ)
+    env.setdefault('DB_BACKEND', 'sqlite')
+    env.setdefault('SQLITE_PATH', os.path.join(tempfile.mkdtemp(prefix='iot_import_'), 'import.sqlite3'))
+
+    runs = [measure(args.module, env) for _ in range(args.repetitions)]
+    entries = min(runs, key=lambda run: sum(own for _, own, _, _ in run))
+    total_ms = sum(own for _, own, _, _ in entries) / 1000
+
+    print(f"import {args.module}: {total_ms:.0f} ms (meilleur de {args.repetitions}, budget {args.budget_ms:.0f} ms)")
+    print(f"  {'module':<40}{'cumulé (ms)':>14}{'propre (ms)':>14}")
+    # Modules importés directement par le module mesuré (ou ses dépendances de premier niveau)
+    top_level = [e for e in entries if e[3] <= 1 and e[0] != args.module]
+    for name, own, cumulative, _ in sorted(top_level, key=lambda e: -e[2])[:args.top]:
+        print(f"  {name:<40}{cumulative / 1000:>14.1f}{own / 1000:>14.1f}")
+
+    imported = {name.split('.')[0] for name, _, _, _ in entries}
+    forbidden = sorted(imported & set(args.interdits))
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"budget dépassé: {total_ms:.0f} ms > {args.budget_ms:.0f} ms")
+    if forbidden:
+        failures.append(f"imports à différer chargés au démarrage: {', '.join(forbidden)}")
+    for failure in failures:
+        print(f"ÉCHEC {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Coût de sérialisation et taille des grandes réponses JSON (sans HTTP ni base).
+
+Construit des lignes comme celles de get_mesures et get_logs avec un curseur
+mysql-connector (Decimal, datetime), puis mesure pour chaque combinaison:
+- fournisseur JSON: defaut (Flask, module json) ou orjson (utils/json_provider.py);
+- compression: aucune, gzip, brotli (si installé) aux niveaux de Config.
+
+Affiche le temps par réponse (sérialisation + compression) et la taille
+envoyée.
+
+Exemples (depuis le dossier du projet):
+    python -m benchmarks.json_responses
+    python -m benchmarks.json_responses --lignes 100 1000 10000
+"""
+import argparse
+import decimal
+import os
+import random
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DB_BACKEND', 'sqlite')
+os.environ.setdefault('SQLITE_PATH', os.path.join(tempfile.mkdtemp(prefix='iot_json_'), 'json.sqlite3'))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from utils.compression import available_encodings, compress
+from utils.json_provider import OrjsonProvider
+
+def mesures_rows(n, rng):
+    """Lignes de get_mesures (jointure capteurs + noeuds)"""
+    debut = datetime(2026, 6, 1)
+    return [{
+        'id': i, 'noeud_id': i % 50 + 1, 'capteur_id': i % 3 + 1,
+        'valeur': decimal.Decimal(f"{rng.uniform(10, 45):.2f}"),
+        'timestamp': debut + timedelta(seconds=10 * i),
+        'metadata': None, 'client_id': f"msg-{i}",
+        'capteur_nom': ('DHT22 température', 'DHT22 humidité', 'MQ-2 fumée')[i % 3],
+        'type': ('temperature', 'humidite', 'co2')[i % 3],
+        'unite': ('°C', '%', 'ppm')[i % 3],
+        'noeud_nom': f"ESP32-{i % 50 + 1:03d}", 'localisation': 'Parcelle nord'
+    } for i in range(n)]
+
+def logs_rows(n, rng):
+    """Lignes de get_logs"""
+    debut = datetime(2026, 6, 1)
+    return [{
+        'id': i, 'niveau': rng.choice(('info', 'warning', 'error')),
+        'type_evenement': rng.choice(('mesure_recue', 'capteur_updated', 'api_auth_failed')),
+        'message': f"Événement {i} du noeud {i % 50 + 1}",
+        'noeud_id': i % 50 + 1, 'adresse_ip': '192.168.1.20',
+        'timestamp': debut + timedelta(seconds=7 * i)
+    } for i in range(n)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lignes', nargs='+', type=int, default=[1000, 10000])
+    parser.add_argument('--min-temps', type=float, default=0.5,
+                        help='Durée minimale de mesure par cas (secondes)')
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    providers = {'defaut': DefaultJSONProvider(app), 'orjson': OrjsonProvider(app)}
+    encodings = (None,) + available_encodings()
+    rng = random.Random(42)
+
+    print(f"{'réponse':<22}{'json':<10}{'encodage':<10}{'ms/réponse':>12}{'octets':>12}")
+    for nom, builder in (('get_mesures', mesures_rows), ('get_logs', logs_rows)):
+        for n in args.lignes:
+            rows = builder(n, rng)
+            for provider_name, provider in providers.items():
+                for encoding in encodings:
+                    def render():
+                        with app.app_context():
+                            data = provider.response(rows).get_data()
+                        return compress(data, encoding) if encoding else data
+                    timer = timeit.Timer(render)
+                    number, _ = timer.autorange()
+                    runs = max(1, int(args.min_temps / max(timer.timeit(number) / number, 1e-9)))
+                    elapsed = timer.timeit(runs) / runs
+                    print(f"{f'{nom} ({n})':<22}{provider_name:<10}{encoding or '-':<10}"
+                          f"{elapsed * 1000:>12.2f}{len(render()):>12}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Benchmark de charge de l'API avec une flotte ESP32 simulée.
+
+Exemples (depuis le dossier du projet):
+    # Serveur local lancé automatiquement sur une base SQLite neuve
+    python -m benchmarks.load_api --sqlite --noeuds 50 --duree 30
+
+    # Serveur existant (MySQL), comparaison avec la référence
+    python -m benchmarks.load_api --url http://127.0.0.1:5000 \\
+        --baseline benchmarks/baseline.json
+
+La charge est en boucle ouverte: chaque requête est planifiée à l'avance et sa
+latence est mesurée depuis l'instant prévu d'envoi (la saturation du serveur
+apparaît donc dans les percentiles au lieu de ralentir le générateur).
+"""
+import argparse
+import heapq
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from benchmarks.fleet import ensure_fleet, simulate_reading, make_rng, TYPES_CAPTEURS
+
+# Métriques comparées à la référence
+PERCENTILES = (50, 95, 99)
+
+class Recorder:
+    """Collecte thread-safe des latences par endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latences = defaultdict(list)
+        self.erreurs = defaultdict(int)
+        self.requetes_sql = defaultdict(list)
+        self.mesures_acceptees = 0
+
+    def record(self, endpoint, latence, ok, nb_sql=None, nb_mesures=0):
+        with self.lock:
+            self.latences[endpoint].append(latence)
+            if not ok:
+                self.erreurs[endpoint] += 1
+            if nb_sql is not None:
+                self.requetes_sql[endpoint].append(nb_sql)
+            self.mesures_acceptees += nb_mesures
+
+    def report(self, duree):
+        endpoints = {}
+        for endpoint, latences in sorted(self.latences.items()):
+            ms = np.asarray(latences) * 1000
+            stats = {
+                'requetes': len(latences),
+                'erreurs': self.erreurs[endpoint],
+                'debit_rps': round(len(latences) / duree, 2),
+                'moyenne_ms': round(float(ms.mean()), 2),
+            }
+            for p, value in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+                stats[f'p{p}_ms'] = round(float(value), 2)
+            sql = self.requetes_sql.get(endpoint)
+            stats['requetes_sql_moy'] = round(float(np.mean(sql)), 2) if sql else None
+            endpoints[endpoint] = stats
+        return {
+            'duree_s': round(duree, 2),
+            'mesures_par_s': round(self.mesures_acceptees / duree, 2),
+            'endpoints': endpoints,
+        }
+
+def build_schedule(args, noeuds, rng):
+    """Planifie toutes les requêtes du scénario: liste triée de (t, type, données)"""
+    events = []
+    nb_bulk = int(len(noeuds) * args.bulk_ratio)
+
+    for index, noeud in enumerate(noeuds):
+        bulk = index < nb_bulk
+        periode = args.intervalle * (args.bulk_taille if bulk else 1)
+        t = rng.uniform(0, periode)
+        while t < args.duree:
+            events.append((t, 'bulk' if bulk else 'mesure', index))
+            t += periode * rng.uniform(0.9, 1.1)
+
+    for lecteur in range(args.lecteurs):
+        t = rng.uniform(0, args.lecteur_intervalle)
+        while t < args.duree:
+            events.append((t, 'dashboard', lecteur))
+            t += args.lecteur_intervalle
+
+    if args.predict_rps > 0:
+        t = rng.expovariate(args.predict_rps)
+        while t < args.duree:
+            events.append((t, 'predict', None))
+            t += rng.expovariate(args.predict_rps)
+
+    heapq.heapify(events)
+    return [heapq.heappop(events) for _ in range(len(events))]
+
+class LoadGenerator:
+    """Exécute le scénario planifié contre l'API"""
+
+    def __init__(self, args, noeuds, token):
+        self.args = args
+        self.base = args.url.rstrip('/') + '/api'
+        self.noeuds = noeuds
+        self.token = token
+        self.recorder = Recorder()
+        self.local = threading.local()
+        self.rng = make_rng(args.seed + 1)
+        self.rng_lock = threading.Lock()
+
+    def session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def value(self, type_capteur):
+        with self.rng_lock:
+            return simulate_reading(self.rng, type_capteur)
+
+    def call(self, endpoint, method, path, scheduled=None, nb_mesures=0, **kwargs):
+        # Les appels suivants d'une même séquence sont mesurés depuis leur envoi
+        scheduled = scheduled or time.perf_counter()
+        try:
+            response = self.session().request(method, self.base + path,
+                                              timeout=self.args.timeout, **kwargs)
+            ok = response.status_code < 400
+            nb_sql = response.headers.get('X-DB-Queries')
+            nb_sql = int(nb_sql) if nb_sql is not None else None
+        except requests.RequestException:
+            ok, nb_sql = False, None
+        self.recorder.record(endpoint, time.perf_counter() - scheduled, ok, nb_sql,
+                             nb_mesures if ok else 0)
+
+    def run_event(self, kind, target, scheduled):
+        auth = {'Authorization': f'Bearer {self.token}'}
+        if kind == 'mesure':
+            noeud = self.noeuds[target]
+            for type_capteur, _ in TYPES_CAPTEURS:
+                self.call('POST /api/mesures', 'POST', '/mesures', scheduled, nb_mesures=1,
+                          headers={'X-API-Key': noeud['api_key']},
+                          json={'capteur_id': noeud['capteurs'][type_capteur],
+                                'valeur': self.value(type_capteur)})
+                scheduled = None
+        elif kind == 'bulk':
+            noeud = self.noeuds[target]
+            mesures = [
+                {'capteur_id': noeud['capteurs'][type_capteur], 'valeur': self.value(type_capteur)}
+                for _ in range(self.args.bulk_taille)
+                for type_capteur, _ in TYPES_CAPTEURS
+            ]
+            self.call('POST /api/mesures/bulk', 'POST', '/mesures/bulk', scheduled,
+                      nb_mesures=len(mesures), headers={'X-API-Key': noeud['api_key']},
+                      json={'mesures': mesures})
+        elif kind == 'dashboard':
+            # Séquence de chargement de templates/dashboard.html
+            self.call('GET /api/dashboard/summary', 'GET', '/dashboard/summary', scheduled,
+                      headers=auth)
+            self.call('GET /api/noeuds', 'GET', '/noeuds?statut=actif', headers=auth)
+            with self.rng_lock:
+                noeud = self.rng.choice(self.noeuds)
+            self.call('GET /api/mesures', 'GET', f"/mesures?noeud_id={noeud['id']}&limit=50",
+                      headers=auth)
+        elif kind == 'predict':
+            self.call('POST /api/ia/predict', 'POST', '/ia/predict', scheduled, headers=auth,
+                      json={'temperature': self.value('temperature'),
+                            'humidity': self.value('humidite'),
+                            'smoke_level': self.value('co2')})
+
+    def run(self, schedule):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.workers) as executor:
+            for offset, kind, target in schedule:
+                scheduled = start + offset
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self.run_event, kind, target, scheduled)
+        return self.recorder.report(time.perf_counter() - start)
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_sqlite_server(args):
+    """Lance l'application sur une base SQLite neuve et attend qu'elle réponde"""
+    sqlite_path = os.path.join(tempfile.mkdtemp(prefix='iot_bench_'), 'bench.sqlite3')
+    os.environ.update({'DB_BACKEND': 'sqlite', 'SQLITE_PATH': sqlite_path,
+                       'EXPOSE_DB_QUERY_COUNT': '1'})
+    port = _free_port()
+    args.url = f'http://127.0.0.1:{port}'
+    command = args.serveur_cmd.format(port=port) if args.serveur_cmd else None
+    if command:
+        process = subprocess.Popen(command, shell=True, env=os.environ.copy())
+    else:
+        process = subprocess.Popen([
+            sys.executable, '-c',
+            f"from app import app; app.run(host='127.0.0.1', port={port}, "
+            f"threaded=True, debug=False)"
+        ], env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            requests.get(args.url + '/', timeout=1)
+            return process
+        except requests.RequestException:
+            if process.poll() is not None:
+                raise RuntimeError("Le serveur de benchmark s'est arrêté au démarrage")
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('Le serveur de benchmark ne répond pas')
+
+def compare(report, baseline, tolerance):
+    """Compare un rapport à la référence et retourne la liste des régressions"""
+    regressions = []
+    for endpoint, ref in baseline.get('endpoints', {}).items():
+        current = report['endpoints'].get(endpoint)
+        if current is None:
+            regressions.append(f"{endpoint}: absent du rapport")
+            continue
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if current[key] > ref[key] * (1 + tolerance):
+                regressions.append(f"{endpoint}: {key} {current[key]} > {ref[key]} (+{tolerance:.0%})")
+        taux, taux_ref = (current['erreurs'] / max(current['requetes'], 1),
+                          ref['erreurs'] / max(ref['requetes'], 1))
+        if taux > taux_ref + 0.01:
+            regressions.append(f"{endpoint}: taux d'erreur {taux:.1%} > {taux_ref:.1%}")
+        if ref.get('requetes_sql_moy') is not None and current.get('requetes_sql_moy') is not None:
+            if current['requetes_sql_moy'] > ref['requetes_sql_moy'] + 0.5:
+                regressions.append(f"{endpoint}: requêtes SQL/requête "
+                                   f"{current['requetes_sql_moy']} > {ref['requetes_sql_moy']}")
+    return regressions
+
+def print_report(report):
+    print(f"\nDurée: {report['duree_s']}s - Mesures acceptées: {report['mesures_par_s']}/s")
+    print(f"{'Endpoint':<32}{'req':>7}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'sql/req':>9}")
+    for endpoint, s in report['endpoints'].items():
+        sql = s['requetes_sql_moy'] if s['requetes_sql_moy'] is not None else '-'
+        print(f"{endpoint:<32}{s['requetes']:>7}{s['erreurs']:>6}{s['debit_rps']:>9}"
+              f"{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}{sql:>9}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    cible = parser.add_mutually_exclusive_group(required=True)
+    cible.add_argument('--url', help="URL d'un serveur déjà lancé (base configurée dans config.py)")
+    cible.add_argument('--sqlite', action='store_true',
+                       help='Lance le serveur sur une base SQLite neuve')
+    parser.add_argument('--serveur-cmd',
+                        help="Commande de lancement du serveur avec --sqlite ({port} est remplacé), "
+                             "ex: 'gunicorn -c gunicorn.conf.py -b 127.0.0.1:{port} app:app'")
+    parser.add_argument('--noeuds', type=int, default=50, help='Taille de la flotte')
+    parser.add_argument('--intervalle', type=float, default=10.0,
+                        help='Secondes entre deux relevés d\'un noeud')
+    parser.add_argument('--bulk-ratio', type=float, default=0.2,
+                        help='Part des noeuds envoyant par lots (/api/mesures/bulk)')
+    parser.add_argument('--bulk-taille', type=int, default=10, help='Relevés par lot')
+    parser.add_argument('--lecteurs', type=int, default=2, help='Dashboards ouverts')
+    parser.add_argument('--lecteur-intervalle', type=float, default=5.0)
+    parser.add_argument('--predict-rps', type=float, default=1.0,
+                        help='Appels /api/ia/predict par seconde')
+    parser.add_argument('--duree', type=float, default=30.0, help='Durée du scénario (s)')
+    parser.add_argument('--workers', type=int, default=64, help='Requêtes simultanées max')
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sortie', help='Écrit le rapport JSON dans ce fichier')
+    parser.add_argument('--baseline', help='Rapport de référence à comparer')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Dégradation de latence tolérée (0.2 = +20%%)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Enregistre le rapport comme nouvelle référence (--baseline)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = start_sqlite_server(args) if args.sqlite else None
+    try:
+        # Import après la configuration de l'environnement (backend SQLite éventuel)
+        from database import db
+        from auth import generate_token
+
+        noeuds = ensure_fleet(db, args.noeuds)
+        token = generate_token(0, 'benchmark', 'admin')
+        schedule = build_schedule(args, noeuds, make_rng(args.seed))
+        print(f"{len(noeuds)} noeuds, {len(schedule)} évènements planifiés sur {args.duree}s")
+
+        report = LoadGenerator(args, noeuds, token).run(schedule)
+        report['scenario'] = {k: v for k, v in vars(args).items()
+                              if k not in ('url', 'sortie', 'baseline', 'save_baseline')}
+        print_report(report)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    if args.sortie:
+        with open(args.sortie, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Référence enregistrée: {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print('\nRégressions détectées:')
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print('\nAucune régression par rapport à la référence')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks du chemin de scoring (sans HTTP ni base de données).
+
+Couvre FirePredictionModel.predict_fire_risk, _simple_threshold_prediction,
+l'évaluation des seuils de check_alerts (alerts.evaluate_threshold) et
+DataValidator.validate_sensor_value. Pour chaque cas: coût par appel, puis
+courbe de passage à l'échelle (temps total et coût par élément selon la taille
+du lot).
+
+Exemples (depuis le dossier du projet):
+    python -m benchmarks.micro
+    python -m benchmarks.micro --enregistrees releves.csv --tailles 1 10 100 1000
+    python -m benchmarks.micro --cas validate_sensor_value --sortie micro.json
+
+Le fichier --enregistrees est un CSV avec les colonnes temperature,humidite,co2
+(par exemple exporté depuis la table mesures).
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import tempfile
+import timeit
+
+# Les modules de l'application ouvrent la base à l'import: utiliser une base
+# SQLite jetable pour ne pas dépendre d'un serveur MySQL
+os.environ.setdefault('DB_BACKEND', 'sqlite')
+os.environ.setdefault('SQLITE_PATH', os.path.join(tempfile.mkdtemp(prefix='iot_micro_'),
+                                                  'micro.sqlite3'))
+
+from benchmarks.fleet import simulate_reading, make_rng
+
+TAILLES = (1, 10, 100, 1000)
+
+def synthetic_inputs(n, seed):
+    """Triplets (température, humidité, co2) tirés de la distribution de la flotte simulée"""
+    rng = make_rng(seed)
+    return [(simulate_reading(rng, 'temperature'), simulate_reading(rng, 'humidite'),
+             simulate_reading(rng, 'co2')) for _ in range(n)]
+
+def recorded_inputs(path):
+    """Triplets lus depuis un CSV de relevés réels"""
+    with open(path, newline='') as f:
+        return [(float(row['temperature']), float(row['humidite']), float(row['co2']))
+                for row in csv.DictReader(f)]
+
+def make_alertes(nb_alertes):
+    """Alertes à seuil représentatives (une par capteur et par type)"""
+    alertes = []
+    for index in range(nb_alertes):
+        if index % 2:
+            alertes.append({'id': index, 'type_alerte': 'seuil_min', 'seuil_min': 10, 'seuil_max': None})
+        else:
+            alertes.append({'id': index, 'type_alerte': 'seuil_max', 'seuil_min': None, 'seuil_max': 45})
+    return alertes
+
+def build_cases(inputs):
+    """Retourne {nom: fonction(lot)} ; chaque fonction traite un lot d'entrées"""
+    from ia_prediction import fire_model
+    from alerts import evaluate_threshold
+    from utils.validators import DataValidator, IngestValidator
+
+    alertes = make_alertes(4)
+    validator = DataValidator()
+    ingest_validator = IngestValidator()
+
+    def predict_fire_risk(lot):
+        for t, h, co2 in lot:
+            fire_model.predict_fire_risk(temperature=t, humidity=h, smoke_level=co2)
+
+    def simple_threshold_prediction(lot):
+        for t, h, co2 in lot:
+            fire_model._simple_threshold_prediction(t, h, co2)
+
+    def evaluate_thresholds(lot):
+        for t, _, _ in lot:
+            for alerte in alertes:
+                evaluate_threshold(alerte, t)
+
+    def validate_sensor_value(lot):
+        for t, h, co2 in lot:
+            validator.validate_sensor_value(t, -100, 10000)
+
+    def validate_bulk(lot):
+        ingest_validator.validate_bulk([{'capteur_id': 1, 'valeur': t} for t, _, _ in lot])
+
+    cases = {
+        'predict_fire_risk': predict_fire_risk,
+        '_simple_threshold_prediction': simple_threshold_prediction,
+        'evaluate_threshold': evaluate_thresholds,
+        'validate_sensor_value': validate_sensor_value,
+        'IngestValidator.validate_bulk': validate_bulk,
+    }
+    if fire_model.model is None:
+        print("Modèle IA absent: predict_fire_risk mesure le repli par seuils")
+    return cases
+
+def measure(func, lot, min_time):
+    """Meilleur temps (s) d'un appel de func(lot), répété sur au moins min_time secondes"""
+    timer = timeit.Timer(lambda: func(lot))
+    number, _ = timer.autorange()
+    repeats = max(3, int(min_time / max(timer.timeit(number) / number, 1e-9) / number))
+    return min(timer.repeat(repeat=min(repeats, 20), number=number)) / number
+
+def run(cases, inputs, tailles, min_time):
+    results = {}
+    for name, func in cases.items():
+        courbe = []
+        for taille in tailles:
+            lot = (inputs * (taille // len(inputs) + 1))[:taille]
+            total = measure(func, lot, min_time)
+            courbe.append({'taille': taille, 'total_ms': round(total * 1000, 4),
+                           'us_par_element': round(total / taille * 1e6, 3)})
+        results[name] = {'us_par_appel': courbe[0]['us_par_element'], 'courbe': courbe}
+    return results
+
+def print_results(results):
+    for name, result in results.items():
+        print(f"\n{name}: {result['us_par_appel']} µs/appel")
+        print(f"  {'taille':>8}{'total (ms)':>14}{'µs/élément':>14}")
+        for point in result['courbe']:
+            print(f"  {point['taille']:>8}{point['total_ms']:>14}{point['us_par_element']:>14}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--enregistrees', help='CSV de relevés réels (sinon distribution synthétique)')
+    parser.add_argument('--echantillons', type=int, default=1000,
+                        help="Nombre d'entrées synthétiques")
+    parser.add_argument('--tailles', type=int, nargs='+', default=list(TAILLES),
+                        help='Tailles de lot de la courbe de passage à l\'échelle')
+    parser.add_argument('--cas', nargs='+', help='Limiter à certains cas')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='Durée minimale de mesure par point (s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--avec-logs', action='store_true',
+                        help="Conserver les logs INFO de l'application (coût inclus)")
+    parser.add_argument('--sortie', help='Écrit les résultats JSON dans ce fichier')
+    args = parser.parse_args(argv)
+
+    if args.enregistrees:
+        inputs = recorded_inputs(args.enregistrees)
+        source = args.enregistrees
+    else:
+        inputs = synthetic_inputs(args.echantillons, args.seed)
+        source = 'synthetique'
+    if not inputs:
+        parser.error('Aucune entrée à mesurer')
+
+    if not args.avec_logs:
+        # Importé d'abord: son import remet le niveau à Config.LOG_LEVEL
+        from utils.logger import logger
+        logger.setLevel(logging.WARNING)
+
+    cases = build_cases(inputs)
+    if args.cas:
+        cases = {name: cases[name] for name in args.cas}
+
+    print(f"Entrées: {source} ({len(inputs)})")
+    results = run(cases, inputs, args.tailles, args.min_time)
+    print_results(results)
+
+    if args.sortie:
+        with open(args.sortie, 'w') as f:
+            json.dump({'source': source, 'resultats': results}, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Comparaison des profils gunicorn (gunicorn.conf.py) sur une même charge.
+
+Pour chaque profil, lance benchmarks.load_api sur une base SQLite neuve avec
+le même scénario (même graine), le serveur étant gunicorn avec
+GUNICORN_PROFILE=<profil>. Pendant la charge, la mémoire du maître et des
+workers est échantillonnée (PSS: les pages partagées en copie sur écriture
+sont réparties entre les processus, contrairement au RSS).
+
+Le tableau final donne, par profil: mesures acceptées par seconde, p95 de
+chaque endpoint, erreurs et mémoire PSS totale au pic.
+
+Exemples (depuis le dossier du projet):
+    python -m benchmarks.server_profiles
+    python -m benchmarks.server_profiles --profils sync gthread --sans-preload --workers-gunicorn 2 -- --duree 60
+Les options après -- sont transmises à benchmarks.load_api.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROFILS = ('sync', 'gthread', 'gevent')
+
+def processes(marker):
+    """Pids des processus dont la ligne de commande contient marker (maître + workers)"""
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                cmdline = f.read().split(b'\0')
+        except OSError:
+            continue
+        if marker.encode() in cmdline and b'gunicorn' in b' '.join(cmdline):
+            pids.append(int(entry))
+    return pids
+
+def memory_kb(pid):
+    """(PSS, RSS) d'un processus en kio (smaps_rollup, Linux)"""
+    values = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('Pss', 'Rss'):
+                    values[key] = int(rest.split()[0])
+    except OSError:
+        return 0, 0
+    return values.get('Pss', 0), values.get('Rss', 0)
+
+def run_profile(name, preload, args, load_args):
+    """Charge complète d'un profil; retourne le rapport de load_api complété de la mémoire"""
+    marker = f"iot-bench-{name}-{os.getpid()}"
+    command = (f"exec {sys.executable} -m gunicorn -c gunicorn.conf.py -n {marker} "
+               f"-b 127.0.0.1:{{port}} app:app")
+    env = dict(os.environ, GUNICORN_PROFILE=name, GUNICORN_PRELOAD='1' if preload else '0',
+               GUNICORN_WORKERS=str(args.workers_gunicorn),
+               PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix='iot_metrics_'))
+    sortie = os.path.join(tempfile.mkdtemp(prefix='iot_profile_'), 'rapport.json')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.load_api', '--sqlite', '--serveur-cmd', command,
+         '--sortie', sortie] + load_args,
+        env=env
+    )
+
+    peak = {'pss_mo': 0.0, 'rss_mo': 0.0, 'processus': 0}
+    while process.poll() is None:
+        pids = processes(marker)
+        samples = [memory_kb(pid) for pid in pids]
+        pss = sum(s[0] for s in samples) / 1024
+        if pss > peak['pss_mo']:
+            peak = {'pss_mo': round(pss, 1), 'rss_mo': round(sum(s[1] for s in samples) / 1024, 1),
+                    'processus': len(pids)}
+        time.sleep(args.echantillonnage)
+
+    if process.returncode not in (0, 1) or not os.path.exists(sortie):
+        raise RuntimeError(f"Profil {name}: load_api en échec (code {process.returncode})")
+    with open(sortie) as f:
+        report = json.load(f)
+    report['memoire'] = peak
+    return report
+
+def print_comparison(results):
+    endpoints = sorted({endpoint for r in results.values() for endpoint in r['endpoints']})
+    names = list(results)
+    width = max(14, *(len(n) + 2 for n in names))
+    print(f"\n{'':<40}" + ''.join(f"{n:>{width}}" for n in names))
+    print(f"{'mesures/s':<40}" + ''.join(f"{results[n]['mesures_par_s']:>{width}}" for n in names))
+    for endpoint in endpoints:
+        cells = []
+        for n in names:
+            s = results[n]['endpoints'].get(endpoint)
+            cells.append(f"{s['p95_ms']} ({s['erreurs']})" if s else '-')
+        print(f"{endpoint + ' p95 (err)':<40}" + ''.join(f"{c:>{width}}" for c in cells))
+    print(f"{'PSS totale (Mo)':<40}" + ''.join(f"{results[n]['memoire']['pss_mo']:>{width}}" for n in names))
+    print(f"{'RSS totale (Mo)':<40}" + ''.join(f"{results[n]['memoire']['rss_mo']:>{width}}" for n in names))
+    print(f"{'processus':<40}" + ''.join(f"{results[n]['memoire']['processus']:>{width}}" for n in names))
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    load_args = argv[argv.index('--') + 1:] if '--' in argv else []
+    argv = argv[:argv.index('--')] if '--' in argv else argv
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profils', nargs='+', choices=PROFILS, default=list(PROFILS))
+    parser.add_argument('--sans-preload', action='store_true',
+                        help='Mesure aussi chaque profil sans préchargement (copie du modèle par worker)')
+    parser.add_argument('--workers-gunicorn', type=int, default=4)
+    parser.add_argument('--echantillonnage', type=float, default=1.0,
+                        help='Secondes entre deux mesures de la mémoire')
+    parser.add_argument('--sortie', help='Écrit les rapports JSON dans ce fichier')
+    args = parser.parse_args(argv)
+
+    runs = []
+    for name in args.profils:
+        if name == 'gevent' and importlib.util.find_spec('gevent') is None:
+            print("gevent non installé: profil ignoré (pip install gevent)", file=sys.stderr)
+            continue
+        runs.append((name, True))
+        if args.sans_preload:
+            runs.append((name, False))
+
+    results = {}
+    for name, preload in runs:
+        label = name if preload else f"{name}/sans-preload"
+        print(f"\n=== Profil {label} ===", flush=True)
+        results[label] = run_profile(name, preload, args, load_args)
+    print_comparison(results)
+
+    if args.sortie:
+        with open(args.sortie, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
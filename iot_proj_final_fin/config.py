@@ -13,6 +13,13 @@ class Config:
     DB_USER = 'iot_user'
     DB_PASSWORD = 'iot1234567890!'
     DB_NAME = 'iot_db'
+    # Connexions par processus (32 au plus, limite de mysql-connector): au moins les
+    # threads de requête plus les threads de fond (voir gunicorn.conf.py)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 16))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))   # attente max d'une connexion libre (s)
+    # 'mysql' (production) ou 'sqlite' (benchmarks / développement local)
+    DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'iot_local.sqlite3')
     
     # Flask
     SECRET_KEY = 'dev-secret-key-in-production'
@@ -37,6 +44,134 @@ class Config:
     LOG_FILE = 'logs/app.log'
     LOG_LEVEL = 'INFO'
     
+    # Métriques (Prometheus)
+    # Répertoire partagé entre les workers gunicorn (mode multi-processus)
+    METRICS_MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'   # expose /metrics
+    # Jeton attendu dans 'Authorization: Bearer ...'; sans jeton, /metrics ne répond qu'en local
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    
+    # Profilage des requêtes (header X-Profile: 1 ou ?_profile=1, admin seulement)
+    PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))  # ex: 0.001 en production
+    PROFILING_BUFFER_SIZE = 50   # nombre de profils conservés (tous workers confondus)
+    PROFILING_DIR = os.getenv('PROFILING_DIR', '/tmp/iot_profils')   # répertoire partagé par les workers
+    PROFILING_TOP_FUNCTIONS = 30
+    # Ajoute le header X-DB-Queries (nombre de requêtes SQL) aux réponses
+    EXPOSE_DB_QUERY_COUNT = os.getenv('EXPOSE_DB_QUERY_COUNT', '0') == '1'
+    
+    # Dashboard (/api/dashboard/bundle): dernières mesures de chaque capteur de chaque noeud
+    DASHBOARD_SERIES_LIMIT = 50        # mesures par série par défaut
+    DASHBOARD_SERIES_MAX_LIMIT = 1000
+    DASHBOARD_SERIES_PERIOD = 60       # intervalle attendu entre deux mesures d'un capteur (secondes)
+    DASHBOARD_SERIES_WINDOW = 86400    # ancienneté max des mesures (secondes), quelle que soit limit
+    DASHBOARD_MAX_NOEUDS = 50          # noeuds par page du bundle (défaut et maximum de par_page)
+    
+    # Séries réduites pour les graphiques (/api/mesures/serie, series.py)
+    SERIES_POINTS = 500                # points par défaut (largeur d'un graphique)
+    SERIES_MAX_POINTS = 2000
+    SERIES_CHUNK_SIZE = 20000          # mesures lues par requête
+    SERIES_LTTB_MAX_ROWS = 2000000     # au-delà: min/max par intervalle (LTTB garde toute la série)
+    
+    # Cache HTTP des endpoints de métadonnées (utils/http_cache.py): ETag + 304
+    HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', '1') == '1'
+    # Compteurs de version partagés par tous les workers (fichier projeté en mémoire)
+    HTTP_CACHE_VERSIONS_PATH = os.getenv('HTTP_CACHE_VERSIONS_PATH', 'logs/http_cache_versions')
+    HTTP_CACHE_MAX_ENTRIES = 256       # réponses conservées par worker
+    
+    # Ingestion binaire (/api/mesures/binaire)
+    BINARY_MAX_MESURES = 1000  # mesures max par trame
+    
+    # Détection des noeuds hors ligne (liveness.py)
+    LIVENESS_MONITOR_ENABLED = os.getenv('LIVENESS_MONITOR_ENABLED', '1') == '1'
+    LIVENESS_TIMEOUT = 900           # secondes sans connexion (si l'alerte n'a pas de seuil_max)
+    LIVENESS_CHECK_INTERVAL = 10     # secondes entre deux passages du leader
+    LIVENESS_PERSIST_INTERVAL = 5    # secondes entre deux écritures de derniere_connexion
+    
+    # Balayage périodique du risque de la flotte (risk_sweep.py)
+    RISK_SWEEP_ENABLED = os.getenv('RISK_SWEEP_ENABLED', '1') == '1'
+    RISK_SWEEP_INTERVAL = int(os.getenv('RISK_SWEEP_INTERVAL', 300))  # secondes
+    RISK_SWEEP_MAX_AGE = 6 * 3600    # ignorer les noeuds dont une mesure est plus ancienne (s)
+    
+    # Détection d'anomalies en continu (anomaly.py)
+    ANOMALY_EWMA_ALPHA = 0.1           # poids de la dernière mesure dans la moyenne lissée
+    ANOMALY_WINDOW = 5                 # mesures gardées par capteur (variation par minute)
+    ANOMALY_MIN_SAMPLES = 10           # mesures avant le premier z-score
+    ANOMALY_ZSCORE = 3.0               # seuil des alertes 'zscore' sans seuil_max
+    
+    # Fenêtre de caractéristiques du modèle IA (features.py)
+    FEATURE_WINDOW = 600               # secondes de mesures par noeud
+    FEATURE_STEP = 30                  # pas de la grille commune (secondes)
+    
+    # Réentraînement du modèle IA (train_model.py)
+    TRAIN_LABEL_HORIZON = 600          # fenêtre positive si une alerte suit dans ce délai (s)
+    MODEL_MAX_SIZE_MB = 20             # critère d'acceptation: taille de l'artefact
+    MODEL_MAX_LATENCY_MS = 10          # critère d'acceptation: p95 d'une prédiction unitaire
+    # Variante du modèle servie (model_variants.py): la plus précise sous ce budget (ms, 0: modèle complet)
+    MODEL_LATENCY_BUDGET_MS = float(os.getenv('MODEL_LATENCY_BUDGET_MS', 0))
+    MODEL_VARIANT = os.getenv('MODEL_VARIANT', '')  # nom de variante imposé
+    
+    # Serveur d'inférence local (inference_server.py): fire_model devient un client si défini
+    INFERENCE_SOCKET = os.getenv('INFERENCE_SOCKET', '')
+    INFERENCE_PROCESSES = int(os.getenv('INFERENCE_PROCESSES', 2))
+    INFERENCE_BATCH_WINDOW_MS = 2      # attente max d'un micro-lot
+    INFERENCE_MAX_BATCH = 512          # lignes max par micro-lot
+    INFERENCE_TIMEOUT_MS = 50          # au-delà: repli sur les seuils simples
+    INFERENCE_RETRY_INTERVAL = 5       # secondes sans solliciter un serveur injoignable
+    
+    # Zones et voisins (spatial.py)
+    FLEET_STATE_REFRESH = 10           # secondes entre deux relectures de l'état de la flotte
+    SPATIAL_CELL_DEG = 0.05            # taille des cellules de l'index (~5 km)
+    SPATIAL_MAX_VOISINS = 50
+    SPATIAL_MAX_RAYON_KM = 100         # rayon de recherche des voisins (défaut et maximum de rayon_km)
+    
+    # Historique des prédictions (predictions.py)
+    PREDICTION_BATCH_SIZE = 500        # prédictions par transaction
+    PREDICTION_FLUSH_INTERVAL = 5      # secondes max avant écriture
+    PREDICTION_CURVE_POINTS = 200      # intervalles par courbe par défaut
+    PREDICTION_CURVE_MAX_POINTS = 2000
+    
+    # Déduplication des renvois (msg_id / seq fournis par les noeuds)
+    DEDUP_WINDOW_TTL = 3600      # secondes de mémoire par worker
+    DEDUP_WINDOW_SIZE = 100000   # identifiants conservés au maximum
+    # Portée des identifiants sans 'boot' (redémarrage du noeud): intervalle de l'horodatage
+    DEDUP_KEY_BUCKET = 600       # secondes
+    
+    # Tampon d'écriture différée (write_buffer.py): mesures acquittées (202)
+    # dès leur écriture dans un journal local, insérées en base par lots
+    WRITE_BUFFER_ENABLED = os.getenv('WRITE_BUFFER_ENABLED', '0') == '1'
+    WRITE_BUFFER_PATH = os.getenv('WRITE_BUFFER_PATH', 'logs/write_buffer.sqlite3')
+    WRITE_BUFFER_BATCH_SIZE = 1000   # lignes max par transaction
+    WRITE_BUFFER_INTERVAL = 0.5      # secondes max entre deux vidages
+    WRITE_BUFFER_SYNC = os.getenv('WRITE_BUFFER_SYNC', 'NORMAL')  # FULL: fsync à chaque ajout
+    WRITE_BUFFER_MAX_ATTEMPTS = 15   # essais d'une mesure refusée avant la table rejets du journal
+    WRITE_BUFFER_MAX_DELAY = 30      # secondes max entre deux vidages après des échecs
+    
+    # Service d'ingestion asynchrone (asgi_ingest.py)
+    ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', 20))
+    
+    # Passerelle MQTT (mqtt_bridge.py)
+    MQTT_HOST = os.getenv('MQTT_HOST', 'localhost')
+    MQTT_PORT = int(os.getenv('MQTT_PORT', 1883))
+    MQTT_USERNAME = os.getenv('MQTT_USERNAME')
+    MQTT_PASSWORD = os.getenv('MQTT_PASSWORD')
+    MQTT_TOPIC_PREFIX = os.getenv('MQTT_TOPIC_PREFIX', 'foret')
+    MQTT_BATCH_SIZE = 500        # mesures avant insertion immédiate
+    MQTT_BATCH_INTERVAL = 1.0    # secondes max avant insertion
+    MQTT_AUTH_CACHE_TTL = 300    # secondes de validité d'une clé API vérifiée
+    MQTT_MAX_PENDING = 100000    # mesures gardées en attente si l'insertion échoue
+    MQTT_RETRY_MAX_DELAY = 30    # secondes max entre deux essais après un échec
+    
+    # Démarrage des workers (benchmarks/import_time.py)
+    IMPORT_TIME_BUDGET_MS = 1000       # durée max de l'import de app.py
+    
+    # Réponses HTTP: fournisseur JSON (orjson ou defaut: module json de Flask)
+    # et compression négociée (utils/compression.py)
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', '1') == '1'
+    COMPRESSION_MIN_SIZE = 1024        # octets: en dessous, la compression coûte plus qu'elle ne gagne
+    COMPRESSION_GZIP_LEVEL = 5
+    COMPRESSION_BROTLI_QUALITY = 4     # 0-11; 4: proche de gzip en CPU, plus compact
+    
     # Sécurité
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max
     ALLOWED_EXTENSIONS = {'json', 'csv'}
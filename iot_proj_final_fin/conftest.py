@@ -0,0 +1 @@
+"""Configuration pytest: les tests importent les modules du projet depuis ce dossier"""
@@ -1,16 +1,46 @@
+import os
+import threading
+import time
 import mysql.connector
-from mysql.connector import Error, pooling
+from mysql.connector import Error, errorcode, pooling
+from mysql.connector.errors import PoolError
 from config import Config
 from contextlib import contextmanager
+from utils import metrics, profiling
 
 class Database:
     """Gestionnaire de connexion MySQL avec pool de connexions"""
     
     def __init__(self):
+        # Pool créé à la première requête de chaque processus: l'import ne dépend
+        # pas de la disponibilité de MySQL et un worker forké n'hérite pas des sockets
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        # Connexions libres du pool: get_connection de mysql-connector n'attend
+        # pas (PoolError dès que le pool est vide), l'attente bornée se fait ici
+        self._slots = None
+        self._consecutive = None
+    
+    @property
+    def pool_size(self):
+        return min(Config.DB_POOL_SIZE, pooling.CNX_POOL_MAXSIZE)
+    
+    @property
+    def pool(self):
+        if self._pool_pid != os.getpid():
+            with self._pool_lock:
+                if self._pool_pid != os.getpid():
+                    self._pool = self._create_pool()
+                    self._slots = threading.BoundedSemaphore(self.pool_size)
+                    self._pool_pid = os.getpid()
+        return self._pool
+    
+    def _create_pool(self):
         try:
-            self.pool = pooling.MySQLConnectionPool(
-                pool_name="iot_pool",
-                pool_size=5,
+            pool = pooling.MySQLConnectionPool(
+                pool_name=f"iot_pool_{os.getpid()}",
+                pool_size=self.pool_size,
                 pool_reset_session=True,
                 host=Config.DB_HOST,
                 user=Config.DB_USER,
@@ -20,16 +50,36 @@ class Database:
                 use_unicode=True
             )
             print("✓ Pool de connexions MySQL créé avec succès")
+            return pool
         except Error as e:
             print(f"✗ Erreur de création du pool: {e}")
             raise
     
+    def after_fork(self):
+        """Abandonne le pool hérité du processus parent (hook gunicorn post_fork)"""
+        with self._pool_lock:
+            self._pool = None
+            self._slots = None
+            self._pool_pid = None
+    
+    def ping(self):
+        """Vérifie que la base répond (endpoint de disponibilité)"""
+        self.execute_query("SELECT 1 AS ok")
+    
     @contextmanager
     def get_connection(self):
-        """Context manager pour obtenir une connexion du pool"""
+        """Context manager pour obtenir une connexion du pool (attend au plus DB_POOL_TIMEOUT secondes)"""
         connection = None
+        acquired = False
         try:
-            connection = self.pool.get_connection()
+            pool = self.pool
+            start = time.perf_counter()
+            acquired = self._slots.acquire(timeout=Config.DB_POOL_TIMEOUT)
+            metrics.DB_POOL_WAIT.observe(time.perf_counter() - start)
+            if not acquired:
+                raise PoolError(msg=f"Aucune connexion libre après {Config.DB_POOL_TIMEOUT} s "
+                                    f"(DB_POOL_SIZE={self.pool_size})")
+            connection = pool.get_connection()
             yield connection
         except Error as e:
             if connection:
@@ -37,21 +87,32 @@ class Database:
             print(f"Erreur de connexion: {e}")
             raise
         finally:
-            if connection and connection.is_connected():
-                connection.close()
+            if connection:
+                # Toujours rendue au pool, même perdue: il la reconnecte au prochain emprunt
+                try:
+                    connection.close()
+                except Error:
+                    pass
+            if acquired:
+                self._slots.release()
     
     def execute_query(self, query, params=None, fetch=True):
         """Exécute une requête avec gestion automatique des transactions"""
+        caller = metrics.caller_name()
         with self.get_connection() as connection:
             cursor = connection.cursor(dictionary=True)
+            start = time.perf_counter()
+            rows = None
             try:
                 cursor.execute(query, params or ())
                 
                 if query.strip().upper().startswith('SELECT'):
                     result = cursor.fetchall() if fetch else cursor
+                    rows = len(result) if fetch else None
                     return result
                 else:
                     connection.commit()
+                    rows = cursor.rowcount
                     return {
                         'lastrowid': cursor.lastrowid,
                         'rowcount': cursor.rowcount
@@ -61,12 +122,17 @@ class Database:
                 print(f"Erreur d'exécution: {e}")
                 raise
             finally:
+                duration = time.perf_counter() - start
+                metrics.observe_db_query(query, duration, caller)
+                profiling.record_query(query, duration, rows)
                 cursor.close()
     
     def execute_many(self, query, data_list):
         """Exécute une requête pour plusieurs lignes"""
+        caller = metrics.caller_name()
         with self.get_connection() as connection:
             cursor = connection.cursor()
+            start = time.perf_counter()
             try:
                 cursor.executemany(query, data_list)
                 connection.commit()
@@ -76,7 +142,147 @@ class Database:
                 print(f"Erreur d'exécution multiple: {e}")
                 raise
             finally:
+                duration = time.perf_counter() - start
+                metrics.observe_db_query(query, duration, caller)
+                profiling.record_query(query, duration, cursor.rowcount)
                 cursor.close()
 
+    @contextmanager
+    def transaction(self):
+        """
+        Transaction explicite (curseur dictionary=True)
+
+        Validée à la sortie du bloc, annulée si une erreur est levée; les
+        verrous posés par SELECT ... FOR UPDATE sont tenus jusque-là.
+        """
+        caller = metrics.caller_name(3)
+        with self.get_connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            start = time.perf_counter()
+            try:
+                yield cursor
+                connection.commit()
+            except Error as e:
+                connection.rollback()
+                print(f"Erreur de transaction: {e}")
+                raise
+            finally:
+                duration = time.perf_counter() - start
+                metrics.observe_db_query('TRANSACTION', duration, caller)
+                profiling.record_query('TRANSACTION', duration, None)
+                cursor.close()
+
+    def _consecutive_ids(self, cursor):
+        """
+        Vrai si un INSERT multi-lignes reçoit des ids consécutifs
+
+        Garanti seulement avec auto_increment_increment = 1 (pas Galera ni
+        multi-primaire) et innodb_autoinc_lock_mode <= 1 (le mode 2, défaut de
+        MySQL 8, entrelace les ids des insertions concurrentes). Lu une fois.
+        """
+        if self._consecutive is None:
+            cursor.execute("SELECT @@auto_increment_increment, @@innodb_autoinc_lock_mode")
+            increment, lock_mode = cursor.fetchone()
+            self._consecutive = int(increment) == 1 and int(lock_mode) <= 1
+        return self._consecutive
+
+    def insert_many(self, query, data_list):
+        """
+        Insère plusieurs lignes en une seule transaction et retourne leurs ids
+
+        Une ligne qui viole une clé unique (ER_DUP_ENTRY, renvoi déjà inséré)
+        est écartée et son id vaut None; toute autre erreur est levée.
+        """
+        caller = metrics.caller_name()
+        with self.get_connection() as connection:
+            cursor = connection.cursor()
+            start = time.perf_counter()
+            try:
+                if self._consecutive_ids(cursor):
+                    try:
+                        # executemany envoie un seul INSERT multi-lignes: ids consécutifs,
+                        # lastrowid est celui de la première ligne
+                        cursor.executemany(query, data_list)
+                        connection.commit()
+                        first_id = cursor.lastrowid
+                        return list(range(first_id, first_id + len(data_list)))
+                    except Error as e:
+                        if e.errno != errorcode.ER_DUP_ENTRY:
+                            raise
+                        # Seule l'instruction est annulée: la transaction continue
+                
+                # Insertion ligne par ligne dans la même transaction: id exact de
+                # chaque ligne (None pour les doublons)
+                ids = []
+                for params in data_list:
+                    try:
+                        cursor.execute(query, params)
+                        ids.append(cursor.lastrowid)
+                    except Error as e:
+                        if e.errno != errorcode.ER_DUP_ENTRY:
+                            raise
+                        ids.append(None)
+                connection.commit()
+                return ids
+            except Error as e:
+                connection.rollback()
+                print(f"Erreur d'insertion multiple: {e}")
+                raise
+            finally:
+                duration = time.perf_counter() - start
+                metrics.observe_db_query(query, duration, caller)
+                profiling.record_query(query, duration, len(data_list))
+                cursor.close()
+
+    def advisory_lock(self, name):
+        """Verrou consultatif partagé entre processus (élection d'un leader)"""
+        return AdvisoryLock(name)
+
+class AdvisoryLock:
+    """Verrou MySQL GET_LOCK tenu par une connexion dédiée (libéré si elle est perdue)"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.connection = None
+    
+    def acquire(self):
+        """Prend ou confirme le verrou sans attendre; retourne True si ce processus le détient"""
+        try:
+            if self.connection is None or not self.connection.is_connected():
+                self.connection = mysql.connector.connect(
+                    host=Config.DB_HOST,
+                    user=Config.DB_USER,
+                    password=Config.DB_PASSWORD,
+                    database=Config.DB_NAME,
+                    autocommit=True
+                )
+            cursor = self.connection.cursor()
+            # GET_LOCK est réentrant: ne le reprendre que s'il n'est pas déjà détenu
+            cursor.execute(
+                "SELECT IF(IS_USED_LOCK(%s) = CONNECTION_ID(), 1, GET_LOCK(%s, 0))",
+                (self.name, self.name)
+            )
+            (acquired,) = cursor.fetchone()
+            cursor.close()
+            return acquired == 1
+        except Error as e:
+            print(f"Erreur verrou {self.name}: {e}")
+            self.release()
+            return False
+    
+    def release(self):
+        """Libère le verrou en fermant la connexion dédiée"""
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Error:
+                pass
+            self.connection = None
+
 # Instance globale
-db = Database()
+if Config.DB_BACKEND == 'sqlite':
+    # Backend de substitution pour les benchmarks (voir database_sqlite.py)
+    from database_sqlite import SQLiteDatabase
+    db = SQLiteDatabase(Config.SQLITE_PATH)
+else:
+    db = Database()
@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+from mysql.connector import errorcode
+
+from config import Config
+from utils import metrics
+
+class AsyncDatabase:
+    """Pool de connexions MySQL asynchrone (aiomysql) pour le service d'ingestion ASGI"""
+
+    def __init__(self):
+        self.pool = None
+        self._consecutive = None
+
+    async def connect(self):
+        import aiomysql
+
+        self.pool = await aiomysql.create_pool(
+            minsize=1,
+            maxsize=Config.ASYNC_DB_POOL_SIZE,
+            host=Config.DB_HOST,
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD,
+            db=Config.DB_NAME,
+            charset='utf8mb4',
+            # Une connexion rendue au pool en cours de transaction est fermée par
+            # aiomysql: requêtes simples en autocommit, transaction explicite dans insert_many
+            autocommit=True
+        )
+        print("✓ Pool de connexions MySQL asynchrone créé avec succès")
+
+    async def close(self):
+        if self.pool:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+
+    async def execute_query(self, query, params=None):
+        """Exécute une requête; SELECT retourne les lignes, sinon lastrowid/rowcount"""
+        import aiomysql
+
+        start = time.perf_counter()
+        async with self.pool.acquire() as connection:
+            metrics.DB_POOL_WAIT.observe(time.perf_counter() - start)
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                start = time.perf_counter()
+                try:
+                    await cursor.execute(query, params or ())
+                    if query.strip().upper().startswith('SELECT'):
+                        return await cursor.fetchall()
+                    return {'lastrowid': cursor.lastrowid, 'rowcount': cursor.rowcount}
+                finally:
+                    metrics.observe_db_query(query, time.perf_counter() - start, 'asgi')
+
+    async def _consecutive_ids(self, cursor):
+        """Ids consécutifs garantis pour un INSERT multi-lignes (cf. Database._consecutive_ids)"""
+        if self._consecutive is None:
+            await cursor.execute("SELECT @@auto_increment_increment, @@innodb_autoinc_lock_mode")
+            increment, lock_mode = await cursor.fetchone()
+            self._consecutive = int(increment) == 1 and int(lock_mode) <= 1
+        return self._consecutive
+
+    async def insert_many(self, query, data_list):
+        """Insère plusieurs lignes en une transaction et retourne leurs ids (cf. Database.insert_many)"""
+        from pymysql.err import IntegrityError
+
+        def duplicate(error):
+            return error.args and error.args[0] == errorcode.ER_DUP_ENTRY
+
+        start = time.perf_counter()
+        async with self.pool.acquire() as connection:
+            metrics.DB_POOL_WAIT.observe(time.perf_counter() - start)
+            async with connection.cursor() as cursor:
+                start = time.perf_counter()
+                try:
+                    consecutive = await self._consecutive_ids(cursor)
+                    await connection.begin()
+                    if consecutive:
+                        try:
+                            await cursor.executemany(query, data_list)
+                            await connection.commit()
+                            first_id = cursor.lastrowid
+                            return list(range(first_id, first_id + len(data_list)))
+                        except IntegrityError as e:
+                            if not duplicate(e):
+                                raise
+                    
+                    # Insertion ligne par ligne dans la même transaction (id exact, None: doublon)
+                    ids = []
+                    for params in data_list:
+                        try:
+                            await cursor.execute(query, params)
+                            ids.append(cursor.lastrowid)
+                        except IntegrityError as e:
+                            if not duplicate(e):
+                                raise
+                            ids.append(None)
+                    await connection.commit()
+                    return ids
+                except Exception:
+                    await connection.rollback()
+                    raise
+                finally:
+                    metrics.observe_db_query(query, time.perf_counter() - start, 'asgi')
+
+class ThreadedDatabase:
+    """Interface asynchrone sur une base synchrone (backend SQLite des benchmarks)"""
+
+    def __init__(self, database):
+        self.database = database
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def execute_query(self, query, params=None):
+        return await asyncio.to_thread(self.database.execute_query, query, params)
+
+    async def insert_many(self, query, data_list):
+        return await asyncio.to_thread(self.database.insert_many, query, data_list)
+
+def create_async_db():
+    """Base asynchrone correspondant à Config.DB_BACKEND"""
+    if Config.DB_BACKEND == 'sqlite':
+        from database import db
+        return ThreadedDatabase(db)
+    return AsyncDatabase()
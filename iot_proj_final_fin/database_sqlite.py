@@ -0,0 +1,393 @@
+import fcntl
+import math
+import re
+import sqlite3
+import threading
+from datetime import datetime, date
+from functools import lru_cache
+from contextlib import contextmanager
+from mysql.connector import Error, errorcode
+
+from database import Database
+
+# Schéma équivalent à iot_schema_backup.sql pour le backend SQLite
+# (benchmarks et développement local sans serveur MySQL)
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS utilisateurs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(50) NOT NULL UNIQUE,
+    email VARCHAR(100) NOT NULL UNIQUE,
+    password_hash VARCHAR(255) NOT NULL,
+    role VARCHAR(10) DEFAULT 'user',
+    api_token VARCHAR(64) UNIQUE,
+    token_expiration TIMESTAMP,
+    actif BOOLEAN DEFAULT 1,
+    derniere_connexion TIMESTAMP,
+    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS capteurs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nom VARCHAR(100) NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    unite VARCHAR(20),
+    description TEXT,
+    actif BOOLEAN DEFAULT 1,
+    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    date_modification TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS noeuds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nom VARCHAR(100) NOT NULL,
+    adresse_mac VARCHAR(17) NOT NULL UNIQUE,
+    adresse_ip VARCHAR(45),
+    localisation VARCHAR(200),
+    zone VARCHAR(50),
+    latitude DECIMAL(9,6),
+    longitude DECIMAL(9,6),
+    modele VARCHAR(100),
+    firmware_version VARCHAR(50),
+    statut VARCHAR(20) DEFAULT 'actif',
+    derniere_connexion TIMESTAMP,
+    hors_ligne_depuis TIMESTAMP,
+    api_key VARCHAR(64) NOT NULL UNIQUE,
+    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    date_modification TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_derniere_connexion ON noeuds (derniere_connexion);
+CREATE INDEX IF NOT EXISTS idx_zone ON noeuds (zone);
+CREATE TABLE IF NOT EXISTS noeud_capteur (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    noeud_id INTEGER NOT NULL REFERENCES noeuds(id) ON DELETE CASCADE,
+    capteur_id INTEGER NOT NULL REFERENCES capteurs(id) ON DELETE CASCADE,
+    date_association TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (noeud_id, capteur_id)
+);
+CREATE TABLE IF NOT EXISTS mesures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    noeud_id INTEGER NOT NULL REFERENCES noeuds(id) ON DELETE CASCADE,
+    capteur_id INTEGER NOT NULL REFERENCES capteurs(id) ON DELETE CASCADE,
+    valeur DECIMAL(10,4) NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    metadata JSON,
+    client_id VARCHAR(100),
+    UNIQUE (noeud_id, client_id)
+);
+CREATE INDEX IF NOT EXISTS idx_noeud_timestamp ON mesures (noeud_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_noeud_capteur_id ON mesures (noeud_id, capteur_id, id);
+CREATE INDEX IF NOT EXISTS idx_capteur_timestamp ON mesures (capteur_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_mesures_timestamp ON mesures (timestamp);
+CREATE TABLE IF NOT EXISTS alertes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    capteur_id INTEGER NOT NULL REFERENCES capteurs(id) ON DELETE CASCADE,
+    noeud_id INTEGER REFERENCES noeuds(id) ON DELETE SET NULL,
+    type_alerte VARCHAR(20) NOT NULL,
+    severite VARCHAR(10) NOT NULL,
+    seuil_min DECIMAL(10,4),
+    seuil_max DECIMAL(10,4),
+    message TEXT,
+    email_notification BOOLEAN DEFAULT 1,
+    actif BOOLEAN DEFAULT 1,
+    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_alertes_capteur ON alertes (capteur_id);
+CREATE TABLE IF NOT EXISTS etats_anomalie (
+    noeud_id INTEGER NOT NULL REFERENCES noeuds(id) ON DELETE CASCADE,
+    capteur_id INTEGER NOT NULL REFERENCES capteurs(id) ON DELETE CASCADE,
+    n INTEGER NOT NULL,
+    moyenne REAL NOT NULL,
+    variance REAL NOT NULL,
+    position INTEGER NOT NULL,
+    valeurs BLOB,
+    instants BLOB,
+    date_modification TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (noeud_id, capteur_id)
+);
+CREATE TABLE IF NOT EXISTS logs_alertes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    alerte_id INTEGER NOT NULL REFERENCES alertes(id) ON DELETE CASCADE,
+    mesure_id INTEGER REFERENCES mesures(id) ON DELETE SET NULL,
+    valeur_mesuree DECIMAL(10,4),
+    message TEXT,
+    email_envoye BOOLEAN DEFAULT 0,
+    date_email TIMESTAMP,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_logs_alertes_timestamp ON logs_alertes (timestamp);
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    noeud_id INTEGER NOT NULL REFERENCES noeuds(id) ON DELETE CASCADE,
+    timestamp TIMESTAMP NOT NULL,
+    version_modele VARCHAR(40) NOT NULL,
+    risque DECIMAL(5,2) NOT NULL,
+    statut VARCHAR(10) NOT NULL,
+    confiance DECIMAL(5,2),
+    source VARCHAR(10) NOT NULL DEFAULT 'balayage'
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_noeud_timestamp ON predictions (noeud_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions (timestamp);
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    noeud_id INTEGER REFERENCES noeuds(id) ON DELETE SET NULL,
+    niveau VARCHAR(10) NOT NULL,
+    action VARCHAR(100),
+    message TEXT,
+    adresse_ip VARCHAR(45),
+    user_agent TEXT,
+    details JSON,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Conversion des formats DATE_FORMAT MySQL vers strftime
+_DATE_FORMAT_MAP = {'%i': '%M', '%s': '%S', '%u': '%W', '%e': '%d', '%k': '%H'}
+
+_PARAM_RE = re.compile(r'%s')
+_DATE_SUB_RE = re.compile(r'DATE_SUB\((.+?),\s*INTERVAL\s+(\d+)\s+(\w+)\)', re.IGNORECASE)
+_SEPARATOR_RE = re.compile(r'\s+SEPARATOR\s+', re.IGNORECASE)
+_INSERT_IGNORE_RE = re.compile(r'^\s*INSERT\s+IGNORE\b', re.IGNORECASE)
+_INSERT_RE = re.compile(r'^\s*INSERT\b', re.IGNORECASE)
+_FOR_UPDATE_RE = re.compile(r'\s+FOR\s+UPDATE\b', re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
+def translate_query(query):
+    """Traduit le dialecte MySQL utilisé par l'application vers SQLite"""
+    query = _DATE_SUB_RE.sub(
+        lambda m: f"datetime({m.group(1)}, '-{m.group(2)} {m.group(3).lower()}s')", query
+    )
+    query = _SEPARATOR_RE.sub(', ', query)
+    query = _INSERT_IGNORE_RE.sub('INSERT OR IGNORE', query)
+    query = _FOR_UPDATE_RE.sub('', query)
+    return _PARAM_RE.sub('?', query)
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def _curdate():
+    return date.today().isoformat()
+
+def _date_format(value, fmt):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    for mysql_fmt, py_fmt in _DATE_FORMAT_MAP.items():
+        fmt = fmt.replace(mysql_fmt, py_fmt)
+    return value.strftime(fmt)
+
+def _unix_timestamp(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+def _floor(value):
+    return None if value is None else math.floor(value)
+
+def _greatest(*values):
+    if any(value is None for value in values):
+        return None
+    return max(values)
+
+class _StdDev:
+    """Agrégat STDDEV (écart-type de population, comme MySQL)"""
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def step(self, value):
+        if value is not None:
+            self.n += 1
+            self.total += value
+            self.total_sq += value * value
+
+    def finalize(self):
+        if not self.n:
+            return None
+        mean = self.total / self.n
+        return max(self.total_sq / self.n - mean * mean, 0.0) ** 0.5
+
+def _convert_timestamp(raw):
+    try:
+        return datetime.fromisoformat(raw.decode())
+    except ValueError:
+        return raw.decode()
+
+sqlite3.register_adapter(datetime, lambda d: d.strftime('%Y-%m-%d %H:%M:%S.%f'))
+sqlite3.register_converter('TIMESTAMP', _convert_timestamp)
+
+def _translate_error(e):
+    """Uniformise les erreurs SQLite avec celles de mysql.connector"""
+    message = str(e)
+    if isinstance(e, sqlite3.IntegrityError) and 'UNIQUE' in message:
+        return Error(msg=f"Duplicate entry ({message})", errno=errorcode.ER_DUP_ENTRY)
+    return Error(msg=message)
+
+class _Cursor:
+    """Curseur compatible mysql.connector (paramètres %s, dictionary=True)"""
+
+    def __init__(self, cursor, dictionary):
+        self._cursor = cursor
+        self._dictionary = dictionary
+        self._many = None
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip([d[0] for d in self._cursor.description], row))
+
+    def execute(self, query, params=()):
+        self._many = None
+        try:
+            if _FOR_UPDATE_RE.search(query) and not self._cursor.connection.in_transaction:
+                # Pas de verrou de ligne en SQLite: la transaction prend le verrou d'écriture
+                self._cursor.execute('BEGIN IMMEDIATE')
+            self._cursor.execute(translate_query(query), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+
+    def executemany(self, query, data_list):
+        sql = translate_query(query)
+        try:
+            if _INSERT_RE.match(sql):
+                # Émule l'INSERT multi-lignes de MySQL: lastrowid = id de la première
+                # ligne, instruction annulée en entier si une ligne échoue
+                if not self._cursor.connection.in_transaction:
+                    self._cursor.execute('BEGIN')
+                self._cursor.execute('SAVEPOINT executemany')
+                first_id, count = None, 0
+                try:
+                    for params in data_list:
+                        self._cursor.execute(sql, tuple(params))
+                        if first_id is None and self._cursor.rowcount:
+                            first_id = self._cursor.lastrowid
+                        count += self._cursor.rowcount
+                except sqlite3.Error:
+                    self._cursor.execute('ROLLBACK TO executemany')
+                    raise
+                finally:
+                    self._cursor.execute('RELEASE executemany')
+                self._many = (first_id, count)
+            else:
+                self._cursor.executemany(sql, [tuple(d) for d in data_list])
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size):
+        return [self._row(r) for r in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(r) for r in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return (self._row(r) for r in self._cursor)
+
+    @property
+    def lastrowid(self):
+        return self._many[0] if self._many else self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._many[1] if self._many else self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+class _Connection:
+    """Connexion compatible mysql.connector"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, dictionary=False, **kwargs):
+        return _Cursor(self._connection.cursor(), dictionary)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        # La connexion est conservée par thread (équivalent du retour au pool)
+        self._connection.rollback()
+
+class _FileLock:
+    """Équivalent de AdvisoryLock pour SQLite (flock sur un fichier voisin de la base)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def acquire(self):
+        if self.file is not None:
+            return True
+        lock_file = open(self.path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self.file = lock_file
+        return True
+
+    def release(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class SQLiteDatabase(Database):
+    """Backend SQLite compatible avec Database (benchmarks, développement local)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self.get_connection() as connection:
+            connection._connection.executescript(SQLITE_SCHEMA)
+        print(f"✓ Base SQLite ouverte: {path}")
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False,
+                                     detect_types=sqlite3.PARSE_DECLTYPES)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA foreign_keys=ON')
+        connection.create_function('NOW', 0, _now)
+        connection.create_function('CURDATE', 0, _curdate)
+        connection.create_function('DATE_FORMAT', 2, _date_format)
+        connection.create_function('GREATEST', -1, _greatest)
+        connection.create_function('UNIX_TIMESTAMP', 1, _unix_timestamp)
+        connection.create_function('FLOOR', 1, _floor)
+        connection.create_aggregate('STDDEV', 1, _StdDev)
+        return _Connection(connection)
+
+    def after_fork(self):
+        """Connexions du parent abandonnées: une connexion SQLite ne passe pas un fork"""
+        self._local = threading.local()
+
+    def _consecutive_ids(self, cursor):
+        # Un seul écrivain à la fois: ids toujours consécutifs
+        return True
+
+    def advisory_lock(self, name):
+        return _FileLock(f"{self.path}.{name}.lock")
+
+    @contextmanager
+    def get_connection(self):
+        """Connexion SQLite propre au thread courant"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        try:
+            yield connection
+        except Error:
+            connection.rollback()
+            raise
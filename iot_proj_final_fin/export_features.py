@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Export des caractéristiques du modèle IA pour l'entraînement.
+
+Rejoue les mesures de chaque noeud (par lots, sans charger la table) à travers
+le même calcul de fenêtre que la production (features.py) et écrit une ligne
+toutes les --pas secondes: noeud_id, timestamp puis FEATURE_COLUMNS.
+
+Exemples (depuis le dossier du projet):
+    python export_features.py --debut 2026-06-01 --fin 2026-09-30 --sortie features.csv
+    python export_features.py --debut 2026-09-01 --fin 2026-09-02 --noeuds 3 7 --pas 30
+"""
+import argparse
+import csv
+import sys
+from datetime import datetime
+
+from database import db
+from features import FEATURE_COLUMNS, iter_node_features
+
+def export(writer, noeud_ids, debut, fin, pas, chunk_size):
+    """Écrit les caractéristiques des noeuds; retourne le nombre de lignes"""
+    count = 0
+    for noeud_id in noeud_ids:
+        for instant, features in iter_node_features(noeud_id, debut, fin, pas, chunk_size):
+            writer.writerow([noeud_id, instant.isoformat(sep=' ')] + [round(float(v), 4) for v in features])
+            count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Export des caractéristiques de fenêtre (CSV)")
+    parser.add_argument('--debut', required=True, type=datetime.fromisoformat)
+    parser.add_argument('--fin', required=True, type=datetime.fromisoformat)
+    parser.add_argument('--pas', type=int, default=60, help="secondes entre deux lignes d'un noeud")
+    parser.add_argument('--noeuds', type=int, nargs='*', help="ids des noeuds (tous par défaut)")
+    parser.add_argument('--taille-lot', type=int, default=10000, help="mesures lues par requête")
+    parser.add_argument('--sortie', default='-', help="fichier CSV (sortie standard par défaut)")
+    args = parser.parse_args()
+
+    noeud_ids = args.noeuds or [row['id'] for row in db.execute_query("SELECT id FROM noeuds ORDER BY id")]
+    output = sys.stdout if args.sortie == '-' else open(args.sortie, 'w', newline='')
+    try:
+        writer = csv.writer(output)
+        writer.writerow(['noeud_id', 'timestamp'] + FEATURE_COLUMNS)
+        count = export(writer, noeud_ids, args.debut, args.fin, args.pas, args.taille_lot)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"{count} lignes exportées ({len(noeud_ids)} noeuds)", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
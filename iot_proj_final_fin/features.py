@@ -0,0 +1,214 @@
+"""
+Caractéristiques du modèle IA calculées sur une fenêtre alignée de mesures.
+
+Les trois signaux (température, humidité, co2) d'un noeud arrivent à des
+instants différents. Ils sont rééchantillonnés sur une grille commune
+(FEATURE_WINDOW secondes au pas de FEATURE_STEP, dernière valeur connue à
+chaque pas). Les caractéristiques sont ensuite calculées en NumPy pour un ou
+plusieurs noeuds à la fois:
+- valeur courante (colonnes du modèle d'origine: temperature, humidity, raw_h2);
+- pente par minute (moindres carrés sur la grille);
+- delta entre le début et la fin de la fenêtre;
+- maximum de température et de co2, minimum d'humidité.
+
+Le même code sert en production (node_features, appelée par check_alerts) et
+pour l'export des données d'entraînement (iter_node_features,
+export_features.py): entraînement et service restent cohérents. En
+production, la fenêtre est relue dans mesures à chaque évaluation: elle
+contient les mesures du noeud reçues par tous les processus (workers,
+passerelle MQTT, ASGI), pas seulement celles du worker courant.
+"""
+import bisect
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from config import Config
+from database import db
+
+# (type de capteur, nom de colonne du modèle)
+SIGNALS = (('temperature', 'temperature'), ('humidite', 'humidity'), ('co2', 'raw_h2'))
+SIGNAL_TYPES = tuple(capteur_type for capteur_type, _ in SIGNALS)
+BASE_COLUMNS = [column for _, column in SIGNALS]
+FEATURE_COLUMNS = (
+    BASE_COLUMNS
+    + [f"{column}_pente" for column in BASE_COLUMNS]
+    + [f"{column}_delta" for column in BASE_COLUMNS]
+    + ['temperature_max', 'humidity_min', 'raw_h2_max']
+)
+
+def to_epoch(timestamp):
+    """Horodatage en secondes (heure courante si absent ou illisible)"""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    if isinstance(timestamp, str):
+        try:
+            return datetime.fromisoformat(timestamp).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+def time_grid(t_end, window=None, step=None):
+    """Instants de la grille commune se terminant à t_end"""
+    window = window or Config.FEATURE_WINDOW
+    step = step or Config.FEATURE_STEP
+    return t_end - window + step * np.arange(int(window // step) + 1)
+
+def resample(times, values, grid):
+    """Dernière valeur connue à chaque instant de la grille (la première avant la 1re mesure)"""
+    index = np.searchsorted(times, grid, side='right') - 1
+    return values[np.clip(index, 0, None)]
+
+def features_from_grids(grids, grid):
+    """
+    Caractéristiques de plusieurs noeuds
+
+    Args:
+        grids (ndarray): (noeuds, 3 signaux, points de la grille)
+        grid (ndarray): Instants de la grille (secondes)
+
+    Returns:
+        ndarray: (noeuds, len(FEATURE_COLUMNS))
+    """
+    minutes = (grid - grid.mean()) / 60
+    centered = grids - grids.mean(axis=2, keepdims=True)
+    slopes = centered @ minutes / (minutes @ minutes)
+    return np.column_stack([
+        grids[:, :, -1],
+        slopes,
+        grids[:, :, -1] - grids[:, :, 0],
+        grids[:, 0].max(axis=1),
+        grids[:, 1].min(axis=1),
+        grids[:, 2].max(axis=1)
+    ])
+
+def stationary_features(temperatures, humidities, smoke_levels):
+    """Caractéristiques de valeurs instantanées supposées stables sur la fenêtre"""
+    current = np.column_stack([
+        np.asarray(temperatures, dtype=float),
+        np.asarray(humidities, dtype=float),
+        np.asarray(smoke_levels, dtype=float)
+    ])
+    zeros = np.zeros_like(current)
+    return np.column_stack([current, zeros, zeros, current[:, 0], current[:, 1], current[:, 2]])
+
+class WindowBuffer:
+    """Mesures récentes des trois signaux de chaque noeud, ajoutées par ordre d'arrivée"""
+
+    def __init__(self, window, step):
+        self.window = window
+        self.step = step
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def add(self, noeud_id, capteur_type, valeur, instant):
+        """Ajoute une mesure (les mesures en retard sont insérées à leur place)"""
+        if capteur_type not in SIGNAL_TYPES:
+            return
+        with self._lock:
+            series = self._series.get(noeud_id)
+            if series is None:
+                series = self._series[noeud_id] = {signal: [] for signal in SIGNAL_TYPES}
+            points = series[capteur_type]
+            bisect.insort(points, (instant, float(valeur)))
+            # Garde la dernière mesure antérieure à la fenêtre (valeur au début de la grille)
+            cutoff = bisect.bisect_right(points, (points[-1][0] - self.window, float('inf')))
+            if cutoff > 1:
+                del points[:cutoff - 1]
+
+    def features(self, noeud_id, t_end):
+        """
+        Caractéristiques du noeud sur la fenêtre se terminant à t_end
+
+        Returns:
+            ndarray: Ligne de FEATURE_COLUMNS, ou None si un signal n'a aucune mesure dans la fenêtre
+        """
+        grid = time_grid(t_end, self.window, self.step)
+        rows = []
+        with self._lock:
+            series = self._series.get(noeud_id)
+            if series is None:
+                return None
+            for capteur_type in SIGNAL_TYPES:
+                points = series[capteur_type]
+                last = bisect.bisect_right(points, (t_end, float('inf')))
+                if not last or points[last - 1][0] < t_end - self.window:
+                    return None
+                times, values = np.array(points[:last]).T
+                rows.append(resample(times, values, grid))
+        return features_from_grids(np.array([rows]), grid)[0]
+
+# Fenêtre d'un noeud et la fenêtre précédente (dernière mesure avant le début de la grille)
+WINDOW_QUERY = """
+    SELECT c.type, m.valeur, m.timestamp FROM mesures m
+    JOIN capteurs c ON c.id = m.capteur_id
+    WHERE m.noeud_id = %s AND m.timestamp > %s AND m.timestamp <= %s
+    AND c.type IN ('temperature', 'humidite', 'co2')
+    ORDER BY m.timestamp, m.id
+"""
+
+def node_features(noeud_id, t_end):
+    """
+    Caractéristiques d'un noeud sur la fenêtre se terminant à t_end, relue dans mesures
+
+    Une requête sur deux fenêtres (index idx_noeud_timestamp), rejouée dans un
+    WindowBuffer comme pour l'export.
+
+    Returns:
+        ndarray: Ligne de FEATURE_COLUMNS, ou None si un signal n'a aucune mesure dans la fenêtre
+    """
+    buffer = WindowBuffer(Config.FEATURE_WINDOW, Config.FEATURE_STEP)
+    since = datetime.fromtimestamp(t_end - 2 * Config.FEATURE_WINDOW)
+    for row in db.execute_query(WINDOW_QUERY, (noeud_id, since, datetime.fromtimestamp(t_end))):
+        buffer.add(noeud_id, row['type'], row['valeur'], to_epoch(row['timestamp']))
+    return buffer.features(noeud_id, t_end)
+
+def iter_node_features(noeud_id, debut, fin, pas, chunk_size=10000):
+    """
+    Caractéristiques d'un noeud toutes les pas secondes entre debut et fin (export hors ligne)
+
+    Les mesures sont lues par lots de chunk_size (index idx_noeud_timestamp):
+    la table n'est jamais chargée entière en mémoire.
+
+    Yields:
+        tuple: (instant datetime, ligne de FEATURE_COLUMNS)
+    """
+    buffer = WindowBuffer(Config.FEATURE_WINDOW, Config.FEATURE_STEP)
+    query = """
+        SELECT m.id, c.type, m.valeur, m.timestamp FROM mesures m
+        JOIN capteurs c ON c.id = m.capteur_id
+        WHERE m.noeud_id = %s AND c.type IN ('temperature', 'humidite', 'co2')
+        AND (m.timestamp > %s OR (m.timestamp = %s AND m.id > %s))
+        AND m.timestamp <= %s
+        ORDER BY m.timestamp, m.id
+        LIMIT %s
+    """
+    t_next = debut.timestamp()
+    t_fin = fin.timestamp()
+    # Comme node_features: deux fenêtres avant debut (valeur au début de la grille)
+    position = (datetime.fromtimestamp(t_next - 2 * Config.FEATURE_WINDOW), 0)
+    while True:
+        rows = db.execute_query(query, (noeud_id, position[0], position[0], position[1], fin, chunk_size))
+        for row in rows:
+            instant = to_epoch(row['timestamp'])
+            # Toutes les mesures jusqu'à t_next sont lues dès qu'une mesure plus récente arrive
+            while t_next < instant and t_next <= t_fin:
+                features = buffer.features(noeud_id, t_next)
+                if features is not None:
+                    yield datetime.fromtimestamp(t_next), features
+                t_next += pas
+            buffer.add(noeud_id, row['type'], row['valeur'], instant)
+            position = (row['timestamp'], row['id'])
+        if len(rows) < chunk_size:
+            break
+
+    while t_next <= t_fin:
+        features = buffer.features(noeud_id, t_next)
+        if features is None:
+            break
+        yield datetime.fromtimestamp(t_next), features
+        t_next += pas
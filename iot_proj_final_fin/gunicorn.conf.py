@@ -0,0 +1,86 @@
+# Configuration gunicorn
+# Lancement: gunicorn -c gunicorn.conf.py app:app
+#
+# Profils (GUNICORN_PROFILE):
+# - sync: un worker = une requête à la fois (requêtes courtes, CPU: prédictions)
+# - gthread: GUNICORN_THREADS threads par worker (défaut: ingestion + dashboard, E/S MySQL)
+# - gevent: milliers de connexions par worker (noeuds lents, longues attentes);
+#   sans préchargement: les verrous threading créés à l'import dans le maître
+#   ne seraient pas ceux de gevent (patchés seulement dans le worker), et un
+#   greenlet qui attend MySQL en tenant l'un d'eux bloquerait tout le worker
+import gc
+import os
+
+PROFILES = {
+    'sync': {'worker_class': 'sync', 'preload': True},
+    'gthread': {'worker_class': 'gthread', 'preload': True},
+    'gevent': {'worker_class': 'gevent', 'preload': False},
+}
+PROFILE = os.getenv('GUNICORN_PROFILE', 'gthread')
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+worker_class = PROFILES[PROFILE]['worker_class']
+threads = int(os.getenv('GUNICORN_THREADS', 8))                       # gthread
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))  # gevent
+
+# Application chargée une fois dans le maître avant le fork: modèle IA et
+# modules partagés en copie sur écriture entre les workers (jamais avec gevent)
+preload_app = PROFILES[PROFILE]['preload'] and os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+# Threads de fond d'un worker qui empruntent une connexion au pool: tampon
+# d'écriture, noeuds hors ligne, dernières connexions, balayage du risque, prédictions
+BACKGROUND_DB_THREADS = 5
+
+# Connexions HTTP persistantes derrière le reverse proxy (les noeuds envoient en rafales)
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+# Recyclage des workers (fuites mémoire); la gigue évite qu'ils redémarrent ensemble
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+# Répertoire partagé des métriques Prometheus entre les workers
+# (défini avant le fork pour être hérité par tous les workers)
+METRICS_DIR = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/iot_metrics')
+
+# Importé ici (après PROMETHEUS_MULTIPROC_DIR) et pas dans child_exit: un import
+# dans le gestionnaire de SIGCHLD peut interrompre un import en cours du maître
+from utils.metrics import mark_process_dead
+
+def on_starting(server):
+    """Vide le répertoire des métriques au démarrage du maître"""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    for name in os.listdir(METRICS_DIR):
+        if name.endswith('.db'):
+            os.remove(os.path.join(METRICS_DIR, name))
+    # Nouvelle époque du cache HTTP: les ETag servis avant le redémarrage ne
+    # valident plus rien (écritures éventuelles faites hors de l'application)
+    from utils.http_cache import response_cache
+    response_cache.versions.new_epoch()
+
+def when_ready(server):
+    """Préchargement: charge le modèle dans le maître puis gèle le ramasse-miettes"""
+    if not server.cfg.preload_app:
+        return
+    from ia_prediction import fire_model
+    fire_model.ensure_loaded()
+    # Objets existants exclus du GC: ses passages n'écrivent plus dans leurs
+    # en-têtes, les pages restent partagées entre les workers
+    gc.freeze()
+    server.log.info(f"Application préchargée (modèle {fire_model.version}, profil {PROFILE})")
+
+def post_fork(server, worker):
+    """Connexions propres au worker: rien n'est partagé avec le maître"""
+    from database import db
+    db.after_fork()
+    # Au-delà, une requête attend une connexion (DB_POOL_TIMEOUT) puis échoue
+    if worker_class == 'gthread' and db.pool_size < threads + BACKGROUND_DB_THREADS:
+        server.log.warning(
+            f"DB_POOL_SIZE={db.pool_size} < {threads} threads + {BACKGROUND_DB_THREADS} tâches de fond: "
+            f"augmenter DB_POOL_SIZE (32 au plus) ou réduire GUNICORN_THREADS"
+        )
+
+def child_exit(server, worker):
+    """Libère les métriques d'un worker terminé"""
+    mark_process_dead(worker.pid)
@@ -1,28 +1,102 @@
-import joblib
+import json
+import threading
 import numpy as np
-import pandas as pd
 from utils.logger import logger
+from utils import metrics
+from config import Config
+from features import BASE_COLUMNS, FEATURE_COLUMNS, stationary_features
+from inference_client import InferenceClient, InferenceUnavailable
 import os
 
 class FirePredictionModel:
     """Modèle IA pour prédire les risques d'incendie"""
     
-    def __init__(self, model_path='models/fire_model.pkl'):
-        """Initialiser et charger le modèle"""
-        self.model = None
+    def __init__(self, model_path='models/fire_model.pkl', latency_budget_ms=None, variant=None,
+                 inference_socket=None, lazy=False):
+        """
+        Initialiser et charger le modèle
+
+        Args:
+            model_path (str): Modèle de référence
+            latency_budget_ms (float): Budget de latence d'une prédiction; choisit la variante
+                la plus précise qui le respecte (MODEL_LATENCY_BUDGET_MS par défaut, 0: modèle complet)
+            variant (str): Nom de variante imposé (MODEL_VARIANT par défaut)
+            inference_socket (str): Socket du serveur d'inférence; le modèle n'est alors pas
+                chargé dans ce processus (client léger, repli sur les seuils simples)
+            lazy (bool): Charger le modèle (et scikit-learn) au premier usage seulement
+        """
+        self._model = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
         self.model_path = model_path
-        self.load_model()
+        self.latency_budget_ms = Config.MODEL_LATENCY_BUDGET_MS if latency_budget_ms is None else latency_budget_ms
+        self.variant_name = Config.MODEL_VARIANT if variant is None else variant
+        self.variant = None
+        self.version = 'seuils'
+        self.feature_names = BASE_COLUMNS
+        self.client = None
+        if inference_socket:
+            self.client = InferenceClient(inference_socket, Config.INFERENCE_TIMEOUT_MS / 1000,
+                                          Config.INFERENCE_RETRY_INTERVAL)
+            self.version = 'serveur'
+            self._loaded = True
+        elif not lazy:
+            self.load_model()
+    
+    def ensure_loaded(self):
+        """Charge le modèle s'il ne l'a pas encore été (une fois par instance)"""
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load_model()
+    
+    @property
+    def model(self):
+        """Modèle scikit-learn, None si absent (seuils simples)"""
+        self.ensure_loaded()
+        return self._model
+    
+    @model.setter
+    def model(self, value):
+        self._model = value
+    
+    @property
+    def version(self):
+        """Version enregistrée avec chaque prédiction"""
+        self.ensure_loaded()
+        return self._version
+    
+    @version.setter
+    def version(self, value):
+        self._version = value
     
     def load_model(self):
         """Charger le modèle Random Forest"""
+        # Import différé: joblib charge scikit-learn avec le modèle
+        import joblib
+        self._loaded = True
         try:
             if not os.path.exists(self.model_path):
                 logger.warning(f"Modèle IA non trouvé : {self.model_path}")
                 logger.warning("Prédictions désactivées. Le système utilisera les seuils simples.")
                 return False
             
-            self.model = joblib.load(self.model_path)
-            logger.info(f"✓ Modèle IA chargé depuis {self.model_path}")
+            # Version enregistrée avec chaque prédiction: celle de train_model.py
+            # (fichier .json voisin), sinon fichier + date de modification
+            version = self._artifact_version() or \
+                f"{os.path.basename(self.model_path)}@{int(os.path.getmtime(self.model_path))}"
+            self.variant = self._select_variant(version)
+            if self.variant:
+                path = os.path.join(os.path.dirname(self.model_path), self.variant['fichier'])
+                self.model = joblib.load(path)
+                self.version = f"{version}+{self.variant['nom']}"[:40]
+            else:
+                path = self.model_path
+                self.model = joblib.load(path)
+                self.version = version
+            # Modèle d'origine: 3 valeurs instantanées; modèle réentraîné: colonnes de features.py
+            self.feature_names = list(getattr(self.model, 'feature_names_in_', BASE_COLUMNS))
+            logger.info(f"✓ Modèle IA chargé depuis {path}")
             return True
             
         except Exception as e:
@@ -30,6 +104,56 @@ class FirePredictionModel:
             self.model = None
             return False
     
+    def _artifact_version(self):
+        """Version lue dans le rapport d'entraînement du modèle (None si absent)"""
+        report_path = os.path.splitext(self.model_path)[0] + '.json'
+        try:
+            with open(report_path) as f:
+                return json.load(f).get('version')
+        except (OSError, ValueError):
+            return None
+
+    def variants_path(self):
+        """Rapport des variantes produit par model_variants.py"""
+        return os.path.splitext(self.model_path)[0] + '_variantes.json'
+
+    def _select_variant(self, version):
+        """
+        Variante à charger à la place du modèle complet (None: modèle complet)
+
+        La plus précise (F1) dont la latence p95 mesurée respecte le budget; la plus
+        rapide si aucune ne le respecte. Un rapport construit pour une autre version
+        du modèle est ignoré.
+        """
+        if not self.latency_budget_ms and not self.variant_name:
+            return None
+        try:
+            with open(self.variants_path()) as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            logger.warning(f"Rapport de variantes absent ou illisible : {self.variants_path()}")
+            return None
+        if report.get('version_reference') != version:
+            logger.warning("Rapport de variantes construit pour un autre modèle: modèle complet utilisé")
+            return None
+
+        variants = report['variantes']
+        if self.variant_name:
+            chosen = next((v for v in variants if v['nom'] == self.variant_name), None)
+            if chosen is None:
+                logger.warning(f"Variante inconnue : {self.variant_name}")
+        else:
+            within = [v for v in variants if v['unitaire_p95_ms'] <= self.latency_budget_ms]
+            if within:
+                chosen = max(within, key=lambda v: (v['f1'], -v['unitaire_p95_ms']))
+            else:
+                chosen = min(variants, key=lambda v: v['unitaire_p95_ms'])
+                logger.warning(f"Aucune variante sous {self.latency_budget_ms} ms: la plus rapide est utilisée")
+        if chosen is None or chosen['fichier'] is None:
+            return None
+        logger.info(f"Variante {chosen['nom']}: p95 {chosen['unitaire_p95_ms']} ms, F1 {chosen['f1']}")
+        return chosen
+
     def map_value(self, x, in_min, in_max, out_min, out_max):
         """Calibration des valeurs"""
         return (x - in_min) * (out_max - out_min) / (in_max - in_min) + out_min
@@ -49,8 +173,9 @@ class FirePredictionModel:
         """
         
         # Si pas de modèle, utiliser des seuils simples
-        if self.model is None:
-            return self._simple_threshold_prediction(temperature, humidity, smoke_level)
+        if self.model is None and self.client is None:
+            with metrics.timed(metrics.MODEL_INFERENCE_DURATION, method='seuils'):
+                return self._simple_threshold_prediction(temperature, humidity, smoke_level)
         
         try:
             # Calibrer le gaz si nécessaire
@@ -66,15 +191,17 @@ class FirePredictionModel:
             
             logger.info(f"Données IA: T={temperature}°C, H={humidity}%, Fumée={smoke_level:.1f}ppm")
             
+            features = stationary_features([temperature], [humidity], [smoke_level])
+            if self.client is not None:
+                return self.predict_window(features[0])
+            
             # Créer un DataFrame avec les noms de colonnes
-            features_df = pd.DataFrame(
-                [[temperature, humidity, smoke_level]], 
-                columns=['temperature', 'humidity', 'raw_h2']
-            )
+            features_df = self._model_frame(features)
             
             # Prédiction
-            prediction = int(self.model.predict(features_df)[0])
-            probabilities = self.model.predict_proba(features_df)[0]
+            with metrics.timed(metrics.MODEL_INFERENCE_DURATION, method='model'):
+                prediction = int(self.model.predict(features_df)[0])
+                probabilities = self.model.predict_proba(features_df)[0]
             fire_risk_percent = float(probabilities[1] * 100)
             
             # Déterminer le statut
@@ -150,5 +277,101 @@ class FirePredictionModel:
             'smoke_level': smoke_level
         }
 
-# Instance globale
-fire_model = FirePredictionModel()
+    def _model_frame(self, features):
+        """Colonnes attendues par le modèle, extraites d'une matrice FEATURE_COLUMNS"""
+        import pandas as pd
+        columns = [FEATURE_COLUMNS.index(name) for name in self.feature_names]
+        return pd.DataFrame(features[:, columns], columns=self.feature_names)
+    
+    def predict_batch(self, temperatures, humidities, smoke_levels):
+        """
+        Prédire le risque pour plusieurs noeuds en un seul appel du modèle
+        
+        Args:
+            temperatures, humidities, smoke_levels (array-like): Valeurs alignées par noeud
+        
+        Returns:
+            dict: Tableaux NumPy 'prediction', 'fire_risk_percent', 'status', 'confidence'
+        """
+        return self.predict_features(stationary_features(temperatures, humidities, smoke_levels))
+    
+    def predict_window(self, features):
+        """
+        Prédire le risque d'un noeud à partir de sa fenêtre (ligne de FEATURE_COLUMNS)
+        
+        Returns:
+            dict: Même format que predict_fire_risk
+        """
+        result = self.predict_features(features[np.newaxis, :])
+        return {
+            'prediction': int(result['prediction'][0]),
+            'fire_risk_percent': float(result['fire_risk_percent'][0]),
+            'status': str(result['status'][0]),
+            'confidence': float(result['confidence'][0]),
+            'smoke_level': round(float(features[2]), 2)
+        }
+    
+    def predict_features(self, features):
+        """
+        Prédire le risque de plusieurs lignes de FEATURE_COLUMNS en un seul appel du modèle
+        
+        Returns:
+            dict: Tableaux NumPy 'prediction', 'fire_risk_percent', 'status', 'confidence'
+        """
+        features = np.asarray(features, dtype=float).reshape(-1, len(FEATURE_COLUMNS))
+        
+        if self.client is not None and len(features):
+            return self._predict_remote(features)
+        
+        if self.model is None or not len(features):
+            with metrics.timed(metrics.MODEL_INFERENCE_DURATION, method='seuils_lot'):
+                return self._simple_threshold_batch(features[:, :3])
+        
+        features_df = self._model_frame(features)
+        with metrics.timed(metrics.MODEL_INFERENCE_DURATION, method='model_lot'):
+            # predict() d'une forêt aléatoire = classe de probabilité maximale: un seul passage
+            probabilities = self.model.predict_proba(features_df)
+        prediction = self.model.classes_[probabilities.argmax(axis=1)].astype(int)
+        fire_risk = probabilities[:, 1] * 100
+        status = np.where(prediction == 1, 'CRITICAL', np.where(fire_risk > 50, 'WARNING', 'SAFE'))
+        
+        return {
+            'prediction': prediction,
+            'fire_risk_percent': np.round(fire_risk, 2),
+            'status': status,
+            'confidence': np.round(probabilities.max(axis=1) * 100, 2)
+        }
+    
+    def _predict_remote(self, features):
+        """Prédiction par le serveur d'inférence, seuils simples s'il ne répond pas à temps"""
+        try:
+            with metrics.timed(metrics.MODEL_INFERENCE_DURATION, method='serveur'):
+                result = self.client.predict(features)
+            self.version = self.client.version
+            return result
+        except OSError as e:
+            # Un seul avertissement par période d'indisponibilité
+            if not isinstance(e, InferenceUnavailable):
+                logger.warning(f"Serveur d'inférence indisponible ({e}): seuils simples")
+            self.version = 'seuils'
+            with metrics.timed(metrics.MODEL_INFERENCE_DURATION, method='seuils_lot'):
+                return self._simple_threshold_batch(features[:, :3])
+    
+    def _simple_threshold_batch(self, features):
+        """Version vectorisée de _simple_threshold_prediction"""
+        temperature, humidity, smoke_level = features.T
+        fire_risk = (
+            20 * (temperature > 35) + 20 * (temperature > 40) + 30 * (temperature > 50)
+            + 10 * (humidity < 30) + 10 * (humidity < 20)
+            + 20 * (smoke_level > 200) + 30 * (smoke_level > 400)
+        ).clip(max=100).astype(float)
+        
+        return {
+            'prediction': (fire_risk >= 70).astype(int),
+            'fire_risk_percent': fire_risk,
+            'status': np.where(fire_risk >= 70, 'CRITICAL', np.where(fire_risk >= 40, 'WARNING', 'SAFE')),
+            'confidence': np.full(len(fire_risk), 75.0)
+        }
+
+# Instance globale (client du serveur d'inférence si INFERENCE_SOCKET est défini)
+fire_model = FirePredictionModel(inference_socket=Config.INFERENCE_SOCKET, lazy=True)
@@ -0,0 +1,107 @@
+"""
+Client du serveur d'inférence (inference_server.py) et protocole partagé.
+
+Protocole sur socket Unix (entiers '!I', flottants little-endian float64):
+- à la connexion, le serveur envoie la version du modèle: longueur + UTF-8;
+- requête: nombre de lignes n, puis n lignes de FEATURE_COLUMNS;
+- réponse: n, puis n lignes (prediction, fire_risk_percent, confidence,
+  indice du statut dans STATUTS); n = ERREUR si la prédiction a échoué.
+
+Une connexion par thread (et par processus après un fork). Après un échec de
+connexion, le serveur n'est plus sollicité pendant INFERENCE_RETRY_INTERVAL
+secondes: l'appelant bascule immédiatement sur son repli.
+"""
+import os
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from features import FEATURE_COLUMNS
+
+HEADER = struct.Struct('!I')
+ERREUR = 0xFFFFFFFF
+DTYPE = np.dtype('<f8')
+STATUTS = np.array(['SAFE', 'WARNING', 'CRITICAL'])
+RESULT_COLUMNS = 4
+ROW_BYTES = len(FEATURE_COLUMNS) * DTYPE.itemsize
+
+class InferenceUnavailable(ConnectionError):
+    """Serveur en échec récent: pas de nouvelle tentative avant INFERENCE_RETRY_INTERVAL"""
+
+def recv_exact(sock, size):
+    """Lit exactement size octets (ConnectionError si le pair ferme)"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("Connexion fermée par le serveur d'inférence")
+        received += count
+    return bytes(buffer)
+
+class InferenceClient:
+    """Client léger du serveur d'inférence"""
+
+    def __init__(self, socket_path, timeout, retry_interval):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.version = None
+        self._local = threading.local()
+        self._unavailable_until = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and conn[0] == os.getpid():
+            return conn[1]
+        if time.monotonic() < self._unavailable_until:
+            raise InferenceUnavailable("Serveur d'inférence indisponible")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+            length, = HEADER.unpack(recv_exact(sock, HEADER.size))
+            self.version = recv_exact(sock, length).decode()
+        except OSError:
+            sock.close()
+            self._unavailable_until = time.monotonic() + self.retry_interval
+            raise
+        self._local.conn = (os.getpid(), sock)
+        return sock
+
+    def predict(self, features):
+        """
+        Prédiction d'un lot par le serveur
+
+        Args:
+            features (ndarray): (n, len(FEATURE_COLUMNS))
+
+        Returns:
+            dict: Tableaux NumPy 'prediction', 'fire_risk_percent', 'status', 'confidence'
+
+        Raises:
+            OSError: serveur injoignable, délai dépassé ou erreur de prédiction
+        """
+        sock = self._connection()
+        try:
+            sock.sendall(HEADER.pack(len(features)) + np.ascontiguousarray(features, dtype=DTYPE).tobytes())
+            count, = HEADER.unpack(recv_exact(sock, HEADER.size))
+            if count == ERREUR:
+                raise ConnectionError("Erreur de prédiction du serveur d'inférence")
+            data = recv_exact(sock, count * RESULT_COLUMNS * DTYPE.itemsize)
+        except OSError:
+            # Réponse éventuellement en retard: la connexion n'est plus utilisable
+            self._local.conn = None
+            sock.close()
+            raise
+        result = np.frombuffer(data, dtype=DTYPE).reshape(count, RESULT_COLUMNS)
+        return {
+            'prediction': result[:, 0].astype(int),
+            'fire_risk_percent': result[:, 1],
+            'status': STATUTS[result[:, 3].astype(int)],
+            'confidence': result[:, 2]
+        }
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Serveur d'inférence local du modèle IA (optionnel).
+
+Sans lui, chaque worker web charge sa copie du modèle et exécute
+predict_proba sous son propre GIL. Ce serveur charge le modèle une fois,
+puis répartit les prédictions sur INFERENCE_PROCESSES processus (fork: le
+modèle est partagé en copie sur écriture).
+
+Les requêtes de tous les workers arrivent sur un socket Unix
+(INFERENCE_SOCKET). Elles sont regroupées en micro-lots: un lot part dès
+qu'il atteint INFERENCE_MAX_BATCH lignes, ou INFERENCE_BATCH_WINDOW_MS après
+sa première requête. Si tous les processus sont occupés, les requêtes
+s'accumulent jusqu'à ce que l'un d'eux se libère. Chaque lot est une seule
+prédiction vectorisée (FirePredictionModel.predict_features).
+
+Côté application, INFERENCE_SOCKET fait de fire_model un client léger
+(inference_client.py). Au-delà de INFERENCE_TIMEOUT_MS, ou si le serveur
+est arrêté, la prédiction se rabat sur les seuils simples.
+
+Exemple (depuis le dossier du projet):
+    INFERENCE_SOCKET=/run/iot/inference.sock python inference_server.py --processus 4
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import Config
+from features import FEATURE_COLUMNS
+from ia_prediction import FirePredictionModel
+from inference_client import DTYPE, ERREUR, HEADER, ROW_BYTES, STATUTS
+from utils.logger import logger
+
+# Modèle du processus principal, hérité par les processus de calcul (fork)
+_model = None
+
+def _predict(features):
+    """Prédiction d'un lot dans un processus de calcul"""
+    result = _model.predict_features(features)
+    status = (result['status'][:, np.newaxis] == STATUTS).argmax(axis=1)
+    return np.column_stack([
+        result['prediction'], result['fire_risk_percent'], result['confidence'], status
+    ]).astype(DTYPE)
+
+class InferenceServer:
+    """Micro-lots des requêtes reçues sur le socket, calculés par un pool de processus"""
+
+    def __init__(self, model, socket_path, processes, batch_window, max_batch):
+        self.model = model
+        self.socket_path = socket_path
+        self.processes = processes
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._pool = None
+        self._loop = None
+        self._pending = []
+        self._pending_rows = 0
+        self._timer = None
+        self._in_flight = 0
+
+    def start_pool(self):
+        """Crée les processus avant la boucle asyncio (fork sans threads actifs)"""
+        self._pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('fork'))
+        # Le premier envoi crée tous les processus
+        self._pool.submit(_predict, np.zeros((1, len(FEATURE_COLUMNS)))).result()
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        print(f"Serveur d'inférence sur {self.socket_path} ({self.processes} processus, "
+              f"modèle {self.model.version})", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        version = self.model.version.encode()
+        writer.write(HEADER.pack(len(version)) + version)
+        try:
+            while True:
+                count, = HEADER.unpack(await reader.readexactly(HEADER.size))
+                data = await reader.readexactly(count * ROW_BYTES)
+                features = np.frombuffer(data, dtype=DTYPE).reshape(count, len(FEATURE_COLUMNS))
+                try:
+                    result = await self._submit(features)
+                    writer.write(HEADER.pack(count) + result.tobytes())
+                except Exception as e:
+                    logger.error(f"Erreur prédiction du serveur d'inférence: {e}")
+                    writer.write(HEADER.pack(ERREUR))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _submit(self, features):
+        future = self._loop.create_future()
+        self._pending.append((features, future))
+        self._pending_rows += len(features)
+        if self._pending_rows >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = self._loop.call_later(self.batch_window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Tous les processus occupés: le lot continue de grossir jusqu'au prochain résultat
+        if not self._pending or self._in_flight >= self.processes:
+            return
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        self._in_flight += 1
+        batch = np.vstack([features for features, _ in pending])
+        task = self._loop.run_in_executor(self._pool, _predict, batch)
+        task.add_done_callback(lambda done: self._dispatch(done, pending))
+
+    def _dispatch(self, task, pending):
+        self._in_flight -= 1
+        error = task.exception()
+        result = task.result() if error is None else None
+        offset = 0
+        for features, future in pending:
+            start, offset = offset, offset + len(features)
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result[start:offset])
+        if self._pending:
+            self._flush()
+
+def main(argv=None):
+    global _model
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--socket', default=Config.INFERENCE_SOCKET or 'logs/inference.sock')
+    parser.add_argument('--processus', type=int, default=Config.INFERENCE_PROCESSES)
+    parser.add_argument('--fenetre-ms', type=float, default=Config.INFERENCE_BATCH_WINDOW_MS,
+                        help="attente max d'un micro-lot après sa première requête")
+    parser.add_argument('--lot-max', type=int, default=Config.INFERENCE_MAX_BATCH)
+    parser.add_argument('--modele', default='models/fire_model.pkl')
+    args = parser.parse_args(argv)
+
+    # Une ligne de log par prédiction unitaire serait le goulot du serveur
+    logging.getLogger('iot_app').setLevel(logging.WARNING)
+
+    _model = FirePredictionModel(args.modele)
+    server = InferenceServer(_model, args.socket, args.processus, args.fenetre_ms / 1000, args.lot_max)
+    server.start_pool()
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
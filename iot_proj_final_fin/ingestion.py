@@ -0,0 +1,183 @@
+import json
+import time
+from collections import Counter
+from datetime import datetime
+
+from config import Config
+from database import db
+from alerts import check_alerts
+from utils import metrics
+from utils.dedup import DedupWindow
+from utils.logger import logger
+from write_buffer import WriteBehindBuffer
+
+# La clé unique (noeud_id, client_id) écarte les renvois qui ont échappé à la
+# fenêtre mémoire (autre worker, redémarrage): db.insert_many ne tolère que
+# cette erreur (ER_DUP_ENTRY), toute autre erreur remonte à l'appelant
+INSERT_MESURE = """
+    INSERT INTO mesures (noeud_id, capteur_id, valeur, timestamp, metadata, client_id)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# Identifiants de messages récemment ingérés, par (noeud_id, client_id)
+dedup_window = DedupWindow(Config.DEDUP_WINDOW_TTL, Config.DEDUP_WINDOW_SIZE)
+
+def client_key(row, now):
+    """
+    Clé de déduplication d'une mesure (msg_id ou numéro de séquence), ou None
+
+    Le compteur d'un noeud repart à zéro à son redémarrage: la clé porte
+    l'identifiant de démarrage 'boot' s'il est fourni, sinon l'intervalle de
+    DEDUP_KEY_BUCKET secondes de l'horodatage de la mesure (de la réception à
+    défaut). Sans 'boot', un identifiant réutilisé après un redémarrage n'est
+    donc confondu avec l'ancien que dans le même intervalle.
+
+    Args:
+        now (float): Heure de réception (epoch)
+    """
+    if row.get('msg_id') is not None:
+        key = row['msg_id']
+    elif row.get('seq') is not None:
+        key = f"seq:{row['seq']}"
+    else:
+        return None
+    if row.get('boot') is not None:
+        return f"{key}@{row['boot']}"
+    instant = row['timestamp'].timestamp() if row.get('timestamp') else now
+    return f"{key}@t{int(instant // Config.DEDUP_KEY_BUCKET)}"
+
+def association_query(nb_noeuds):
+    """Requête des associations noeud/capteur pour nb_noeuds noeuds"""
+    placeholders = ', '.join(['%s'] * nb_noeuds)
+    return f"SELECT noeud_id, capteur_id FROM noeud_capteur WHERE noeud_id IN ({placeholders})"
+
+def associated_capteurs(noeud_ids):
+    """Associations (noeud_id, capteur_id) des noeuds donnés (une seule requête)"""
+    noeud_ids = list(noeud_ids)
+    return {(row['noeud_id'], row['capteur_id'])
+            for row in db.execute_query(association_query(len(noeud_ids)), tuple(noeud_ids))}
+
+def split_batches(batches, allowed):
+    """
+    Sépare les mesures à insérer des capteurs non associés et des doublons
+    (la clé de chaque mesure acceptée est gardée dans row['client_id'])
+
+    Returns:
+        tuple: ([[nombre accepté, erreurs par index, doublons]] par lot,
+                [(index du lot, noeud_id, row)] acceptées)
+    """
+    results = []
+    accepted = []
+    batch_keys = set()
+    now = time.time()
+    for batch_index, (noeud, rows) in enumerate(batches):
+        errors = []
+        count = 0
+        doublons = 0
+        for row in rows:
+            if (noeud['id'], row['capteur_id']) not in allowed:
+                errors.append({'index': row['index'], 'error': 'Capteur non associé'})
+                continue
+            row['client_id'] = client_key(row, now)
+            if row['client_id'] is not None:
+                key = (noeud['id'], row['client_id'])
+                if key in batch_keys or dedup_window.seen(key):
+                    doublons += 1
+                    continue
+                batch_keys.add(key)
+            accepted.append((batch_index, noeud['id'], row))
+            count += 1
+        results.append([count, errors, doublons])
+    return results, accepted
+
+def mesure_params(accepted):
+    """Paramètres de INSERT_MESURE pour les mesures acceptées"""
+    now = datetime.now()
+    return [
+        (noeud_id, row['capteur_id'], row['valeur'], row['timestamp'] or now,
+         json.dumps(row['metadata']) if row.get('metadata') else None, row['client_id'])
+        for _, noeud_id, row in accepted
+    ]
+
+def remember(params, ids=None):
+    """Ajoute à la fenêtre de déduplication les messages ingérés"""
+    dedup_window.add_many([
+        (p[0], p[5]) for index, p in enumerate(params)
+        if p[5] is not None and (ids is None or ids[index] is not None)
+    ])
+
+def persist_mesures(params, sources):
+    """
+    Insère des mesures en une transaction puis évalue les alertes
+
+    Returns:
+        list: ids insérés (None pour les doublons écartés par la clé unique)
+    """
+    ids = db.insert_many(INSERT_MESURE, params)
+    for source, count in Counter(
+        source for source, mesure_id in zip(sources, ids) if mesure_id is not None
+    ).items():
+        metrics.INGEST_ROWS.labels(source).inc(count)
+    remember(params, ids)
+
+    for (noeud_id, capteur_id, valeur, timestamp, _, _), mesure_id in zip(params, ids):
+        if mesure_id is not None:
+            check_alerts(capteur_id, noeud_id, valeur, mesure_id, timestamp)
+    return ids
+
+# Tampon d'écriture différée (optionnel): insertion et alertes au vidage
+write_buffer = WriteBehindBuffer(
+    Config.WRITE_BUFFER_PATH, persist_mesures,
+    batch_size=Config.WRITE_BUFFER_BATCH_SIZE,
+    interval=Config.WRITE_BUFFER_INTERVAL,
+    synchronous=Config.WRITE_BUFFER_SYNC,
+    max_attempts=Config.WRITE_BUFFER_MAX_ATTEMPTS,
+    max_delay=Config.WRITE_BUFFER_MAX_DELAY
+) if Config.WRITE_BUFFER_ENABLED else None
+
+def ingest_many(batches, source):
+    """
+    Enregistre des mesures déjà validées de plusieurs noeuds puis évalue les alertes
+
+    Args:
+        batches (list): [(noeud, rows)] avec rows normalisées par IngestValidator
+        source (str): Origine des mesures (label des métriques)
+
+    Returns:
+        list: Pour chaque lot, (ids insérés, erreurs par index, nombre de doublons).
+              Les ids valent None quand l'insertion est différée (tampon d'écriture).
+    """
+    batches = list(batches)
+    allowed = associated_capteurs({noeud['id'] for noeud, _ in batches}) if batches else set()
+
+    results, accepted = split_batches(batches, allowed)
+    ids = [[] for _ in batches]
+    if accepted:
+        params = mesure_params(accepted)
+        if write_buffer is not None:
+            # L'écriture dans le journal vaut acquittement: le message est déjà vu
+            write_buffer.append(params, source)
+            remember(params)
+            inserted = [None] * len(params)
+        else:
+            inserted = persist_mesures(params, [source] * len(params))
+            if None in inserted:
+                logger.info(f"{inserted.count(None)} doublon(s) écarté(s) par la clé unique")
+
+        for (batch_index, _, _), mesure_id in zip(accepted, inserted):
+            if mesure_id is None and write_buffer is None:
+                results[batch_index][2] += 1
+            else:
+                ids[batch_index].append(mesure_id)
+
+    return [(batch_ids, errors, doublons)
+            for batch_ids, (_, errors, doublons) in zip(ids, results)]
+
+def ingest_readings(noeud, rows, source):
+    """
+    Enregistre des mesures déjà validées d'un noeud puis évalue les alertes
+
+    Returns:
+        tuple: (ids insérés, erreurs par index, nombre de doublons)
+    """
+    return ingest_many([(noeud, rows)], source)[0]
@@ -26,7 +26,7 @@ CREATE TABLE `alertes` (
   `id` int NOT NULL AUTO_INCREMENT,
   `capteur_id` int NOT NULL,
   `noeud_id` int DEFAULT NULL,
-  `type_alerte` enum('seuil_min','seuil_max','anomalie','hors_ligne','autre') NOT NULL,
+  `type_alerte` enum('seuil_min','seuil_max','anomalie','hors_ligne','autre','ewma','zscore','variation') NOT NULL,
   `severite` enum('info','warning','critical') NOT NULL,
   `seuil_min` decimal(10,4) DEFAULT NULL,
   `seuil_max` decimal(10,4) DEFAULT NULL,
@@ -84,6 +84,30 @@ INSERT INTO `capteurs` VALUES (1,'Capteur Température 1','temperature','°C','C
 /*!40000 ALTER TABLE `capteurs` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `etats_anomalie`
+--
+
+DROP TABLE IF EXISTS `etats_anomalie`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `etats_anomalie` (
+  `noeud_id` int NOT NULL,
+  `capteur_id` int NOT NULL,
+  `n` int NOT NULL,
+  `moyenne` double NOT NULL,
+  `variance` double NOT NULL,
+  `position` smallint NOT NULL,
+  `valeurs` blob,
+  `instants` blob,
+  `date_modification` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`noeud_id`,`capteur_id`),
+  KEY `capteur_id` (`capteur_id`),
+  CONSTRAINT `etats_anomalie_ibfk_1` FOREIGN KEY (`noeud_id`) REFERENCES `noeuds` (`id`) ON DELETE CASCADE,
+  CONSTRAINT `etats_anomalie_ibfk_2` FOREIGN KEY (`capteur_id`) REFERENCES `capteurs` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `logs`
 --
@@ -166,8 +190,11 @@ CREATE TABLE `mesures` (
   `valeur` decimal(10,4) NOT NULL,
   `timestamp` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
   `metadata` json DEFAULT NULL,
+  `client_id` varchar(100) DEFAULT NULL,
   PRIMARY KEY (`id`),
+  UNIQUE KEY `uniq_noeud_client` (`noeud_id`,`client_id`),
   KEY `idx_noeud_timestamp` (`noeud_id`,`timestamp`),
+  KEY `idx_noeud_capteur_id` (`noeud_id`,`capteur_id`,`id`),
   KEY `idx_capteur_timestamp` (`capteur_id`,`timestamp`),
   KEY `idx_timestamp` (`timestamp`),
   CONSTRAINT `mesures_ibfk_1` FOREIGN KEY (`noeud_id`) REFERENCES `noeuds` (`id`) ON DELETE CASCADE,
@@ -227,10 +254,14 @@ CREATE TABLE `noeuds` (
   `adresse_mac` varchar(17) NOT NULL,
   `adresse_ip` varchar(45) DEFAULT NULL,
   `localisation` varchar(200) DEFAULT NULL,
+  `zone` varchar(50) DEFAULT NULL,
+  `latitude` decimal(9,6) DEFAULT NULL,
+  `longitude` decimal(9,6) DEFAULT NULL,
   `modele` varchar(100) DEFAULT NULL,
   `firmware_version` varchar(50) DEFAULT NULL,
   `statut` enum('actif','inactif','maintenance','erreur') DEFAULT 'actif',
   `derniere_connexion` timestamp NULL DEFAULT NULL,
+  `hors_ligne_depuis` timestamp NULL DEFAULT NULL,
   `api_key` varchar(64) NOT NULL,
   `date_creation` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
   `date_modification` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -238,7 +269,9 @@ CREATE TABLE `noeuds` (
   UNIQUE KEY `adresse_mac` (`adresse_mac`),
   UNIQUE KEY `api_key` (`api_key`),
   KEY `idx_statut` (`statut`),
-  KEY `idx_api_key` (`api_key`)
+  KEY `idx_api_key` (`api_key`),
+  KEY `idx_derniere_connexion` (`derniere_connexion`),
+  KEY `idx_zone` (`zone`)
 ) ENGINE=InnoDB AUTO_INCREMENT=2 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -248,10 +281,33 @@ CREATE TABLE `noeuds` (
 
 LOCK TABLES `noeuds` WRITE;
 /*!40000 ALTER TABLE `noeuds` DISABLE KEYS */;
-INSERT INTO `noeuds` VALUES (1,'Noeud Foret 1','00:1B:44:11:3A:B7','192.168.1.100','Tetouan','ESP32-DevKit',NULL,'actif',NULL,'noeud_api_key_001_abcdef123456','2025-11-27 22:55:26','2025-11-27 22:55:26');
+INSERT INTO `noeuds` VALUES (1,'Noeud Foret 1','00:1B:44:11:3A:B7','192.168.1.100','Tetouan',NULL,NULL,NULL,'ESP32-DevKit',NULL,'actif',NULL,'noeud_api_key_001_abcdef123456','2025-11-27 22:55:26','2025-11-27 22:55:26');
 /*!40000 ALTER TABLE `noeuds` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `predictions`
+--
+
+DROP TABLE IF EXISTS `predictions`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `predictions` (
+  `id` bigint NOT NULL AUTO_INCREMENT,
+  `noeud_id` int NOT NULL,
+  `timestamp` datetime NOT NULL,
+  `version_modele` varchar(40) NOT NULL,
+  `risque` decimal(5,2) NOT NULL,
+  `statut` enum('SAFE','WARNING','CRITICAL') NOT NULL,
+  `confiance` decimal(5,2) DEFAULT NULL,
+  `source` enum('mesure','balayage') NOT NULL DEFAULT 'balayage',
+  PRIMARY KEY (`id`),
+  KEY `idx_predictions_noeud_timestamp` (`noeud_id`,`timestamp`),
+  KEY `idx_predictions_timestamp` (`timestamp`),
+  CONSTRAINT `predictions_ibfk_1` FOREIGN KEY (`noeud_id`) REFERENCES `noeuds` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `utilisateurs`
 --
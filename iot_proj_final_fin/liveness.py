@@ -0,0 +1,283 @@
+"""
+Suivi de présence des noeuds et détection des noeuds hors ligne.
+
+- LastSeenBuffer: chaque worker note la dernière connexion des noeuds
+  authentifiés en mémoire et l'écrit dans noeuds.derniere_connexion par lots
+  (une transaction toutes les LIVENESS_PERSIST_INTERVAL secondes au lieu d'un
+  UPDATE par requête).
+- LivenessTracker: tas des échéances (dernière connexion + délai) par noeud;
+  chaque événement coûte O(log n), sans parcours périodique de la flotte.
+- LivenessMonitor: un seul processus (verrou consultatif) lit les dernières
+  connexions modifiées depuis son dernier passage, alimente le tracker, puis
+  déclenche et lève les alertes 'hors_ligne'.
+
+Le délai d'un noeud est le seuil_max (secondes) de son alerte 'hors_ligne'
+si elle en a un, sinon LIVENESS_TIMEOUT. Une alerte sans noeud_id s'applique
+à toute la flotte. Seuls les noeuds au statut 'actif' sont suivis; l'état
+hors ligne est gardé dans noeuds.hors_ligne_depuis pour le leader suivant.
+"""
+import heapq
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from config import Config
+from database import db
+from notifications import email_notifier
+from utils.http_cache import response_cache
+from utils.logger import logger, log_to_database
+
+HORS_LIGNE = 'Noeud hors ligne'
+RETOUR_EN_LIGNE = 'Noeud de retour en ligne'
+
+class LastSeenBuffer:
+    """Dernières connexions des noeuds du worker, écrites en base par lots"""
+
+    # GREATEST: un worker en retard n'écrase pas une connexion plus récente
+    UPDATE_QUERY = """
+        UPDATE noeuds SET derniere_connexion = GREATEST(COALESCE(derniere_connexion, %s), %s)
+        WHERE id = %s
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def touch(self, noeud_id):
+        """Note une connexion du noeud (O(1), sans requête SQL)"""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    threading.Thread(target=self._flush_loop, name='last-seen', daemon=True).start()
+        self._seen[noeud_id] = datetime.now()
+
+    def flush(self):
+        """Écrit les connexions en attente en une transaction"""
+        with self._lock:
+            seen, self._seen = self._seen, {}
+        if not seen:
+            return 0
+        try:
+            db.execute_many(self.UPDATE_QUERY, [(ts, ts, noeud_id) for noeud_id, ts in seen.items()])
+        except Exception as e:
+            logger.error(f"Erreur écriture des dernières connexions: {e}")
+            with self._lock:
+                for noeud_id, ts in seen.items():
+                    self._seen.setdefault(noeud_id, ts)
+            return 0
+        response_cache.bump('connexions')
+        return len(seen)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+class LivenessTracker:
+    """Échéances de présence des noeuds (tas avec reprogrammation paresseuse)"""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.timeouts = {}
+        self.last_seen = {}
+        self.offline = set()
+        self._heap = []
+        self._scheduled = set()
+
+    def timeout_for(self, noeud_id):
+        return self.timeouts.get(noeud_id, self.timeout)
+
+    def _schedule(self, noeud_id):
+        heapq.heappush(self._heap, (self.last_seen[noeud_id] + self.timeout_for(noeud_id), noeud_id))
+        self._scheduled.add(noeud_id)
+
+    def observe(self, noeud_id, seen, now):
+        """
+        Enregistre une connexion (timestamps epoch)
+
+        Returns:
+            bool: True si le noeud était hors ligne et revient
+        """
+        previous = self.last_seen.get(noeud_id)
+        if previous is not None and seen <= previous:
+            return False
+        self.last_seen[noeud_id] = seen
+        # L'entrée déjà présente dans le tas est reprogrammée à son échéance
+        if noeud_id not in self._scheduled:
+            self._schedule(noeud_id)
+        # Une connexion déjà expirée (chargement initial) ne lève pas l'alerte
+        if noeud_id in self.offline and seen + self.timeout_for(noeud_id) > now:
+            self.offline.discard(noeud_id)
+            return True
+        return False
+
+    def expired(self, now):
+        """Noeuds dont l'échéance est dépassée depuis le dernier appel"""
+        newly_offline = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, noeud_id = heapq.heappop(heap)
+            self._scheduled.discard(noeud_id)
+            if noeud_id not in self.last_seen:
+                continue
+            if self.last_seen[noeud_id] + self.timeout_for(noeud_id) > now:
+                # Connexion reçue depuis la programmation: nouvelle échéance
+                self._schedule(noeud_id)
+            elif noeud_id not in self.offline:
+                self.offline.add(noeud_id)
+                newly_offline.append(noeud_id)
+        return newly_offline
+
+    def forget(self, noeud_id):
+        """Cesse de suivre un noeud (désactivé); son entrée du tas est ignorée"""
+        self.last_seen.pop(noeud_id, None)
+        self.offline.discard(noeud_id)
+
+class LivenessMonitor:
+    """Détection des noeuds hors ligne, exécutée par un seul processus"""
+
+    def __init__(self, timeout=None, interval=None):
+        self.tracker = LivenessTracker(timeout or Config.LIVENESS_TIMEOUT)
+        self.interval = interval or Config.LIVENESS_CHECK_INTERVAL
+        self.lock = db.advisory_lock('iot_liveness')
+        self.rules = {}
+        self._leader = False
+        self._watermark = None
+
+    def load_rules(self):
+        """Alertes 'hors_ligne' actives par noeud (clé None: toute la flotte)"""
+        rules = db.execute_query("""
+            SELECT id, noeud_id, seuil_max, email_notification FROM alertes
+            WHERE type_alerte = 'hors_ligne' AND actif = TRUE
+        """)
+        self.rules = {rule['noeud_id']: rule for rule in rules}
+        default = self.rules.get(None)
+        self.tracker.timeout = float(default['seuil_max']) if default and default['seuil_max'] \
+            else Config.LIVENESS_TIMEOUT
+        self.tracker.timeouts = {noeud_id: float(rule['seuil_max'])
+                                 for noeud_id, rule in self.rules.items()
+                                 if noeud_id is not None and rule['seuil_max']}
+
+    def rule_for(self, noeud_id):
+        return self.rules.get(noeud_id) or self.rules.get(None)
+
+    def seed(self):
+        """Charge la flotte à la prise du rôle de leader (seul parcours complet)"""
+        self.tracker = LivenessTracker(self.tracker.timeout)
+        self.load_rules()
+
+        rows = db.execute_query("""
+            SELECT id, derniere_connexion, hors_ligne_depuis FROM noeuds
+            WHERE statut = 'actif' AND derniere_connexion IS NOT NULL
+        """)
+        # État laissé par le leader précédent
+        self.tracker.offline.update(row['id'] for row in rows if row['hors_ligne_depuis'])
+        self._watermark = datetime.now()
+        self._observe(rows)
+
+    def _observe(self, rows):
+        now = time.time()
+        for row in rows:
+            seen = row['derniere_connexion']
+            if isinstance(seen, str):
+                seen = datetime.fromisoformat(seen)
+            if self.tracker.observe(row['id'], seen.timestamp(), now):
+                self.clear(row['id'])
+            if seen > self._watermark:
+                self._watermark = seen
+
+    def poll(self):
+        """Lit les connexions modifiées depuis le dernier passage (index derniere_connexion)"""
+        # Recouvrement: les workers écrivent leurs lots avec un léger retard
+        since = self._watermark - timedelta(seconds=2 * Config.LIVENESS_PERSIST_INTERVAL)
+        rows = db.execute_query("""
+            SELECT id, derniere_connexion, statut FROM noeuds
+            WHERE derniere_connexion >= %s
+        """, (since,))
+        # Un noeud désactivé n'est plus suivi (même filtre que seed)
+        for row in rows:
+            if row['statut'] != 'actif':
+                self.tracker.forget(row['id'])
+        self._observe([row for row in rows if row['statut'] == 'actif'])
+
+    def active(self, noeud_ids):
+        """Noeuds encore au statut 'actif' parmi noeud_ids (les autres sont oubliés)"""
+        if not noeud_ids:
+            return []
+        placeholders = ', '.join(['%s'] * len(noeud_ids))
+        actifs = {row['id'] for row in db.execute_query(
+            f"SELECT id FROM noeuds WHERE id IN ({placeholders}) AND statut = 'actif'",
+            tuple(noeud_ids)
+        )}
+        for noeud_id in noeud_ids:
+            if noeud_id not in actifs:
+                self.tracker.forget(noeud_id)
+        return [noeud_id for noeud_id in noeud_ids if noeud_id in actifs]
+
+    def _set_offline(self, noeud_id, since):
+        db.execute_query("UPDATE noeuds SET hors_ligne_depuis = %s WHERE id = %s", (since, noeud_id))
+        response_cache.bump('connexions')
+
+    def _record(self, noeud_id, message, seconds):
+        rule = self.rule_for(noeud_id)
+        if not rule:
+            logger.warning(f"{message} (aucune alerte 'hors_ligne' configurée)")
+            log_to_database('warning', 'noeud_hors_ligne', message, noeud_id)
+            return
+        result = db.execute_query(
+            "INSERT INTO logs_alertes (alerte_id, valeur_mesuree, message) VALUES (%s, %s, %s)",
+            (rule['id'], round(seconds), message)
+        )
+        if rule['email_notification']:
+            email_notifier.send_alert_notification(rule['id'], result['lastrowid'], round(seconds), message)
+        logger.warning(f"Alerte hors_ligne {rule['id']}: {message}")
+
+    def raise_offline(self, noeud_id, now):
+        seen = self.tracker.last_seen[noeud_id]
+        self._set_offline(noeud_id, datetime.fromtimestamp(seen))
+        seconds = now - seen
+        self._record(noeud_id, f"{HORS_LIGNE} #{noeud_id} depuis {seconds:.0f} s", seconds)
+
+    def clear(self, noeud_id):
+        self._set_offline(noeud_id, None)
+        self._record(noeud_id, f"{RETOUR_EN_LIGNE} #{noeud_id}", 0)
+
+    def check(self):
+        """Un passage: leader uniquement, lecture incrémentale puis échéances dépassées"""
+        if not self.lock.acquire():
+            self._leader = False
+            return []
+        if not self._leader:
+            logger.info("Détection hors ligne: ce processus est leader")
+            self._leader = True
+            self.seed()
+        else:
+            self.load_rules()
+            self.poll()
+
+        now = time.time()
+        # Statut relu à l'échéance: un noeud désactivé depuis sa dernière connexion est ignoré
+        newly_offline = self.active(self.tracker.expired(now))
+        for noeud_id in newly_offline:
+            self.raise_offline(noeud_id, now)
+        return newly_offline
+
+    def run(self):
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Erreur détection hors ligne: {e}")
+                self._leader = False
+                self.lock.release()
+            time.sleep(self.interval)
+
+    def start(self):
+        threading.Thread(target=self.run, name='liveness', daemon=True).start()
+
+# Instance globale (alimentée par auth.verify_api_key et la passerelle MQTT)
+last_seen = LastSeenBuffer(Config.LIVENESS_PERSIST_INTERVAL)
@@ -0,0 +1,8 @@
+-- Déduplication des renvois des noeuds (msg_id / seq)
+-- client_id: identifiant du message et sa portée (démarrage du noeud ou intervalle
+-- de temps, voir ingestion.client_key), un compteur remis à zéro ne bloque donc pas
+-- les mesures suivantes. Les mesures sans identifiant (client_id NULL) ne sont pas
+-- concernées par la clé unique
+ALTER TABLE `mesures`
+  ADD COLUMN `client_id` varchar(100) DEFAULT NULL AFTER `metadata`,
+  ADD UNIQUE KEY `uniq_noeud_client` (`noeud_id`, `client_id`);
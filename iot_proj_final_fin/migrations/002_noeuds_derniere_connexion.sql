@@ -0,0 +1,6 @@
+-- Lecture incrémentale des dernières connexions par le détecteur hors ligne (liveness.py)
+-- hors_ligne_depuis: dernière connexion d'un noeud signalé hors ligne (NULL s'il est
+-- en ligne), relu par le leader suivant
+ALTER TABLE `noeuds`
+  ADD COLUMN `hors_ligne_depuis` timestamp NULL DEFAULT NULL AFTER `derniere_connexion`,
+  ADD KEY `idx_derniere_connexion` (`derniere_connexion`);
@@ -0,0 +1,19 @@
+-- Historique compact du risque d'incendie (balayage de la flotte et mesures)
+CREATE TABLE `predictions` (
+  `id` bigint NOT NULL AUTO_INCREMENT,
+  `noeud_id` int NOT NULL,
+  `timestamp` datetime NOT NULL,
+  `version_modele` varchar(40) NOT NULL,
+  `risque` decimal(5,2) NOT NULL,
+  `statut` enum('SAFE','WARNING','CRITICAL') NOT NULL,
+  `confiance` decimal(5,2) DEFAULT NULL,
+  `source` enum('mesure','balayage') NOT NULL DEFAULT 'balayage',
+  PRIMARY KEY (`id`),
+  KEY `idx_predictions_noeud_timestamp` (`noeud_id`,`timestamp`),
+  KEY `idx_predictions_timestamp` (`timestamp`),
+  CONSTRAINT `predictions_ibfk_1` FOREIGN KEY (`noeud_id`) REFERENCES `noeuds` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Dernière mesure de chaque capteur par noeud (GROUP BY noeud_id, capteur_id avec MAX(id))
+ALTER TABLE `mesures`
+  ADD KEY `idx_noeud_capteur_id` (`noeud_id`, `capteur_id`, `id`);
@@ -0,0 +1,20 @@
+-- Types d'alertes de la détection d'anomalies en continu (anomaly.py)
+ALTER TABLE `alertes`
+  MODIFY `type_alerte` enum('seuil_min','seuil_max','anomalie','hors_ligne','autre','ewma','zscore','variation') NOT NULL;
+
+-- Sauvegarde des états glissants par (noeud, capteur)
+CREATE TABLE `etats_anomalie` (
+  `noeud_id` int NOT NULL,
+  `capteur_id` int NOT NULL,
+  `n` int NOT NULL,
+  `moyenne` double NOT NULL,
+  `variance` double NOT NULL,
+  `position` smallint NOT NULL,
+  `valeurs` blob,
+  `instants` blob,
+  `date_modification` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`noeud_id`,`capteur_id`),
+  KEY `capteur_id` (`capteur_id`),
+  CONSTRAINT `etats_anomalie_ibfk_1` FOREIGN KEY (`noeud_id`) REFERENCES `noeuds` (`id`) ON DELETE CASCADE,
+  CONSTRAINT `etats_anomalie_ibfk_2` FOREIGN KEY (`capteur_id`) REFERENCES `capteurs` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,6 @@
+-- Position et zone des noeuds (index spatial et agrégats par zone, spatial.py)
+ALTER TABLE `noeuds`
+  ADD COLUMN `zone` varchar(50) DEFAULT NULL AFTER `localisation`,
+  ADD COLUMN `latitude` decimal(9,6) DEFAULT NULL AFTER `zone`,
+  ADD COLUMN `longitude` decimal(9,6) DEFAULT NULL AFTER `latitude`,
+  ADD KEY `idx_zone` (`zone`);
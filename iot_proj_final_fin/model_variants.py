@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Variantes du modèle IA à latence réduite et rapport de Pareto.
+
+À partir du modèle de référence (--modele, une forêt aléatoire), produit:
+- arbres_N: la forêt limitée à ses N premiers arbres (sans réentraînement);
+- profondeur_D: une forêt de même taille réentraînée avec max_depth=D;
+- gbm: distillation dans un petit gradient boosting (HistGradientBoosting);
+- logistique: distillation dans une régression logistique.
+Les modèles distillés apprennent les prédictions de la référence, pas les
+étiquettes: ils en reproduisent le comportement à moindre coût.
+
+Chaque variante est évaluée sur la fin de la période (mêmes fenêtres
+étiquetées que train_model.py) et mesurée par le code du service (F1, accord
+avec la référence, latence p95 d'une prédiction unitaire). Le rapport
+(models/fire_model_variantes.json) marque les variantes de la frontière de
+Pareto (aucune autre n'est à la fois plus rapide et plus précise).
+
+FirePredictionModel charge la variante la plus précise sous
+MODEL_LATENCY_BUDGET_MS, ou celle imposée par MODEL_VARIANT. Les latences
+dépendent de la machine: lancer l'outil sur le matériel de la passerelle.
+
+Exemples (depuis le dossier du projet):
+    python model_variants.py --debut 2026-06-01 --fin 2026-09-30
+    python model_variants.py --debut 2026-06-01 --fin 2026-09-30 --arbres 5 10 25 --profondeurs 4 8
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+import joblib
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from ia_prediction import FirePredictionModel
+from train_model import add_dataset_arguments, benchmark, evaluate, file_size_mb, split_dataset
+
+def truncated_forest(forest, n_estimators):
+    """Forêt réduite à ses n_estimators premiers arbres (arbres partagés, non copiés)"""
+    variant = copy.copy(forest)
+    variant.estimators_ = forest.estimators_[:n_estimators]
+    variant.n_estimators = n_estimators
+    variant.n_jobs = 1
+    return variant
+
+def build_variants(reference, X_train, y_train, args):
+    """
+    Variantes candidates du modèle de référence
+
+    Returns:
+        dict: {nom: modèle scikit-learn entraîné sur les colonnes de la référence}
+    """
+    forest = reference.model
+    frame = reference._model_frame(X_train)
+    variants = {}
+
+    for n in sorted(set(args.arbres)):
+        if n < len(forest.estimators_):
+            variants[f"arbres_{n}"] = truncated_forest(forest, n)
+
+    for depth in sorted(set(args.profondeurs)):
+        model = RandomForestClassifier(
+            n_estimators=len(forest.estimators_), max_depth=depth, class_weight='balanced',
+            n_jobs=args.n_jobs, random_state=args.seed
+        )
+        model.fit(frame, y_train)
+        model.n_jobs = 1
+        variants[f"profondeur_{depth}"] = model
+
+    # Distillation: cible = prédictions de la référence
+    teacher = reference.predict_features(X_train)['prediction']
+    if len(set(teacher)) < 2:
+        print("La référence ne prédit qu'une classe sur l'entraînement: distillation ignorée",
+              file=sys.stderr)
+        return variants
+    variants['gbm'] = HistGradientBoostingClassifier(
+        max_iter=args.iterations_gbm, max_depth=3, random_state=args.seed
+    ).fit(frame, teacher)
+    variants['logistique'] = make_pipeline(
+        StandardScaler(), LogisticRegression(max_iter=1000)
+    ).fit(frame, teacher)
+    return variants
+
+def describe(nom, model, fichier, path, X_test, y_test, reference_prediction):
+    """Entrée du rapport d'une variante (modèle chargé comme en production)"""
+    metriques = evaluate(model, X_test, y_test)
+    latence = benchmark(model, X_test)
+    return {
+        'nom': nom,
+        'fichier': fichier,
+        'f1': metriques['f1'],
+        'auc': metriques.get('auc'),
+        'accord_reference': round(float(np.mean(model.predict_features(X_test)['prediction'] == reference_prediction)), 4),
+        'unitaire_p50_ms': latence['unitaire_p50_ms'],
+        'unitaire_p95_ms': latence['unitaire_p95_ms'],
+        'lot_us_par_ligne': latence['lot_us_par_ligne'],
+        'taille_mo': file_size_mb(path),
+    }
+
+def mark_pareto(entries):
+    """Frontière de Pareto: par latence croissante, chaque variante plus précise que les plus rapides"""
+    best_f1 = -1
+    for entry in sorted(entries, key=lambda e: (e['unitaire_p95_ms'], -e['f1'])):
+        entry['pareto'] = entry['f1'] > best_f1
+        best_f1 = max(best_f1, entry['f1'])
+
+def print_report(report):
+    print(f"\nRéférence {report['version_reference']} "
+          f"({report['jeu']['evaluation']} fenêtres d'évaluation)")
+    print(f"  {'variante':<16}{'F1':>8}{'AUC':>8}{'accord':>8}{'p95 ms':>9}{'µs/ligne':>10}{'Mo':>8}  Pareto")
+    for e in sorted(report['variantes'], key=lambda e: e['unitaire_p95_ms']):
+        auc = e['auc'] if e['auc'] is not None else '-'
+        print(f"  {e['nom']:<16}{e['f1']:>8}{auc:>8}{e['accord_reference']:>8}{e['unitaire_p95_ms']:>9}"
+              f"{e['lot_us_par_ligne']:>10}{e['taille_mo']:>8}  {'*' if e['pareto'] else ''}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument('--modele', default='models/fire_model.pkl', help="modèle de référence")
+    parser.add_argument('--arbres', type=int, nargs='*', default=[5, 10, 25, 50])
+    parser.add_argument('--profondeurs', type=int, nargs='*', default=[4, 6, 8])
+    parser.add_argument('--iterations-gbm', type=int, default=50)
+    parser.add_argument('--n-jobs', type=int, default=-1, help="processus d'entraînement (-1: tous les coeurs)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    # Les prédictions unitaires journalisent en INFO: coût exclu des mesures de latence
+    logging.getLogger('iot_app').setLevel(logging.WARNING)
+
+    reference = FirePredictionModel(args.modele, latency_budget_ms=0, variant='')
+    if not hasattr(reference.model, 'estimators_'):
+        print(f"{args.modele}: une forêt aléatoire est attendue comme référence", file=sys.stderr)
+        return 2
+    dataset = split_dataset(args)
+    if dataset is None:
+        return 2
+    X_train, y_train, X_test, y_test, _ = dataset
+
+    reference_prediction = reference.predict_features(X_test)['prediction']
+    entries = [describe('complet', reference, None, args.modele, X_test, y_test, reference_prediction)]
+
+    models_dir = os.path.dirname(args.modele)
+    stem = os.path.splitext(os.path.basename(args.modele))[0]
+    os.makedirs(os.path.join(models_dir, 'variantes'), exist_ok=True)
+    for nom, model in build_variants(reference, X_train, y_train, args).items():
+        fichier = os.path.join('variantes', f"{stem}_{nom}.pkl")
+        path = os.path.join(models_dir, fichier)
+        joblib.dump(model, path)
+        loaded = FirePredictionModel(path, latency_budget_ms=0, variant='')
+        entries.append(describe(nom, loaded, fichier, path, X_test, y_test, reference_prediction))
+
+    mark_pareto(entries)
+    report = {
+        'version_reference': reference.version,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'jeu': {'entrainement': len(X_train), 'evaluation': len(X_test),
+                'positives_evaluation': int(y_test.sum())},
+        'variantes': entries,
+    }
+    with open(reference.variants_path(), 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print_report(report)
+    print(f"\nRapport: {reference.variants_path()}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Passerelle MQTT -> base de données avec persistance par micro-lots.
+
+Topics (préfixe Config.MQTT_TOPIC_PREFIX, 'foret' par défaut):
+    foret/noeuds/<noeud_id>/capteurs/<capteur_id>
+        {"api_key": "...", "valeur": 23.5, "timestamp": "2025-06-01 12:00:00"}
+    foret/noeuds/<noeud_id>/mesures
+        {"api_key": "...", "mesures": [{"capteur_id": 1, "valeur": 23.5}, ...]}
+
+Les noeuds sont authentifiés par noeuds.api_key (vérification mise en cache).
+Les mesures sont regroupées puis insérées en une transaction par lot, suivies
+de l'évaluation des alertes, via le même pipeline que l'API HTTP. Les lots sont
+insérés par le thread de vidage, jamais par le thread réseau du client MQTT
+(qui doit continuer à lire le socket et répondre aux keepalive). Les messages
+sont déjà acquittés (PUBACK) au broker: un lot dont l'insertion échoue est
+remis en attente (au plus MQTT_MAX_PENDING mesures) et réessayé avec un délai
+croissant (jusqu'à MQTT_RETRY_MAX_DELAY secondes).
+
+Lancement: python mqtt_bridge.py [--host localhost] [--port 1883]
+"""
+import argparse
+import json
+import threading
+import time
+
+from config import Config
+from auth import verify_api_key
+from ingestion import ingest_many
+from liveness import last_seen
+from utils.logger import logger
+from utils.validators import IngestValidator
+
+def topic_matches(pattern, topic):
+    """Correspondance d'un topic avec un filtre MQTT (+ et #)"""
+    pattern_parts = pattern.split('/')
+    topic_parts = topic.split('/')
+    for index, part in enumerate(pattern_parts):
+        if part == '#':
+            return True
+        if index >= len(topic_parts) or (part != '+' and part != topic_parts[index]):
+            return False
+    return len(pattern_parts) == len(topic_parts)
+
+class InProcessBroker:
+    """Broker MQTT minimal en mémoire (tests et développement sans Mosquitto)"""
+
+    def __init__(self):
+        self.subscriptions = []
+
+    def subscribe(self, pattern, callback):
+        self.subscriptions.append((pattern, callback))
+
+    def publish(self, topic, payload):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        for pattern, callback in self.subscriptions:
+            if topic_matches(pattern, topic):
+                callback(topic, payload)
+
+class MqttBridge:
+    """Traduit les messages MQTT en mesures et les persiste par micro-lots"""
+
+    def __init__(self, prefix=None, batch_size=None, batch_interval=None, auth_ttl=None,
+                 max_pending=None):
+        self.prefix = prefix or Config.MQTT_TOPIC_PREFIX
+        self.batch_size = batch_size or Config.MQTT_BATCH_SIZE
+        self.batch_interval = batch_interval or Config.MQTT_BATCH_INTERVAL
+        self.auth_ttl = auth_ttl or Config.MQTT_AUTH_CACHE_TTL
+        self.max_pending = max_pending or Config.MQTT_MAX_PENDING
+        self.validator = IngestValidator()
+
+        # noeud_id -> (api_key, noeud, expiration)
+        self._auth_cache = {}
+        # noeud_id -> (noeud, [mesures])
+        self._pending = {}
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        # Réveille le thread de vidage quand un lot est plein
+        self._wake = threading.Event()
+        self._flusher = None
+        # Échecs d'insertion consécutifs et prochain essai (délai croissant)
+        self._failures = 0
+        self._retry_at = 0.0
+        self.stats = {'recues': 0, 'inserees': 0, 'rejetees': 0, 'doublons': 0, 'perdues': 0}
+
+    @property
+    def subscriptions(self):
+        return [f"{self.prefix}/noeuds/+/capteurs/+", f"{self.prefix}/noeuds/+/mesures"]
+
+    def parse_topic(self, topic):
+        """Retourne (noeud_id, capteur_id ou None) ou None si le topic est inconnu"""
+        parts = topic.split('/')
+        depth = len(self.prefix.split('/'))
+        parts = parts[depth:]
+        try:
+            if len(parts) == 4 and parts[0] == 'noeuds' and parts[2] == 'capteurs':
+                return int(parts[1]), int(parts[3])
+            if len(parts) == 3 and parts[0] == 'noeuds' and parts[2] == 'mesures':
+                return int(parts[1]), None
+        except ValueError:
+            pass
+        return None
+
+    def authenticate(self, noeud_id, api_key):
+        """Vérifie la clé API d'un noeud (cache pour éviter une requête par message)"""
+        if not api_key:
+            return None
+        now = time.monotonic()
+        cached = self._auth_cache.get(noeud_id)
+        if cached and cached[0] == api_key and cached[2] > now:
+            return cached[1]
+        noeud = verify_api_key(api_key)
+        if not noeud or noeud['id'] != noeud_id:
+            self._auth_cache.pop(noeud_id, None)
+            return None
+        self._auth_cache[noeud_id] = (api_key, noeud, now + self.auth_ttl)
+        return noeud
+
+    def handle_message(self, topic, payload):
+        """Traite un message MQTT (appelé par le client ou le broker en mémoire)"""
+        target = self.parse_topic(topic)
+        if target is None:
+            logger.warning(f"MQTT: topic ignoré {topic}")
+            return
+        noeud_id, capteur_id = target
+
+        try:
+            data = json.loads(payload)
+        except (ValueError, UnicodeDecodeError):
+            logger.warning(f"MQTT: message non JSON sur {topic}")
+            return
+        if not isinstance(data, dict):
+            return
+
+        noeud = self.authenticate(noeud_id, data.get('api_key'))
+        if not noeud:
+            logger.warning(f"MQTT: clé API invalide pour le noeud {noeud_id}")
+            return
+        # L'authentification est en cache: noter la connexion à chaque message
+        last_seen.touch(noeud_id)
+
+        if capteur_id is not None:
+            mesures = [dict(data, capteur_id=capteur_id)]
+        else:
+            mesures = data.get('mesures')
+            if not isinstance(mesures, list):
+                return
+
+        rows, errors = self.validator.validate_bulk(mesures)
+        with self._lock:
+            self.stats['recues'] += len(mesures)
+            self.stats['rejetees'] += len(errors)
+            entry = self._pending.setdefault(noeud_id, (noeud, []))
+            entry[1].extend(rows)
+            self._pending_count += len(rows)
+            # Base lente: l'attente reste bornée même sans échec d'insertion
+            self._drop_excess(self._pending)
+            full = self._pending_count >= self.batch_size
+        if full:
+            if self._flusher:
+                self._wake.set()
+            else:
+                # Sans thread de vidage (start() non appelé): insertion dans l'appelant
+                self.flush()
+
+    def _drop_excess(self, pending):
+        """Abandonne les mesures les plus anciennes au-delà de max_pending (verrou tenu)"""
+        excess = self._pending_count - self.max_pending
+        if excess > 0:
+            logger.error(f"MQTT: {excess} mesures abandonnées (attente pleine)")
+        for _, rows in pending.values():
+            if excess <= 0:
+                break
+            dropped = min(excess, len(rows))
+            del rows[:dropped]
+            excess -= dropped
+            self._pending_count -= dropped
+            self.stats['perdues'] += dropped
+
+    def _requeue(self, pending):
+        """Remet en attente un lot non inséré, devant les mesures reçues depuis"""
+        with self._lock:
+            for noeud_id, entry in self._pending.items():
+                if noeud_id in pending:
+                    pending[noeud_id][1].extend(entry[1])
+                else:
+                    pending[noeud_id] = entry
+            self._pending = pending
+            self._pending_count = sum(len(rows) for _, rows in pending.values())
+            # Attente bornée: les mesures les plus anciennes sont abandonnées
+            self._drop_excess(pending)
+            return self._pending_count
+
+    def flush(self, force=False):
+        """Insère toutes les mesures en attente en un lot (sauf pendant le délai après un échec)"""
+        with self._flush_lock:
+            if not force and time.monotonic() < self._retry_at:
+                return 0
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._pending_count = 0
+            if not pending:
+                return 0
+            batches = []
+            for noeud, rows in pending.values():
+                # Index relatifs au lot de chaque noeud pour les erreurs
+                for index, row in enumerate(rows):
+                    row['index'] = index
+                batches.append((noeud, rows))
+            try:
+                results = ingest_many(batches, 'mqtt')
+            except Exception as e:
+                self._failures += 1
+                delay = min(self.batch_interval * 2 ** self._failures, Config.MQTT_RETRY_MAX_DELAY)
+                self._retry_at = time.monotonic() + delay
+                remaining = self._requeue(pending)
+                logger.error(f"Erreur insertion lot MQTT ({remaining} mesures en attente, "
+                             f"nouvel essai dans {delay:.1f} s): {e}")
+                return 0
+            self._failures = 0
+            self._retry_at = 0.0
+            inserted = sum(len(ids) for ids, _, _ in results)
+            with self._lock:
+                self.stats['inserees'] += inserted
+                self.stats['rejetees'] += sum(len(errors) for _, errors, _ in results)
+                self.stats['doublons'] += sum(doublons for _, _, doublons in results)
+            return inserted
+
+    def _flush_loop(self):
+        # Toutes les batch_interval secondes, ou dès qu'un lot est plein
+        while not self._stop.is_set():
+            self._wake.wait(self.batch_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.flush()
+
+    def start(self):
+        """Démarre le vidage périodique des lots"""
+        self._flusher = threading.Thread(target=self._flush_loop, name='mqtt-flush', daemon=True)
+        self._flusher.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._flusher:
+            self._flusher.join()
+            self._flusher = None
+        self.flush(force=True)
+
+    def attach(self, broker):
+        """Abonne la passerelle à un broker en mémoire"""
+        for pattern in self.subscriptions:
+            broker.subscribe(pattern, self.handle_message)
+
+    def run_paho(self, host, port, username=None, password=None):
+        """Connexion longue durée à un broker MQTT (Mosquitto, EMQX...)"""
+        import paho.mqtt.client as mqtt
+
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id='iot-bridge')
+        if username:
+            client.username_pw_set(username, password)
+
+        def on_connect(client, userdata, flags, reason_code, properties):
+            logger.info(f"MQTT connecté à {host}:{port} ({reason_code})")
+            for pattern in self.subscriptions:
+                client.subscribe(pattern, qos=1)
+
+        client.on_connect = on_connect
+        client.on_message = lambda client, userdata, msg: self.handle_message(msg.topic, msg.payload)
+        client.connect(host, port, keepalive=60)
+
+        self.start()
+        try:
+            client.loop_forever()
+        finally:
+            self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=Config.MQTT_HOST)
+    parser.add_argument('--port', type=int, default=Config.MQTT_PORT)
+    args = parser.parse_args()
+
+    bridge = MqttBridge()
+    bridge.run_paho(args.host, args.port, Config.MQTT_USERNAME, Config.MQTT_PASSWORD)
+
+if __name__ == '__main__':
+    main()
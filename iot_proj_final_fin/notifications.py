@@ -6,6 +6,7 @@ from threading import Thread
 from config import Config
 from database import db
 from utils.logger import logger
+from utils import metrics
 
 class EmailNotification:
     """Système de notification par email"""
@@ -43,6 +44,13 @@ class EmailNotification:
             logger.error(f"Erreur envoi email: {e}")
             return False
     
+    def _send_email_queued(self, to_email, subject, body):
+        """Envoie un email depuis un thread en tenant à jour la file d'attente"""
+        try:
+            self.send_email(to_email, subject, body)
+        finally:
+            metrics.EMAIL_QUEUE_DEPTH.dec()
+    
     def can_send_alert(self, alerte_id):
         """Vérifie si on peut envoyer une alerte avec délai minimum"""
         now = datetime.now()
@@ -110,7 +118,8 @@ class EmailNotification:
             """
             
             for admin in admins:
-                thread = Thread(target=self.send_email, args=(admin['email'], subject, body))
+                metrics.EMAIL_QUEUE_DEPTH.inc()
+                thread = Thread(target=self._send_email_queued, args=(admin['email'], subject, body))
                 thread.start()
             
             update_query = "UPDATE logs_alertes SET email_envoye = TRUE, date_email = NOW() WHERE id = %s"
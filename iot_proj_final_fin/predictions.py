@@ -0,0 +1,145 @@
+"""
+Historique du risque d'incendie (table predictions).
+
+- save_predictions: écriture d'un lot en une transaction (balayage de la flotte).
+- PredictionBuffer: prédictions calculées à chaque mesure, gardées en mémoire
+  par worker et écrites par lots (PREDICTION_BATCH_SIZE lignes ou
+  PREDICTION_FLUSH_INTERVAL secondes) au lieu d'un INSERT par mesure; le
+  reste est écrit à la sortie du processus (atexit: arrêt ou recyclage d'un
+  worker gunicorn, passerelle MQTT).
+- risk_curves: courbes de risque agrégées par intervalle de temps côté SQL
+  (moyenne, maximum et pire statut par intervalle).
+"""
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+
+from config import Config
+from database import db
+from utils.logger import logger
+
+INSERT_PREDICTION = """
+    INSERT INTO predictions (noeud_id, timestamp, version_modele, risque, statut, confiance, source)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+STATUTS = ('SAFE', 'WARNING', 'CRITICAL')
+
+def save_predictions(rows):
+    """
+    Enregistre des prédictions en une transaction
+
+    Args:
+        rows (list): Tuples (noeud_id, timestamp, version_modele, risque, statut, confiance, source)
+    """
+    if rows:
+        db.execute_many(INSERT_PREDICTION, rows)
+
+class PredictionBuffer:
+    """Prédictions du worker en attente, écrites en base par lots"""
+
+    def __init__(self, interval, batch_size):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._rows = []
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def add(self, row):
+        """Ajoute une prédiction (tuple de INSERT_PREDICTION), vide le tampon s'il est plein"""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._rows = []
+                    threading.Thread(target=self._flush_loop, name='predictions', daemon=True).start()
+                    atexit.register(self.flush)
+        with self._lock:
+            self._rows.append(row)
+            full = len(self._rows) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Écrit les prédictions en attente en une transaction"""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        try:
+            save_predictions(rows)
+        except Exception as e:
+            # Historique seulement: le lot est abandonné plutôt que de grossir sans fin
+            logger.error(f"Erreur écriture des prédictions ({len(rows)} perdues): {e}")
+            return 0
+        return len(rows)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+def _curve_query(noeud_id, zone):
+    """Requête d'agrégation par intervalle; par noeud sauf si une zone est demandée"""
+    group = 'bucket' if zone else 'p.noeud_id, bucket'
+    query = f"""
+        SELECT {'' if zone else 'p.noeud_id,'}
+               FLOOR(UNIX_TIMESTAMP(p.timestamp) / %s) * %s AS bucket,
+               AVG(p.risque) AS risque_moyen,
+               MAX(p.risque) AS risque_max,
+               MAX(CASE p.statut WHEN 'CRITICAL' THEN 2 WHEN 'WARNING' THEN 1 ELSE 0 END) AS statut,
+               COUNT(*) AS n
+        FROM predictions p
+    """
+    if zone:
+        query += " JOIN noeuds n ON n.id = p.noeud_id"
+    query += " WHERE p.timestamp >= %s AND p.timestamp < %s"
+    if noeud_id:
+        query += " AND p.noeud_id = %s"
+    if zone:
+        query += " AND n.zone = %s"
+    query += f" GROUP BY {group} ORDER BY {group}"
+    return query
+
+def risk_curves(debut, fin, intervalle, noeud_id=None, zone=None):
+    """
+    Courbes de risque sous-échantillonnées (index idx_predictions_noeud_timestamp)
+
+    Args:
+        debut, fin (datetime): Période [debut, fin[
+        intervalle (int): Largeur d'un intervalle en secondes
+        noeud_id (int): Limite la requête à un noeud
+        zone (str): Une seule courbe agrégée pour les noeuds de la zone
+        (l'un des deux est requis: sans filtre, une courbe par noeud de la flotte)
+
+    Returns:
+        list: [{'noeud_id' ou 'zone', 'points': [{'t', 'risque_moyen', 'risque_max', 'statut', 'n'}]}]
+    """
+    if not noeud_id and not zone:
+        raise ValueError("noeud_id ou zone requis")
+    params = [intervalle, intervalle, debut, fin]
+    if noeud_id:
+        params.append(noeud_id)
+    if zone:
+        params.append(zone)
+    rows = db.execute_query(_curve_query(noeud_id, zone), tuple(params))
+
+    curves = {}
+    for row in rows:
+        key = zone or row['noeud_id']
+        points = curves.setdefault(key, [])
+        points.append({
+            't': datetime.fromtimestamp(int(row['bucket'])).isoformat(),
+            'risque_moyen': round(float(row['risque_moyen']), 2),
+            'risque_max': round(float(row['risque_max']), 2),
+            'statut': STATUTS[int(row['statut'])],
+            'n': row['n']
+        })
+
+    field = 'zone' if zone else 'noeud_id'
+    return [{field: key, 'points': points} for key, points in curves.items()]
+
+# Instance globale (alimentée par alerts.check_alerts)
+prediction_buffer = PredictionBuffer(Config.PREDICTION_FLUSH_INTERVAL, Config.PREDICTION_BATCH_SIZE)
@@ -0,0 +1,126 @@
+"""
+Réévaluation périodique du risque d'incendie de toute la flotte.
+
+Toutes les RISK_SWEEP_INTERVAL secondes, un seul processus (verrou consultatif
+'iot_risk_sweep') lit la dernière température, humidité et valeur de co2 de
+chaque noeud actif, score la flotte en un seul appel du modèle
+(fire_model.predict_batch), enregistre le résultat dans la table predictions
+et déclenche l'alerte 'anomalie' des noeuds qui passent en WARNING/CRITICAL.
+Les noeuds silencieux ou qui émettent hors phase sont ainsi réévalués.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from config import Config
+from database import db
+from ia_prediction import fire_model
+from alerts import raise_prediction_alert
+from predictions import save_predictions
+from utils.logger import logger
+
+TYPES = ('temperature', 'humidite', 'co2')
+
+# Dernière mesure de chaque capteur de chaque noeud actif
+# (parcours de l'index idx_noeud_capteur_id, voir migrations/003)
+SNAPSHOT_QUERY = """
+    SELECT m.noeud_id, c.type, m.valeur, m.timestamp, m.id
+    FROM mesures m
+    JOIN (
+        SELECT noeud_id, capteur_id, MAX(id) AS id
+        FROM mesures
+        GROUP BY noeud_id, capteur_id
+    ) derniere ON derniere.id = m.id
+    JOIN capteurs c ON c.id = m.capteur_id
+    JOIN noeuds n ON n.id = m.noeud_id
+    WHERE n.statut = 'actif'
+    AND c.type IN ('temperature', 'humidite', 'co2')
+"""
+
+def fleet_snapshot(max_age=None):
+    """
+    Dernier triplet (température, humidité, co2) par noeud
+
+    Returns:
+        dict: {noeud_id: {'temperature': v, 'humidite': v, 'co2': v}} (noeuds complets seulement)
+    """
+    latest = {}
+    for row in db.execute_query(SNAPSHOT_QUERY):
+        values = latest.setdefault(row['noeud_id'], {})
+        # Plusieurs capteurs du même type: la mesure la plus récente l'emporte
+        current = values.get(row['type'])
+        if current is None or row['id'] > current['id']:
+            values[row['type']] = row
+
+    oldest = datetime.now() - timedelta(seconds=max_age) if max_age else None
+    snapshot = {}
+    for noeud_id, values in latest.items():
+        if len(values) < len(TYPES):
+            continue
+        if oldest and any(_as_datetime(values[t]['timestamp']) < oldest for t in TYPES):
+            continue
+        snapshot[noeud_id] = {t: float(values[t]['valeur']) for t in TYPES}
+    return snapshot
+
+def _as_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+class RiskSweep:
+    """Balayage du risque de la flotte, exécuté par un seul processus"""
+
+    def __init__(self, interval=None, max_age=None):
+        self.interval = interval or Config.RISK_SWEEP_INTERVAL
+        self.max_age = max_age if max_age is not None else Config.RISK_SWEEP_MAX_AGE
+        self.lock = db.advisory_lock('iot_risk_sweep')
+        # Statut du balayage précédent: une alerte par changement de statut
+        self.last_status = {}
+
+    def sweep(self):
+        """Un balayage complet; retourne le nombre de noeuds évalués"""
+        snapshot = fleet_snapshot(self.max_age)
+        if not snapshot:
+            return 0
+
+        noeud_ids = list(snapshot)
+        temperatures = [snapshot[n]['temperature'] for n in noeud_ids]
+        humidities = [snapshot[n]['humidite'] for n in noeud_ids]
+        smoke_levels = [snapshot[n]['co2'] for n in noeud_ids]
+        result = fire_model.predict_batch(temperatures, humidities, smoke_levels)
+
+        now = datetime.now()
+        save_predictions([
+            (noeud_id, now, fire_model.version, float(result['fire_risk_percent'][i]),
+             str(result['status'][i]), float(result['confidence'][i]), 'balayage')
+            for i, noeud_id in enumerate(noeud_ids)
+        ])
+
+        for i, noeud_id in enumerate(noeud_ids):
+            status = str(result['status'][i])
+            previous = self.last_status.get(noeud_id)
+            self.last_status[noeud_id] = status
+            if status in ('WARNING', 'CRITICAL') and status != previous:
+                prediction = {
+                    'status': status,
+                    'fire_risk_percent': float(result['fire_risk_percent'][i]),
+                    'smoke_level': smoke_levels[i]
+                }
+                raise_prediction_alert(noeud_id, prediction, temperatures[i], humidities[i])
+
+        logger.info(f"Balayage du risque: {len(noeud_ids)} noeuds évalués")
+        return len(noeud_ids)
+
+    def run(self):
+        while True:
+            try:
+                if self.lock.acquire():
+                    self.sweep()
+                else:
+                    # Un autre processus est leader: son historique de statuts fait foi
+                    self.last_status.clear()
+            except Exception as e:
+                logger.error(f"Erreur balayage du risque: {e}")
+                self.lock.release()
+            time.sleep(self.interval)
+
+    def start(self):
+        threading.Thread(target=self.run, name='risk-sweep', daemon=True).start()
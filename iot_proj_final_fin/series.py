@@ -0,0 +1,260 @@
+"""
+Séries de mesures pour le dashboard et les graphiques.
+
+- recent_series: les `limit` dernières mesures de chaque couple (noeud,
+  capteur) d'un ensemble de noeuds, en une seule requête
+  (ROW_NUMBER() OVER (PARTITION BY noeud_id, capteur_id ...)) au lieu d'une
+  requête /api/mesures par noeud.
+- range_series: série d'un capteur d'un noeud sur une période quelconque,
+  réduite à un nombre de points fixe. Les mesures sont lues par lots
+  (pagination sur (timestamp, id), index idx_noeud_timestamp) et converties
+  en tableaux NumPy lot par lot: la taille de la réponse ne dépend pas de la
+  période.
+- downsample_minmax / BucketMinMax: minimum et maximum de chaque intervalle
+  (les pics restent visibles), sur les indices ou sur des intervalles de temps.
+- lttb: Largest-Triangle-Three-Buckets, le point de chaque intervalle qui
+  préserve le mieux la forme de la courbe.
+
+Aucune table d'agrégats des mesures n'existe: les réductions sont calculées
+à la demande sur les mesures brutes.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from config import Config
+from database import db
+from features import to_epoch
+
+METHODES = ('lttb', 'minmax')
+
+RANGE_QUERY = """
+    SELECT id, timestamp, valeur FROM mesures
+    WHERE noeud_id = %s AND capteur_id = %s
+    AND (timestamp > %s OR (timestamp = %s AND id > %s))
+    AND timestamp < %s
+    ORDER BY timestamp, id
+    LIMIT %s
+"""
+
+def _recent_query(count):
+    placeholders = ', '.join(['%s'] * count)
+    # Fenêtre de temps bornée (idx_noeud_timestamp): la numérotation ne porte
+    # que sur les mesures récentes des noeuds demandés
+    return f"""
+        SELECT s.noeud_id, s.capteur_id, s.timestamp, s.valeur,
+               c.nom AS capteur_nom, c.type, c.unite
+        FROM (
+            SELECT m.noeud_id, m.capteur_id, m.timestamp, m.valeur,
+                   ROW_NUMBER() OVER (PARTITION BY m.noeud_id, m.capteur_id
+                                      ORDER BY m.timestamp DESC, m.id DESC) AS rang
+            FROM mesures m
+            WHERE m.noeud_id IN ({placeholders}) AND m.timestamp >= %s
+        ) s
+        JOIN capteurs c ON c.id = s.capteur_id
+        WHERE s.rang <= %s
+        ORDER BY s.noeud_id, s.capteur_id, s.timestamp
+    """
+
+def recent_series(noeud_ids, limit, fenetre, points=None):
+    """
+    Dernières mesures de chaque capteur de chaque noeud
+
+    Args:
+        noeud_ids (list): Noeuds concernés
+        limit (int): Mesures max par série
+        fenetre (int): Ancienneté max des mesures (secondes), de l'ordre de
+            limit fois l'intervalle attendu entre deux mesures
+        points (int): Si défini, chaque série est réduite à ce nombre de points
+
+    Returns:
+        list: [{'noeud_id', 'capteur_id', 'capteur_nom', 'type', 'unite',
+                'timestamps', 'valeurs'}] en ordre chronologique
+    """
+    if not noeud_ids:
+        return []
+    debut = datetime.now() - timedelta(seconds=fenetre)
+    rows = db.execute_query(_recent_query(len(noeud_ids)),
+                            tuple(noeud_ids) + (debut.isoformat(sep=' '), limit))
+
+    series = {}
+    for row in rows:
+        key = (row['noeud_id'], row['capteur_id'])
+        serie = series.get(key)
+        if serie is None:
+            serie = series[key] = {
+                'noeud_id': row['noeud_id'],
+                'capteur_id': row['capteur_id'],
+                'capteur_nom': row['capteur_nom'],
+                'type': row['type'],
+                'unite': row['unite'],
+                'timestamps': [],
+                'valeurs': []
+            }
+        serie['timestamps'].append(row['timestamp'])
+        serie['valeurs'].append(float(row['valeur']))
+
+    for serie in series.values():
+        if points and len(serie['valeurs']) > points:
+            keep = downsample_minmax(np.asarray(serie['valeurs']), points)
+            serie['timestamps'] = [serie['timestamps'][i] for i in keep]
+            serie['valeurs'] = [serie['valeurs'][i] for i in keep]
+        serie['timestamps'] = [ts.isoformat() for ts in serie['timestamps']]
+    return list(series.values())
+
+def downsample_minmax(values, points):
+    """
+    Indices conservés: premier et dernier point, puis minimum et maximum de
+    chacun des (points - 2) // 2 intervalles intermédiaires
+
+    Args:
+        values (ndarray): Valeurs en ordre chronologique
+        points (int): Nombre de points visés (au plus, 4 minimum)
+
+    Returns:
+        ndarray: Indices croissants dans values
+    """
+    n = len(values)
+    if n <= points:
+        return np.arange(n)
+    # La dernière mesure reste la dernière valeur affichée
+    inner = values[1:-1]
+    buckets = max((points - 2) // 2, 1)
+    starts = np.linspace(0, len(inner), buckets + 1).astype(int)[:-1]
+    bucket = np.repeat(np.arange(buckets), np.diff(np.append(starts, len(inner))))
+    # Premier indice de chaque intervalle égal à son minimum (resp. maximum)
+    mins = np.minimum.reduceat(inner, starts)[bucket] == inner
+    maxs = np.maximum.reduceat(inner, starts)[bucket] == inner
+    first_min = np.unique(bucket[mins], return_index=True)[1]
+    first_max = np.unique(bucket[maxs], return_index=True)[1]
+    kept = np.union1d(np.flatnonzero(mins)[first_min], np.flatnonzero(maxs)[first_max]) + 1
+    return np.concatenate(([0], kept, [n - 1]))
+
+class BucketMinMax:
+    """Minimum et maximum (avec leur instant) de chaque intervalle de temps, lot par lot"""
+
+    def __init__(self, debut, fin, buckets):
+        self.debut = debut
+        self.width = (fin - debut) / buckets
+        self.min_v = np.full(buckets, np.inf)
+        self.min_t = np.zeros(buckets)
+        self.max_v = np.full(buckets, -np.inf)
+        self.max_t = np.zeros(buckets)
+
+    def update(self, t, v):
+        """Ajoute un lot (t croissants, epoch)"""
+        bucket = np.clip(((t - self.debut) // self.width).astype(int), 0, len(self.min_v) - 1)
+        for sign, best_v, best_t in ((1, self.min_v, self.min_t), (-1, self.max_v, self.max_t)):
+            # Tri par intervalle puis par valeur: la première ligne de chaque intervalle est l'extrême
+            order = np.lexsort((sign * v, bucket))
+            found, first = np.unique(bucket[order], return_index=True)
+            cand_v, cand_t = v[order][first], t[order][first]
+            better = sign * cand_v < sign * best_v[found]
+            best_v[found[better]] = cand_v[better]
+            best_t[found[better]] = cand_t[better]
+
+    def result(self):
+        """(t, v) en ordre chronologique, sans les intervalles vides"""
+        filled = np.isfinite(self.min_v)
+        t = np.concatenate((self.min_t[filled], self.max_t[filled]))
+        v = np.concatenate((self.min_v[filled], self.max_v[filled]))
+        # Minimum et maximum confondus (une seule mesure): un seul point
+        t, first = np.unique(t, return_index=True)
+        return t, v[first]
+
+def lttb(t, v, points):
+    """
+    Indices retenus par Largest-Triangle-Three-Buckets
+
+    Le premier et le dernier point sont gardés; dans chacun des points - 2
+    intervalles, le point retenu forme le plus grand triangle avec le point
+    retenu précédent et la moyenne de l'intervalle suivant.
+
+    Returns:
+        ndarray: Indices croissants dans t et v
+    """
+    n = len(t)
+    if n <= points or points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    counts = np.diff(edges)
+    avg_t = np.add.reduceat(t[:n - 1], edges[:-1]) / counts
+    avg_v = np.add.reduceat(v[:n - 1], edges[:-1]) / counts
+    avg_t = np.append(avg_t[1:], t[-1])
+    avg_v = np.append(avg_v[1:], v[-1])
+
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((t[a] - avg_t[i]) * (v[lo:hi] - v[a]) - (t[a] - t[lo:hi]) * (avg_v[i] - v[a]))
+        a = lo + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+def _iter_chunks(noeud_id, capteur_id, debut, fin, chunk_size):
+    """Mesures [debut, fin[ par lots: tableaux (epoch, valeurs)"""
+    position = (debut, 0)
+    while True:
+        rows = db.execute_query(RANGE_QUERY, (noeud_id, capteur_id, position[0], position[0],
+                                              position[1], fin, chunk_size))
+        if rows:
+            yield (np.fromiter((to_epoch(row['timestamp']) for row in rows), float, len(rows)),
+                   np.fromiter((float(row['valeur']) for row in rows), float, len(rows)))
+            position = (rows[-1]['timestamp'], rows[-1]['id'])
+        if len(rows) < chunk_size:
+            break
+
+def range_series(noeud_id, capteur_id, debut, fin, points, methode='lttb'):
+    """
+    Série réduite d'un capteur d'un noeud sur [debut, fin[
+
+    Args:
+        debut, fin (datetime): Période
+        points (int): Nombre de points max de la réponse
+        methode (str): 'lttb' ou 'minmax' (minimum et maximum de points // 2
+            intervalles de temps égaux)
+
+    Une série de points mesures au plus est renvoyée telle quelle. Au-delà de
+    SERIES_LTTB_MAX_ROWS mesures, LTTB (qui a besoin de toute la série) cède
+    la place à minmax, calculé en parallèle lot par lot.
+
+    Returns:
+        dict: 'methode' appliquée ('brut' si la série n'est pas réduite),
+            'brut' (mesures lues), 'timestamps', 'valeurs'
+    """
+    t0, t1 = debut.timestamp(), fin.timestamp()
+    minmax = BucketMinMax(t0, t1, max(points // 2, 1))
+    # Mesures brutes gardées tant qu'elles sont utiles: toute la série pour
+    # LTTB (dans la limite), sinon seulement si elle tient dans points
+    max_rows = Config.SERIES_LTTB_MAX_ROWS if methode == 'lttb' else points
+    chunks = []
+    brut = 0
+    for t, v in _iter_chunks(noeud_id, capteur_id, debut, fin, Config.SERIES_CHUNK_SIZE):
+        brut += len(t)
+        minmax.update(t, v)
+        if chunks is not None:
+            chunks.append((t, v))
+            if brut > max_rows:
+                chunks = None
+
+    if chunks is not None:
+        t = np.concatenate([c[0] for c in chunks]) if chunks else np.empty(0)
+        v = np.concatenate([c[1] for c in chunks]) if chunks else np.empty(0)
+        if brut <= points:
+            # Série renvoyée telle quelle, quelle que soit la méthode demandée
+            methode = 'brut'
+        else:
+            keep = lttb(t, v, points)
+            t, v = t[keep], v[keep]
+    else:
+        t, v = minmax.result()
+        methode = 'minmax'
+
+    return {
+        'methode': methode,
+        'brut': brut,
+        'timestamps': [datetime.fromtimestamp(ts).isoformat() for ts in t.tolist()],
+        'valeurs': v.tolist()
+    }
@@ -0,0 +1,316 @@
+"""
+Index spatial et état courant de la flotte (zones, voisins).
+
+- GridIndex: grille de cellules de SPATIAL_CELL_DEG degrés; recherche des plus
+  proches voisins par anneaux de cellules autour du point, limitée au rayon
+  demandé, ou parcours de tous les points quand les anneaux à visiter
+  comptent plus de cellules que l'index n'a de points.
+- FleetState: dernière valeur connue de chaque noeud (position, zone,
+  dernière connexion, dernière température, dernier risque), gardée en mémoire
+  par worker et rafraîchie au plus toutes les FLEET_STATE_REFRESH secondes.
+  Mesures et prédictions sont lues de façon incrémentale (id > dernier id lu);
+  les requêtes de zones et de voisins ne parcourent plus les tables.
+"""
+import heapq
+import math
+import threading
+import time
+from datetime import datetime
+
+from config import Config
+from database import db
+
+RAYON_TERRE_KM = 6371.0
+KM_PAR_DEGRE = math.pi * RAYON_TERRE_KM / 180
+STATUTS = ('SAFE', 'WARNING', 'CRITICAL')
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Distance du grand cercle (haversine)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RAYON_TERRE_KM * math.asin(math.sqrt(a))
+
+class GridIndex:
+    """Index spatial en grille régulière (latitude, longitude en degrés)"""
+
+    def __init__(self, cell_deg):
+        self.cell_deg = cell_deg
+        self._cells = {}
+        self._points = {}
+        # (ligne min, ligne max, colonne min, colonne max) des cellules occupées, recalculé après un retrait
+        self._bounds = None
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    @staticmethod
+    def _ring(ci, cj, ring):
+        """Cellules à exactement ring cellules de (ci, cj) (pourtour du carré)"""
+        if ring == 0:
+            yield ci, cj
+            return
+        for j in range(cj - ring, cj + ring + 1):
+            yield ci - ring, j
+            yield ci + ring, j
+        for i in range(ci - ring + 1, ci + ring):
+            yield i, cj - ring
+            yield i, cj + ring
+
+    def insert(self, key, lat, lon):
+        self.remove(key)
+        self._points[key] = (lat, lon)
+        i, j = cell = self._cell(lat, lon)
+        self._cells.setdefault(cell, set()).add(key)
+        if self._bounds is not None:
+            rmin, rmax, cmin, cmax = self._bounds
+            self._bounds = (min(rmin, i), max(rmax, i), min(cmin, j), max(cmax, j))
+        elif len(self._cells) == 1:
+            self._bounds = (i, i, j, j)
+
+    def remove(self, key):
+        point = self._points.pop(key, None)
+        if point is not None:
+            cell = self._cell(*point)
+            self._cells[cell].discard(key)
+            if not self._cells[cell]:
+                del self._cells[cell]
+                self._bounds = None
+
+    def _cell_bounds(self):
+        if self._bounds is None and self._cells:
+            rows = [i for i, _ in self._cells]
+            cols = [j for _, j in self._cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+        return self._bounds
+
+    def _scan(self, lat, lon, k, max_km, exclude):
+        """Parcours de tous les points (moins de points que de cellules à visiter)"""
+        found = []
+        for key, point in self._points.items():
+            if key == exclude:
+                continue
+            d = distance_km(lat, lon, *point)
+            if max_km is None or d <= max_km:
+                found.append((d, key))
+        return heapq.nsmallest(k, found)
+
+    def nearest(self, lat, lon, k=5, max_km=None, exclude=None):
+        """
+        k plus proches points (anneaux de cellules de plus en plus larges)
+
+        Returns:
+            list: [(distance_km, key)] triés par distance
+        """
+        if not self._points:
+            return []
+        ci, cj = self._cell(lat, lon)
+        # Distance minimale garantie hors de l'anneau r (longitude la plus défavorable)
+        cell_km = self.cell_deg * KM_PAR_DEGRE * max(math.cos(math.radians(min(abs(lat) + self.cell_deg, 89.9))), 0.01)
+        rmin, rmax, cmin, cmax = self._cell_bounds()
+        max_ring = max(abs(ci - rmin), abs(ci - rmax), abs(cj - cmin), abs(cj - cmax))
+        if max_km is not None:
+            # Au-delà, tous les points sont à plus de max_km
+            max_ring = min(max_ring, int(max_km / cell_km) + 1)
+            # Aucune cellule occupée à portée: rien à parcourir
+            if max(rmin - ci, ci - rmax, cmin - cj, cj - cmax) > max_ring:
+                return []
+        if (2 * max_ring + 1) ** 2 > len(self._points):
+            return self._scan(lat, lon, k, max_km, exclude)
+
+        found = []
+        for ring in range(max_ring + 1):
+            for cell in self._ring(ci, cj, ring):
+                for key in self._cells.get(cell, ()):
+                    if key == exclude:
+                        continue
+                    d = distance_km(lat, lon, *self._points[key])
+                    if max_km is None or d <= max_km:
+                        found.append((d, key))
+            found.sort()
+            bound = ring * cell_km
+            if max_km is not None and bound > max_km:
+                break
+            if len(found) >= k and found[k - 1][0] <= bound:
+                break
+        return found[:k]
+
+class FleetState:
+    """Dernières valeurs connues de la flotte (par worker)"""
+
+    NODES_QUERY = """
+        SELECT id, nom, zone, latitude, longitude, statut, derniere_connexion
+        FROM noeuds
+    """
+
+    # Chargement initial: dernière mesure de température par noeud (idx_noeud_capteur_id)
+    LATEST_TEMPERATURE_QUERY = """
+        SELECT m.id, m.noeud_id, m.valeur FROM mesures m
+        JOIN (
+            SELECT noeud_id, capteur_id, MAX(id) AS id FROM mesures GROUP BY noeud_id, capteur_id
+        ) derniere ON derniere.id = m.id
+        JOIN capteurs c ON c.id = m.capteur_id
+        WHERE c.type = 'temperature'
+        ORDER BY m.id
+    """
+
+    NEW_TEMPERATURE_QUERY = """
+        SELECT m.id, m.noeud_id, m.valeur FROM mesures m
+        JOIN capteurs c ON c.id = m.capteur_id
+        WHERE m.id > %s AND c.type = 'temperature'
+        ORDER BY m.id
+    """
+
+    LATEST_PREDICTION_QUERY = """
+        SELECT p.id, p.noeud_id, p.risque, p.statut, p.timestamp FROM predictions p
+        JOIN (SELECT noeud_id, MAX(id) AS id FROM predictions GROUP BY noeud_id) derniere
+        ON derniere.id = p.id
+        ORDER BY p.id
+    """
+
+    NEW_PREDICTION_QUERY = """
+        SELECT id, noeud_id, risque, statut, timestamp FROM predictions
+        WHERE id > %s ORDER BY id
+    """
+
+    def __init__(self, refresh_interval, cell_deg):
+        self.refresh_interval = refresh_interval
+        self.cell_deg = cell_deg
+        self.nodes = {}
+        self.index = GridIndex(cell_deg)
+        self.temperatures = {}
+        self.risks = {}
+        self._last_mesure = None
+        self._last_prediction = None
+        self._refreshed = 0
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """Relit les noeuds et les nouvelles valeurs si l'état a plus de refresh_interval secondes"""
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed < self.refresh_interval:
+                return
+            self._load_nodes()
+            self._load_temperatures()
+            self._load_predictions()
+            self._refreshed = time.monotonic()
+
+    def _load_nodes(self):
+        nodes = {row['id']: row for row in db.execute_query(self.NODES_QUERY)}
+        for noeud_id in set(self.nodes) - set(nodes):
+            self.index.remove(noeud_id)
+            self.temperatures.pop(noeud_id, None)
+            self.risks.pop(noeud_id, None)
+        for noeud_id, node in nodes.items():
+            if node['latitude'] is None or node['longitude'] is None:
+                self.index.remove(noeud_id)
+                continue
+            node['latitude'] = float(node['latitude'])
+            node['longitude'] = float(node['longitude'])
+            previous = self.nodes.get(noeud_id)
+            if not previous or (previous['latitude'], previous['longitude']) != (node['latitude'], node['longitude']):
+                self.index.insert(noeud_id, node['latitude'], node['longitude'])
+        self.nodes = nodes
+
+    def _load_temperatures(self):
+        if self._last_mesure is None:
+            # Les mesures arrivées pendant le chargement seront relues au passage suivant
+            self._last_mesure = db.execute_query("SELECT COALESCE(MAX(id), 0) AS id FROM mesures")[0]['id']
+            rows = db.execute_query(self.LATEST_TEMPERATURE_QUERY)
+        else:
+            rows = db.execute_query(self.NEW_TEMPERATURE_QUERY, (self._last_mesure,))
+            if rows:
+                self._last_mesure = rows[-1]['id']
+        for row in rows:
+            self.temperatures[row['noeud_id']] = float(row['valeur'])
+
+    def _load_predictions(self):
+        if self._last_prediction is None:
+            self._last_prediction = db.execute_query("SELECT COALESCE(MAX(id), 0) AS id FROM predictions")[0]['id']
+            rows = db.execute_query(self.LATEST_PREDICTION_QUERY)
+        else:
+            rows = db.execute_query(self.NEW_PREDICTION_QUERY, (self._last_prediction,))
+            if rows:
+                self._last_prediction = rows[-1]['id']
+        for row in rows:
+            self.risks[row['noeud_id']] = {
+                'risque': float(row['risque']),
+                'statut': row['statut'],
+                'timestamp': row['timestamp']
+            }
+
+    def is_offline(self, node, now=None):
+        """Noeud actif sans connexion depuis LIVENESS_TIMEOUT secondes"""
+        if node['statut'] != 'actif':
+            return False
+        seen = node['derniere_connexion']
+        if seen is None:
+            return True
+        if isinstance(seen, str):
+            seen = datetime.fromisoformat(seen)
+        return ((now or datetime.now()) - seen).total_seconds() > Config.LIVENESS_TIMEOUT
+
+    def describe(self, noeud_id, now=None):
+        """État courant d'un noeud"""
+        node = self.nodes[noeud_id]
+        risk = self.risks.get(noeud_id) or {}
+        return {
+            'id': noeud_id,
+            'nom': node['nom'],
+            'zone': node['zone'],
+            'latitude': node['latitude'],
+            'longitude': node['longitude'],
+            'temperature': self.temperatures.get(noeud_id),
+            'risque': risk.get('risque'),
+            'statut_risque': risk.get('statut'),
+            'hors_ligne': self.is_offline(node, now)
+        }
+
+    def zones(self):
+        """Agrégats par zone (risque max, température moyenne, noeuds hors ligne)"""
+        self.refresh()
+        now = datetime.now()
+        zones = {}
+        for noeud_id, node in self.nodes.items():
+            if node['zone'] is None:
+                continue
+            zone = zones.setdefault(node['zone'], {
+                'zone': node['zone'], 'nb_noeuds': 0, 'hors_ligne': 0,
+                'risque_max': None, 'statut_max': None, '_temperatures': []
+            })
+            zone['nb_noeuds'] += 1
+            zone['hors_ligne'] += self.is_offline(node, now)
+            if noeud_id in self.temperatures:
+                zone['_temperatures'].append(self.temperatures[noeud_id])
+            risk = self.risks.get(noeud_id)
+            if risk:
+                if zone['risque_max'] is None or risk['risque'] > zone['risque_max']:
+                    zone['risque_max'] = risk['risque']
+                if zone['statut_max'] is None or STATUTS.index(risk['statut']) > STATUTS.index(zone['statut_max']):
+                    zone['statut_max'] = risk['statut']
+
+        for zone in zones.values():
+            temperatures = zone.pop('_temperatures')
+            zone['temperature_moyenne'] = round(sum(temperatures) / len(temperatures), 2) if temperatures else None
+        return sorted(zones.values(), key=lambda z: z['zone'])
+
+    def zone_nodes(self, zone):
+        """Noeuds d'une zone avec leur état courant"""
+        self.refresh()
+        now = datetime.now()
+        return [self.describe(noeud_id, now) for noeud_id, node in self.nodes.items() if node['zone'] == zone]
+
+    def neighbours(self, lat, lon, k=5, max_km=None, exclude=None):
+        """k noeuds géolocalisés les plus proches d'un point, avec leur état courant"""
+        self.refresh()
+        now = datetime.now()
+        result = []
+        for distance, noeud_id in self.index.nearest(lat, lon, k, max_km, exclude):
+            voisin = self.describe(noeud_id, now)
+            voisin['distance_km'] = round(distance, 3)
+            result.append(voisin)
+        return result
+
+# Instance globale (API zones et voisins)
+fleet_state = FleetState(Config.FLEET_STATE_REFRESH, Config.SPATIAL_CELL_DEG)
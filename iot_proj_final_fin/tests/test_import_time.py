@@ -0,0 +1,40 @@
+"""
+Budget de démarrage de l'application (voir benchmarks/import_time.py).
+
+Chaque import se fait dans un processus neuf, sur une base SQLite jetable:
+- le temps cumulé de `import app` reste sous IMPORT_TIME_BUDGET_MS (meilleur de 3);
+- pandas, scikit-learn et joblib (modèle IA) ne sont pas chargés par l'import.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.import_time import INTERDITS, measure
+from config import Config
+
+PROJET = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope='module')
+def env(tmp_path_factory):
+    env = dict(os.environ)
+    env['DB_BACKEND'] = 'sqlite'
+    env['SQLITE_PATH'] = str(tmp_path_factory.mktemp('import') / 'import.sqlite3')
+    return env
+
+def test_import_app_sous_budget(env):
+    runs = [measure('app', env, cwd=PROJET) for _ in range(3)]
+    total_ms = min(sum(own for _, own, _, _ in run) for run in runs) / 1000
+    assert total_ms < Config.IMPORT_TIME_BUDGET_MS, (
+        f"import app: {total_ms:.0f} ms > {Config.IMPORT_TIME_BUDGET_MS} ms"
+    )
+
+def test_import_app_differe_le_modele(env):
+    result = subprocess.run(
+        [sys.executable, '-c',
+         'import sys, app; print(" ".join(sorted({m.split(".")[0] for m in sys.modules})))'],
+        capture_output=True, text=True, env=env, cwd=PROJET, check=True
+    )
+    charges = set(result.stdout.split()) & set(INTERDITS)
+    assert not charges, f"chargés par import app: {', '.join(sorted(charges))}"
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Réentraînement du modèle IA à partir des tables mesures et logs_alertes.
+
+Les caractéristiques de fenêtre sont produites noeud par noeud par
+iter_node_features (mesures lues par lots, jamais la table entière) et
+étiquetées avec logs_alertes: une fenêtre se terminant à t est positive si une
+alerte des --types est déclenchée sur le noeud dans [t, t + --horizon].
+
+Vérité terrain valide: les alertes calculées sur les mesures brutes, sans le
+modèle (seuils 'seuil_min'/'seuil_max' et détecteurs 'ewma', 'zscore',
+'variation'). Les alertes levées par le modèle lui-même (type 'anomalie',
+message préfixé par 'IA:', alerts.raise_prediction_alert) sont exclues, même
+si --types les demande: le modèle apprendrait ses propres sorties et
+l'évaluation favoriserait le modèle actuel.
+
+Les dernières --holdout fractions de la période servent d'évaluation
+(découpage temporel: le modèle n'est jamais évalué sur le passé qu'il a vu).
+Le nouveau modèle et le modèle actuel sont évalués sur ce même jeu, puis
+mesurés (latence d'une prédiction unitaire et d'un lot, taille du fichier).
+
+L'artefact est versionné (models/fire_model_<version>.pkl + .json des
+métriques). Il ne remplace le modèle servi (--activer) que si les critères
+d'acceptation MODEL_MAX_SIZE_MB et MODEL_MAX_LATENCY_MS sont respectés;
+sinon le code de sortie est 1.
+
+Exemples (depuis le dossier du projet):
+    python train_model.py --debut 2026-06-01 --fin 2026-09-30
+    python train_model.py --debut 2026-06-01 --fin 2026-09-30 --n-jobs 8 --arbres 200 --activer
+"""
+import argparse
+import bisect
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+from config import Config
+from database import db
+from features import FEATURE_COLUMNS, iter_node_features, to_epoch
+from ia_prediction import FirePredictionModel
+
+# Types d'alertes qui signalent un départ de feu sans dépendre du modèle
+# (hors_ligne et autre exclus, anomalie = prédictions du modèle)
+TYPES_ETIQUETTE = ['seuil_min', 'seuil_max', 'ewma', 'zscore', 'variation']
+
+# Message des alertes levées par le modèle (alerts.raise_prediction_alert)
+PREFIXE_ALERTE_IA = 'IA:'
+
+ALERTS_QUERY = """
+    SELECT l.timestamp FROM logs_alertes l
+    JOIN alertes a ON a.id = l.alerte_id
+    JOIN mesures m ON m.id = l.mesure_id
+    WHERE m.noeud_id = %s AND a.type_alerte IN ({types})
+    AND l.message NOT LIKE %s
+    AND l.timestamp >= %s AND l.timestamp <= %s
+    ORDER BY l.timestamp
+"""
+
+def alert_instants(noeud_id, debut, fin, types):
+    """Instants (secondes) des alertes du noeud sur la période (alertes du modèle exclues)"""
+    query = ALERTS_QUERY.format(types=', '.join(['%s'] * len(types)))
+    rows = db.execute_query(query, (noeud_id, *types, PREFIXE_ALERTE_IA + '%', debut, fin))
+    return [to_epoch(row['timestamp']) for row in rows]
+
+def load_dataset(noeud_ids, debut, fin, pas, horizon, types, chunk_size):
+    """
+    Fenêtres étiquetées de tous les noeuds
+
+    Returns:
+        tuple: (caractéristiques float32 (n, len(FEATURE_COLUMNS)), étiquettes (n,), instants (n,))
+    """
+    features, labels, instants = [], [], []
+    for noeud_id in noeud_ids:
+        alerts = alert_instants(noeud_id, debut, fin, types)
+        rows = []
+        for instant, row in iter_node_features(noeud_id, debut, fin, pas, chunk_size):
+            t = instant.timestamp()
+            # Première alerte à partir de t
+            index = bisect.bisect_left(alerts, t)
+            labels.append(index < len(alerts) and alerts[index] <= t + horizon)
+            instants.append(t)
+            rows.append(row)
+        if rows:
+            features.append(np.asarray(rows, dtype=np.float32))
+    if not features:
+        return np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32), np.empty(0, dtype=int), np.empty(0)
+    return np.vstack(features), np.asarray(labels, dtype=int), np.asarray(instants)
+
+def add_dataset_arguments(parser):
+    """Options de sélection et d'étiquetage des fenêtres (partagées avec model_variants.py)"""
+    parser.add_argument('--debut', required=True, type=datetime.fromisoformat)
+    parser.add_argument('--fin', required=True, type=datetime.fromisoformat)
+    parser.add_argument('--pas', type=int, default=60, help="secondes entre deux fenêtres d'un noeud")
+    parser.add_argument('--horizon', type=int, default=Config.TRAIN_LABEL_HORIZON,
+                        help="délai (s) dans lequel une alerte rend la fenêtre positive")
+    parser.add_argument('--types', nargs='+', default=TYPES_ETIQUETTE, help="types d'alertes positifs")
+    parser.add_argument('--noeuds', type=int, nargs='*', help="ids des noeuds (tous par défaut)")
+    parser.add_argument('--taille-lot', type=int, default=10000, help="mesures lues par requête")
+    parser.add_argument('--holdout', type=float, default=0.2, help="fin de période réservée à l'évaluation")
+
+def split_dataset(args):
+    """
+    Charge les fenêtres étiquetées et les découpe dans le temps
+
+    Returns:
+        tuple: (X_train, y_train, X_test, y_test, début de l'évaluation en secondes), None si insuffisant
+    """
+    noeud_ids = args.noeuds or [row['id'] for row in db.execute_query("SELECT id FROM noeuds ORDER BY id")]
+    start = time.perf_counter()
+    X, y, instants = load_dataset(noeud_ids, args.debut, args.fin, args.pas, args.horizon,
+                                  args.types, args.taille_lot)
+    print(f"{len(X)} fenêtres ({int(y.sum())} positives) en {time.perf_counter() - start:.1f} s",
+          file=sys.stderr)
+
+    split = args.debut.timestamp() + (1 - args.holdout) * (args.fin.timestamp() - args.debut.timestamp())
+    train_mask = instants < split
+    X_train, y_train, X_test, y_test = X[train_mask], y[train_mask], X[~train_mask], y[~train_mask]
+    if len(set(y_train)) < 2 or not len(X_test):
+        print("Données insuffisantes: il faut des fenêtres positives et négatives avant la période "
+              "d'évaluation, et des fenêtres après", file=sys.stderr)
+        return None
+    return X_train, y_train, X_test, y_test, split
+
+def train(X, y, args):
+    model = RandomForestClassifier(
+        n_estimators=args.arbres,
+        max_depth=args.profondeur,
+        min_samples_leaf=args.feuille_min,
+        class_weight='balanced',
+        n_jobs=args.n_jobs,
+        random_state=args.seed
+    )
+    model.fit(pd.DataFrame(X, columns=FEATURE_COLUMNS), y)
+    # Le service prédit surtout une ligne à la fois: pas de pool de threads à l'inférence
+    model.n_jobs = 1
+    return model
+
+def evaluate(model, X, y):
+    """Métriques d'un FirePredictionModel (modèle ou seuils) sur le jeu d'évaluation"""
+    result = model.predict_features(X)
+    prediction = result['prediction']
+    metriques = {
+        'exactitude': round(float(accuracy_score(y, prediction)), 4),
+        'precision': round(float(precision_score(y, prediction, zero_division=0)), 4),
+        'rappel': round(float(recall_score(y, prediction, zero_division=0)), 4),
+        'f1': round(float(f1_score(y, prediction, zero_division=0)), 4),
+    }
+    if len(set(y)) == 2:
+        metriques['auc'] = round(float(roc_auc_score(y, result['fire_risk_percent'])), 4)
+    return metriques
+
+def benchmark(model, X, nb_unitaires=200, taille_lot=1000, repetitions=5):
+    """Latence d'une prédiction unitaire (predict_window, p50/p95) et d'un lot (predict_features)"""
+    durations = []
+    for row in X[np.arange(nb_unitaires) % len(X)]:
+        start = time.perf_counter()
+        model.predict_window(row)
+        durations.append(time.perf_counter() - start)
+    lot = X[np.arange(taille_lot) % len(X)]
+    best = float('inf')
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        model.predict_features(lot)
+        best = min(best, time.perf_counter() - start)
+    durations = np.array(durations) * 1000
+    return {
+        'unitaire_p50_ms': round(float(np.percentile(durations, 50)), 3),
+        'unitaire_p95_ms': round(float(np.percentile(durations, 95)), 3),
+        'lot_us_par_ligne': round(best / taille_lot * 1e6, 3),
+        'taille_lot': taille_lot
+    }
+
+def file_size_mb(path):
+    return round(os.path.getsize(path) / 1024 ** 2, 3) if os.path.exists(path) else None
+
+def print_report(report):
+    print(f"\nModèle {report['version']} ({report['taille_mo']} Mo)")
+    print(f"  entraînement: {report['jeu']['entrainement']} fenêtres, "
+          f"évaluation: {report['jeu']['evaluation']} ({report['jeu']['positives_evaluation']} positives)")
+    print(f"  {'':<22}{'nouveau':>12}{'actuel':>12}")
+    for key in report['nouveau']['metriques']:
+        actuel = report['actuel']['metriques'].get(key, '-')
+        print(f"  {key:<22}{report['nouveau']['metriques'][key]:>12}{actuel:>12}")
+    for key in ('unitaire_p50_ms', 'unitaire_p95_ms', 'lot_us_par_ligne'):
+        print(f"  {key:<22}{report['nouveau']['latence'][key]:>12}{report['actuel']['latence'][key]:>12}")
+    for name, gate in report['criteres'].items():
+        print(f"  {name}: {gate['valeur']} (max {gate['max']}) {'OK' if gate['ok'] else 'ÉCHEC'}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument('--arbres', type=int, default=100)
+    parser.add_argument('--profondeur', type=int, default=12)
+    parser.add_argument('--feuille-min', type=int, default=5)
+    parser.add_argument('--n-jobs', type=int, default=-1, help="processus d'entraînement (-1: tous les coeurs)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--modele-actuel', default='models/fire_model.pkl')
+    parser.add_argument('--dossier', default='models', help="dossier des artefacts versionnés")
+    parser.add_argument('--activer', action='store_true',
+                        help="remplace --modele-actuel si les critères d'acceptation sont respectés")
+    args = parser.parse_args(argv)
+
+    # Les prédictions unitaires journalisent en INFO: coût exclu des mesures de latence
+    logging.getLogger('iot_app').setLevel(logging.WARNING)
+
+    dataset = split_dataset(args)
+    if dataset is None:
+        return 2
+    X_train, y_train, X_test, y_test, split = dataset
+
+    start = time.perf_counter()
+    model = train(X_train, y_train, args)
+    duree_entrainement = round(time.perf_counter() - start, 2)
+
+    version = datetime.now().strftime('%Y%m%d-%H%M%S')
+    os.makedirs(args.dossier, exist_ok=True)
+    path = os.path.join(args.dossier, f"fire_model_{version}.pkl")
+    joblib.dump(model, path)
+
+    # Les deux modèles passent par le même code que le service
+    nouveau = FirePredictionModel(path)
+    actuel = FirePredictionModel(args.modele_actuel)
+    report = {
+        'version': version,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'periode': {'debut': args.debut.isoformat(), 'fin': args.fin.isoformat(),
+                    'debut_evaluation': datetime.fromtimestamp(split).isoformat(timespec='seconds')},
+        'etiquettes': {'types': args.types, 'horizon_s': args.horizon, 'pas_s': args.pas},
+        'colonnes': FEATURE_COLUMNS,
+        'parametres': {'arbres': args.arbres, 'profondeur': args.profondeur,
+                       'feuille_min': args.feuille_min, 'n_jobs': args.n_jobs, 'seed': args.seed},
+        'jeu': {'entrainement': len(X_train), 'evaluation': len(X_test),
+                'positives_entrainement': int(y_train.sum()), 'positives_evaluation': int(y_test.sum())},
+        'duree_entrainement_s': duree_entrainement,
+        'taille_mo': file_size_mb(path),
+        'nouveau': {'metriques': evaluate(nouveau, X_test, y_test), 'latence': benchmark(nouveau, X_test)},
+        'actuel': {'version': actuel.version, 'taille_mo': file_size_mb(args.modele_actuel),
+                   'metriques': evaluate(actuel, X_test, y_test), 'latence': benchmark(actuel, X_test)},
+    }
+    report['criteres'] = {
+        'taille_mo': {'valeur': report['taille_mo'], 'max': Config.MODEL_MAX_SIZE_MB},
+        'unitaire_p95_ms': {'valeur': report['nouveau']['latence']['unitaire_p95_ms'],
+                            'max': Config.MODEL_MAX_LATENCY_MS},
+    }
+    for gate in report['criteres'].values():
+        gate['ok'] = gate['valeur'] <= gate['max']
+    accepte = all(gate['ok'] for gate in report['criteres'].values())
+    report['accepte'] = accepte
+
+    with open(os.path.splitext(path)[0] + '.json', 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print_report(report)
+    print(f"\nArtefact: {path}")
+
+    if not accepte:
+        print("Critères d'acceptation non respectés: modèle non activé", file=sys.stderr)
+        return 1
+    if args.activer:
+        shutil.copyfile(path, args.modele_actuel)
+        shutil.copyfile(os.path.splitext(path)[0] + '.json', os.path.splitext(args.modele_actuel)[0] + '.json')
+        print(f"Modèle activé: {args.modele_actuel} (rechargé au redémarrage des workers)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import struct
+from datetime import datetime
+
+import numpy as np
+
+# Trame binaire compacte envoyée par les noeuds (little-endian)
+#
+#   en-tête   : magic 'FR' (2 octets) | version (u8) | longueur du jeton (u8)
+#   jeton     : clé API du noeud (ASCII)
+#   base      : timestamp de base (u32, secondes epoch) | nombre de mesures (u16)
+#   mesures   : n x [delta (u16, secondes depuis la mesure précédente,
+#                    la première depuis la base) | capteur_id (u16) | valeur (f32)]
+#
+# Soit 8 octets par mesure au lieu d'environ 60 en JSON.
+MAGIC = b'FR'
+VERSION = 1
+HEADER = struct.Struct('<2sBB')
+BASE = struct.Struct('<IH')
+RECORD_DTYPE = np.dtype([('delta', '<u2'), ('capteur_id', '<u2'), ('valeur', '<f4')])
+
+class FrameError(ValueError):
+    """Trame binaire mal formée"""
+
+def decode_frame(payload, max_mesures):
+    """
+    Décode une trame directement en tableaux NumPy
+
+    Returns:
+        tuple: (jeton, timestamps epoch int64, capteur_ids int64, valeurs float64)
+    """
+    if len(payload) < HEADER.size:
+        raise FrameError('Trame trop courte')
+    magic, version, token_len = HEADER.unpack_from(payload, 0)
+    if magic != MAGIC:
+        raise FrameError('Signature de trame invalide')
+    if version != VERSION:
+        raise FrameError(f'Version de trame non supportée: {version}')
+
+    offset = HEADER.size + token_len
+    if len(payload) < offset + BASE.size:
+        raise FrameError('Trame trop courte')
+    try:
+        token = bytes(payload[HEADER.size:offset]).decode('ascii')
+    except UnicodeDecodeError:
+        raise FrameError('Jeton invalide')
+    base_ts, count = BASE.unpack_from(payload, offset)
+    offset += BASE.size
+
+    if count == 0 or count > max_mesures:
+        raise FrameError(f'Nombre de mesures invalide (1 à {max_mesures})')
+    if len(payload) != offset + count * RECORD_DTYPE.itemsize:
+        raise FrameError('Taille de trame incohérente')
+
+    records = np.frombuffer(payload, dtype=RECORD_DTYPE, count=count, offset=offset)
+    timestamps = base_ts + np.cumsum(records['delta'], dtype=np.int64)
+    return (token, timestamps, records['capteur_id'].astype(np.int64),
+            records['valeur'].astype(np.float64))
+
+def encode_frame(token, base_ts, readings):
+    """
+    Encode une trame (référence pour le firmware et les benchmarks)
+
+    Args:
+        readings (list): (timestamp epoch, capteur_id, valeur) triés par timestamp
+    """
+    token = token.encode('ascii')
+    records = np.zeros(len(readings), dtype=RECORD_DTYPE)
+    previous = base_ts
+    for i, (ts, capteur_id, valeur) in enumerate(readings):
+        records[i] = (int(ts) - previous, capteur_id, valeur)
+        previous = int(ts)
+    return (HEADER.pack(MAGIC, VERSION, len(token)) + token
+            + BASE.pack(base_ts, len(readings)) + records.tobytes())
+
+def frame_to_rows(timestamps, capteur_ids, valeurs, mask):
+    """Convertit les lignes valides d'une trame en mesures normalisées (avec 'index')"""
+    return [
+        {'index': int(idx), 'capteur_id': int(capteur_ids[idx]),
+         # float32 -> précision de la colonne DECIMAL(10,4)
+         'valeur': round(float(valeurs[idx]), 4),
+         'timestamp': datetime.fromtimestamp(int(timestamps[idx])), 'metadata': None}
+        for idx in np.flatnonzero(mask)
+    ]
@@ -0,0 +1,63 @@
+"""
+Compression des réponses négociée par Accept-Encoding.
+
+Les réponses JSON, HTML et texte d'au moins COMPRESSION_MIN_SIZE octets sont
+compressées en brotli si le client l'accepte et que le paquet brotli est
+installé (pip install brotli), sinon en gzip. Les réponses déjà encodées,
+en flux (send_file, fichiers statiques) ou sans corps (304) ne sont pas
+touchées. Un ETag fort devient faible: le corps envoyé n'est plus
+identique octet pour octet, mais représente le même contenu (la
+revalidation If-None-Match utilise la comparaison faible).
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from config import Config
+from utils import metrics
+
+COMPRESSIBLE = ('application/json', 'text/html', 'text/plain', 'text/css',
+                'text/csv', 'application/javascript', 'text/javascript')
+
+def available_encodings():
+    """Encodages proposés, par ordre de préférence du serveur"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=Config.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=Config.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+def init_app(app):
+    """Compresse les réponses (à enregistrer après les autres hooks after_request)"""
+    from flask import request
+
+    encodings = available_encodings()
+
+    @app.after_request
+    def _compress(response):
+        response.vary.add('Accept-Encoding')
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE):
+            return response
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < Config.COMPRESSION_MIN_SIZE:
+            return response
+
+        compressed = compress(data, encoding)
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        metrics.HTTP_RESPONSE_BYTES.labels(encoding, 'brut').inc(len(data))
+        metrics.HTTP_RESPONSE_BYTES.labels(encoding, 'compresse').inc(len(compressed))
+        return response
@@ -0,0 +1,44 @@
+import threading
+import time
+from collections import OrderedDict
+
+class DedupWindow:
+    """
+    Fenêtre glissante des identifiants de messages déjà ingérés (par worker)
+
+    Filtre en mémoire les renvois des noeuds; la clé unique
+    (noeud_id, client_id) de la table mesures reste le garde-fou entre workers
+    et après un redémarrage.
+    """
+
+    def __init__(self, ttl=3600, max_size=100000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        keys = self._keys
+        while keys:
+            key, expiration = next(iter(keys.items()))
+            if expiration > now and len(keys) <= self.max_size:
+                break
+            keys.popitem(last=False)
+
+    def seen(self, key):
+        """Vrai si la clé a été ingérée dans la fenêtre"""
+        with self._lock:
+            expiration = self._keys.get(key)
+            return expiration is not None and expiration > time.monotonic()
+
+    def add_many(self, keys):
+        """Enregistre des clés ingérées avec succès"""
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                self._keys[key] = now + self.ttl
+                self._keys.move_to_end(key)
+            self._expire(now)
+
+    def __len__(self):
+        return len(self._keys)
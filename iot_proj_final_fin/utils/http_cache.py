@@ -0,0 +1,195 @@
+"""
+Cache HTTP des endpoints de lecture des métadonnées (capteurs, noeuds,
+alertes, utilisateurs).
+
+- VersionCounters: un compteur par ressource dans un fichier projeté en
+  mémoire (mmap), partagé par tous les workers et les autres processus.
+  Chaque écriture de la ressource l'incrémente (bump) après son commit.
+- ResponseCache.cached: décorateur des vues GET. L'ETag est dérivé des
+  versions des ressources lues par la vue (tables jointes comprises): si le
+  client l'envoie dans If-None-Match, la réponse est 304 sans requête SQL;
+  sinon le corps est servi depuis la mémoire du worker s'il y a été calculé
+  pour ces versions, ou recalculé.
+
+L'invalidation est exacte, sans délai d'expiration: les versions sont lues
+avant la requête SQL et incrémentées après le commit, un corps n'est donc
+jamais associé à des versions plus récentes que ses données. Une écriture
+faite hors de l'application (SQL direct) doit appeler response_cache.bump,
+sinon le cache reste valide jusqu'au redémarrage (nouvelle époque).
+"""
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, request
+
+from config import Config
+from utils import metrics
+
+SLOT = struct.Struct('<Q')
+
+class VersionCounters:
+    """
+    Compteurs de version partagés entre processus
+
+    Le fichier contient une époque (aléatoire, changée à chaque démarrage du
+    maître gunicorn) suivie d'un compteur 64 bits par ressource. Les lectures
+    se font sans verrou; les incréments prennent un verrou POSIX sur le
+    fichier (lockf: propre à chaque processus, y compris après un fork).
+    """
+
+    def __init__(self, path, names):
+        self.path = path
+        self.slots = {name: i + 1 for i, name in enumerate(names)}
+        self._size = (len(names) + 1) * SLOT.size
+        self._fd = None
+        self._map = None
+        self._lock = threading.Lock()
+
+    def _mapping(self):
+        if self._map is None:
+            with self._lock:
+                if self._map is None:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    fcntl.lockf(fd, fcntl.LOCK_EX)
+                    try:
+                        if os.fstat(fd).st_size < self._size:
+                            os.ftruncate(fd, self._size)
+                        mapping = mmap.mmap(fd, self._size)
+                        if not SLOT.unpack_from(mapping, 0)[0]:
+                            SLOT.pack_into(mapping, 0, self._new_epoch())
+                    finally:
+                        fcntl.lockf(fd, fcntl.LOCK_UN)
+                    self._fd, self._map = fd, mapping
+        return self._map
+
+    @staticmethod
+    def _new_epoch():
+        return int.from_bytes(os.urandom(SLOT.size), 'little') or 1
+
+    def epoch(self):
+        return SLOT.unpack_from(self._mapping(), 0)[0]
+
+    def get(self, name):
+        return SLOT.unpack_from(self._mapping(), self.slots[name] * SLOT.size)[0]
+
+    def bump(self, *names):
+        """Incrémente les compteurs des ressources modifiées"""
+        mapping = self._mapping()
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                for name in names:
+                    offset = self.slots[name] * SLOT.size
+                    SLOT.pack_into(mapping, offset, SLOT.unpack_from(mapping, offset)[0] + 1)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def new_epoch(self):
+        """Invalide toutes les réponses déjà servies (démarrage du maître)"""
+        mapping = self._mapping()
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                SLOT.pack_into(mapping, 0, self._new_epoch())
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+class ResponseCache:
+    """ETag et corps des réponses GET, par route et paramètres de requête"""
+
+    # Ressources invalidables; 'connexions': noeuds.derniere_connexion (liveness.py),
+    # séparée de 'noeuds' pour ne pas invalider les alertes à chaque écriture par lots
+    RESOURCES = ('capteurs', 'noeuds', 'connexions', 'alertes', 'utilisateurs')
+
+    def __init__(self, path, max_entries=256, enabled=True):
+        self.versions = VersionCounters(path, self.RESOURCES)
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bump(self, *resources):
+        """À appeler après le commit de toute écriture sur ces ressources"""
+        if self.enabled:
+            self.versions.bump(*resources)
+
+    def etag(self, resources):
+        versions = '.'.join(str(self.versions.get(name)) for name in resources)
+        return f'{self.versions.epoch():x}.{versions}'
+
+    def _lookup(self, key, etag):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key, etag, response):
+        with self._lock:
+            self._entries[key] = (etag, response.get_data(), response.mimetype)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _headers(response, etag):
+        response.set_etag(etag)
+        # Réponse authentifiée: navigateur seulement, revalidée à chaque appel
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def cached(self, *resources):
+        """
+        Décorateur d'une vue GET (après token_required / role_required)
+
+        Args:
+            resources: ressources dont dépend la réponse (tables jointes comprises)
+        """
+        for name in resources:
+            if name not in self.RESOURCES:
+                raise ValueError(f"Ressource de cache inconnue: {name}")
+
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+                route = request.url_rule.rule
+                etag = self.etag(resources)
+                # Comparaison faible: la compression rend l'ETag faible (utils/compression.py)
+                if request.if_none_match.contains_weak(etag):
+                    metrics.HTTP_CACHE_RESULTS.labels(route, 'non_modifie').inc()
+                    return self._headers(Response(status=304), etag)
+
+                key = (request.path, tuple(sorted(request.args.items(multi=True))))
+                entry = self._lookup(key, etag)
+                if entry is not None:
+                    metrics.HTTP_CACHE_RESULTS.labels(route, 'memoire').inc()
+                    return self._headers(Response(entry[1], mimetype=entry[2]), etag)
+
+                metrics.HTTP_CACHE_RESULTS.labels(route, 'calcul').inc()
+                rv = f(*args, **kwargs)
+                body, status = rv if isinstance(rv, tuple) else (rv, 200)
+                if status != 200:
+                    return rv
+                response = self._headers(body, etag)
+                self._store(key, etag, response)
+                return response
+            return decorated
+        return decorator
+
+# Instance globale (versions partagées par tous les workers via HTTP_CACHE_VERSIONS_PATH)
+response_cache = ResponseCache(
+    Config.HTTP_CACHE_VERSIONS_PATH,
+    max_entries=Config.HTTP_CACHE_MAX_ENTRIES,
+    enabled=Config.HTTP_CACHE_ENABLED
+)
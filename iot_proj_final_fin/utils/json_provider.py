@@ -0,0 +1,69 @@
+"""
+Sérialisation JSON rapide des réponses (orjson).
+
+Le fournisseur par défaut de Flask passe par le module json de la
+bibliothèque standard et convertit chaque Decimal et datetime des curseurs
+mysql-connector dans du code Python. orjson sérialise nativement datetime,
+date, dataclasses et tableaux NumPy, en C. Écarts assumés avec le fournisseur
+par défaut:
+- datetime et date en ISO 8601 (« 2026-06-01T12:00:00 ») au lieu du format
+  HTTP (« Mon, 01 Jun 2026 12:00:00 GMT »);
+- Decimal en nombre au lieu d'une chaîne (comme le backend SQLite);
+- NaN et infinis en null; clés dans l'ordre d'insertion, sortie toujours
+  compacte (y compris en DEBUG).
+
+Activé par JSON_PROVIDER=orjson (défaut); JSON_PROVIDER=defaut rétablit le
+fournisseur de Flask.
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import timedelta
+
+import orjson
+from flask.json.provider import JSONProvider
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _default(obj):
+    """Types non gérés nativement par orjson"""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, timedelta):
+        # Colonnes TIME de mysql-connector
+        return obj.total_seconds()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode('utf-8', 'replace')
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Type non sérialisable en JSON: {type(obj).__name__}")
+
+def dumps_bytes(obj):
+    """Sérialise en octets UTF-8 (corps de réponse)"""
+    return orjson.dumps(obj, default=_default, option=OPTIONS)
+
+class OrjsonProvider(JSONProvider):
+    """Fournisseur JSON de Flask basé sur orjson"""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # NaN / Infinity (certains firmwares): acceptés par le module json standard
+            return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
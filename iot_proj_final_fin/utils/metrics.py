@@ -0,0 +1,195 @@
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from config import Config
+
+# Le mode multi-processus de prometheus_client est activé par la variable
+# d'environnement PROMETHEUS_MULTIPROC_DIR, qui doit exister avant l'import.
+if Config.METRICS_MULTIPROC_DIR:
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', Config.METRICS_MULTIPROC_DIR)
+    os.makedirs(Config.METRICS_MULTIPROC_DIR, exist_ok=True)
+
+from prometheus_client import (Counter, Gauge, Histogram, CollectorRegistry,
+                               generate_latest, CONTENT_TYPE_LATEST, REGISTRY)
+from prometheus_client import multiprocess
+
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+# Compteur de requêtes SQL de la requête HTTP en cours
+_local = threading.local()
+
+# Buckets adaptés à des temps courts (requêtes SQL, inférence)
+FAST_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'iot_http_request_duration_seconds',
+    'Durée des requêtes HTTP par route',
+    ['method', 'route', 'status']
+)
+
+DB_QUERY_DURATION = Histogram(
+    'iot_db_query_duration_seconds',
+    'Durée des requêtes SQL par instruction et appelant',
+    ['statement', 'caller'],
+    buckets=FAST_BUCKETS
+)
+
+DB_POOL_WAIT = Histogram(
+    'iot_db_pool_wait_seconds',
+    "Attente d'une connexion libre du pool (emprunt bloquant)",
+    buckets=FAST_BUCKETS
+)
+
+MODEL_INFERENCE_DURATION = Histogram(
+    'iot_model_inference_seconds',
+    "Durée d'une prédiction du modèle IA",
+    ['method'],
+    buckets=FAST_BUCKETS
+)
+
+ALERT_EVALUATION_DURATION = Histogram(
+    'iot_alert_evaluation_seconds',
+    "Durée de l'évaluation des alertes pour une mesure",
+    buckets=FAST_BUCKETS
+)
+
+EMAIL_QUEUE_DEPTH = Gauge(
+    'iot_email_queue_depth',
+    "Nombre d'emails en attente d'envoi",
+    multiprocess_mode='livesum'
+)
+
+INGEST_ROWS = Counter(
+    'iot_ingest_rows_total',
+    'Nombre de mesures ingérées (utiliser rate() pour le débit par seconde)',
+    ['source']
+)
+
+WRITE_BUFFER_PENDING = Gauge(
+    'iot_write_buffer_pending',
+    "Mesures acquittées en attente d'insertion (tampon d'écriture différée)",
+    multiprocess_mode='livemax'
+)
+
+WRITE_BUFFER_LAG = Gauge(
+    'iot_write_buffer_lag_seconds',
+    "Âge de la plus ancienne mesure en attente dans le tampon d'écriture",
+    multiprocess_mode='livemax'
+)
+
+WRITE_BUFFER_REJECTED = Gauge(
+    'iot_write_buffer_rejected',
+    "Mesures du tampon d'écriture refusées par la base (table rejets du journal)",
+    multiprocess_mode='livemax'
+)
+
+HTTP_CACHE_RESULTS = Counter(
+    'iot_http_cache_total',
+    "Réponses des endpoints en cache: non_modifie (304), memoire, calcul (requête SQL)",
+    ['route', 'result']
+)
+
+HTTP_RESPONSE_BYTES = Counter(
+    'iot_http_response_bytes_total',
+    'Octets des réponses compressées, avant (brut) et après (compresse) compression',
+    ['encoding', 'taille']
+)
+
+_STATEMENT_RE = re.compile(
+    r'^\s*(?:(UPDATE)\s+|(SELECT|INSERT|DELETE|REPLACE)\b.*?\b(?:FROM|INTO)\s+)`?(\w+)',
+    re.IGNORECASE | re.DOTALL
+)
+
+@lru_cache(maxsize=512)
+def statement_label(query):
+    """Réduit une requête SQL à un libellé de faible cardinalité (ex: 'SELECT mesures')"""
+    match = _STATEMENT_RE.match(query)
+    if match:
+        verb = match.group(1) or match.group(2)
+        return f"{verb.upper()} {match.group(3)}"
+    first_word = query.strip().split(None, 1)
+    return first_word[0].upper() if first_word else 'UNKNOWN'
+
+def caller_name(depth=2):
+    """Nom de la fonction appelante (utilisé comme label 'caller')"""
+    try:
+        return sys._getframe(depth).f_code.co_name
+    except ValueError:
+        return 'unknown'
+
+def observe_db_query(query, duration, caller):
+    """Enregistre la durée d'une requête SQL"""
+    DB_QUERY_DURATION.labels(statement_label(query), caller).observe(duration)
+    _local.queries = getattr(_local, 'queries', 0) + 1
+
+@contextmanager
+def timed(histogram, **labels):
+    """Context manager mesurant la durée d'un bloc dans un histogramme"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric = histogram.labels(**labels) if labels else histogram
+        metric.observe(time.perf_counter() - start)
+
+def generate_metrics():
+    """Génère le contenu de l'endpoint /metrics (agrégé sur tous les workers)"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_process_dead(pid):
+    """Nettoie les fichiers d'un worker terminé (hook gunicorn child_exit)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
+
+# Clients acceptés sans jeton (scraper sur la même machine)
+LOCAL_ADDRS = ('127.0.0.1', '::1')
+
+def scrape_allowed(authorization, client_addr):
+    """/metrics: jeton METRICS_TOKEN si configuré, sinon client local uniquement"""
+    if Config.METRICS_TOKEN:
+        return hmac.compare_digest((authorization or '').encode(),
+                                   f"Bearer {Config.METRICS_TOKEN}".encode())
+    return client_addr in LOCAL_ADDRS
+
+def init_app(app):
+    """Instrumente une application Flask et expose /metrics (si METRICS_ENABLED)"""
+    from flask import request, g, Response, jsonify
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+        _local.queries = 0
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else 'inconnue'
+            HTTP_REQUEST_DURATION.labels(
+                request.method, route, response.status_code
+            ).observe(time.perf_counter() - start)
+        if Config.EXPOSE_DB_QUERY_COUNT:
+            response.headers['X-DB-Queries'] = str(getattr(_local, 'queries', 0))
+        return response
+
+    if not Config.METRICS_ENABLED:
+        return
+
+    @app.route('/metrics')
+    def metrics():
+        """Métriques au format Prometheus"""
+        if not scrape_allowed(request.headers.get('Authorization'), request.remote_addr):
+            return jsonify({'error': 'Accès aux métriques refusé'}), 403
+        data, content_type = generate_metrics()
+        return Response(data, content_type=content_type)
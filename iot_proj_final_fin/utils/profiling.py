@@ -0,0 +1,202 @@
+import cProfile
+import io
+import itertools
+import json
+import os
+import pstats
+import re
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from config import Config
+
+# Timeline SQL de la requête en cours (None quand le profilage est inactif)
+_local = threading.local()
+
+class ProfileStore:
+    """
+    Profils capturés, un fichier JSON par profil dans un répertoire partagé
+    par tous les workers (les maxlen plus récents sont gardés)
+
+    L'id est préfixé par le pid du worker: GET /api/admin/profils/<id> trouve
+    le profil quel que soit le worker qui sert la requête.
+    """
+
+    ID_RE = re.compile(r'^\d+-\d+$')
+
+    def __init__(self, directory, maxlen):
+        self.directory = directory
+        self.maxlen = maxlen
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pid = None
+
+    def _path(self, profile_id):
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def _files(self):
+        """Fichiers des profils, du plus récent au plus ancien"""
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith('.json')]
+        except FileNotFoundError:
+            return []
+        paths = [os.path.join(self.directory, name) for name in names]
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                pass
+        return sorted(mtimes, key=mtimes.get, reverse=True)
+
+    def add(self, profile):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Compteur propre au processus (worker forké)
+                self._pid = os.getpid()
+                self._ids = itertools.count(1)
+            profile['id'] = f"{self._pid}-{next(self._ids)}"
+        os.makedirs(self.directory, exist_ok=True)
+        # Écriture atomique: un lecteur ne voit jamais un fichier partiel
+        tmp = self._path(profile['id']) + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(profile, f, default=str)
+        os.replace(tmp, self._path(profile['id']))
+        for path in self._files()[self.maxlen:]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return profile['id']
+
+    def _load(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def list(self):
+        """Résumés des profils de tous les workers, du plus récent au plus ancien"""
+        profiles = (self._load(path) for path in self._files())
+        return [
+            {k: v for k, v in p.items() if k not in ('sql', 'fonctions')}
+            for p in profiles if p is not None
+        ]
+
+    def get(self, profile_id):
+        if not self.ID_RE.match(profile_id):
+            return None
+        return self._load(self._path(profile_id))
+
+store = ProfileStore(Config.PROFILING_DIR, Config.PROFILING_BUFFER_SIZE)
+
+def record_query(query, duration, rows):
+    """Ajoute une requête SQL à la timeline si le profilage est actif"""
+    timeline = getattr(_local, 'timeline', None)
+    if timeline is not None:
+        timeline.append({
+            'query': ' '.join(query.split()),
+            'debut_ms': round((time.perf_counter() - _local.start - duration) * 1000, 3),
+            'duree_ms': round(duration * 1000, 3),
+            'lignes': rows
+        })
+
+def _top_functions(profiler, limit):
+    """Extrait les fonctions les plus coûteuses (temps cumulé)"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.sort_stats('cumulative')
+    functions = []
+    for func in stats.fcn_list[:limit]:
+        cc, nc, tt, ct, _ = stats.stats[func]
+        filename, line, name = func
+        functions.append({
+            'fonction': f"{filename}:{line}({name})",
+            'appels': nc,
+            'temps_propre_ms': round(tt * 1000, 3),
+            'temps_cumule_ms': round(ct * 1000, 3)
+        })
+    return functions
+
+def init_app(app):
+    """Active le profilage à la demande (admin) ou par échantillonnage"""
+    from flask import request, g, jsonify
+    from auth import verify_token, token_required, role_required
+
+    def _admin_requested():
+        flag = request.headers.get('X-Profile') or request.args.get('_profile')
+        if flag not in ('1', 'true'):
+            return False
+        auth_header = request.headers.get('Authorization', '')
+        payload = verify_token(auth_header.split(" ")[1]) if ' ' in auth_header else None
+        return bool(payload) and payload.get('role') == 'admin'
+
+    @app.before_request
+    def _start_profile():
+        sample_rate = Config.PROFILING_SAMPLE_RATE
+        sampled = sample_rate > 0 and random.random() < sample_rate
+        if not sampled and not _admin_requested():
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Un autre profileur est déjà actif dans ce thread
+            return
+        g._profiler = profiler
+        g._profile_mode = 'echantillon' if sampled else 'admin'
+        _local.timeline = []
+        _local.start = time.perf_counter()
+
+    @app.after_request
+    def _stop_profile(response):
+        profiler = g.pop('_profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        duration = time.perf_counter() - _local.start
+        timeline, _local.timeline = _local.timeline, None
+
+        profile_id = store.add({
+            'date': datetime.now().isoformat(),
+            'mode': g.pop('_profile_mode', 'admin'),
+            'methode': request.method,
+            'route': request.url_rule.rule if request.url_rule else request.path,
+            'chemin': request.full_path,
+            'statut': response.status_code,
+            'duree_ms': round(duration * 1000, 3),
+            'nb_requetes_sql': len(timeline),
+            'duree_sql_ms': round(sum(q['duree_ms'] for q in timeline), 3),
+            'sql': timeline,
+            'fonctions': _top_functions(profiler, Config.PROFILING_TOP_FUNCTIONS)
+        })
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def _clear_profile(exc):
+        # Si after_request n'a pas été appelé (exception), ne pas laisser fuir la timeline
+        _local.timeline = None
+        profiler = g.pop('_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+
+    @app.route('/api/admin/profils', methods=['GET'])
+    @token_required
+    @role_required('admin')
+    def get_profils(payload):
+        """Liste des profils capturés par tous les workers"""
+        return jsonify(store.list()), 200
+
+    @app.route('/api/admin/profils/<id>', methods=['GET'])
+    @token_required
+    @role_required('admin')
+    def get_profil(payload, id):
+        """Détail d'un profil (timeline SQL + fonctions les plus coûteuses)"""
+        profile = store.get(id)
+        if not profile:
+            return jsonify({'error': 'Profil non trouvé'}), 404
+        return jsonify(profile), 200
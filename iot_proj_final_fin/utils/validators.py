@@ -1,51 +1,233 @@
 import re
-from decimal import Decimal, InvalidOperation
+from datetime import datetime, timedelta
+from math import isfinite
+
+# Expressions compilées une seule fois (appelées sur le chemin d'ingestion)
+MAC_RE = re.compile(r'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$')
+IP_RE = re.compile(r'^(\d{1,3}\.){3}\d{1,3}$')
+API_KEY_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+DANGEROUS_CHARS_RE = re.compile(r'[<>"\']')
+
+# Bornes des valeurs de capteurs acceptées à l'ingestion
+VALEUR_MIN = -100.0
+VALEUR_MAX = 10000.0
+
+# Horodatages fournis par les noeuds: antérieurs à TIMESTAMP_MIN (horloge non
+# synchronisée) ou en avance de plus de TIMESTAMP_MAX_AVANCE sur le serveur refusés
+TIMESTAMP_MIN = datetime(2020, 1, 1)
+TIMESTAMP_MAX_AVANCE = timedelta(days=1)
+
+# Schéma d'une mesure entrante (JSON, bulk, binaire, MQTT)
+MESURE_SCHEMA = {
+    'capteur_id': {'type': 'id', 'requis': True},
+    'valeur': {'type': 'nombre', 'requis': True, 'min': VALEUR_MIN, 'max': VALEUR_MAX},
+    'timestamp': {'type': 'timestamp', 'requis': False},
+    'metadata': {'type': 'objet', 'requis': False},
+    # Identifiant de message du noeud (déduplication des renvois)
+    'msg_id': {'type': 'cle', 'requis': False, 'max': 64},
+    'seq': {'type': 'entier', 'requis': False},
+    # Identifiant de démarrage du noeud: portée de msg_id / seq (compteurs remis à zéro)
+    'boot': {'type': 'cle', 'requis': False, 'max': 16},
+}
+
+# Codes d'erreur de validation
+MANQUANT = 'manquant'
+INVALIDE = 'invalide'
+HORS_LIMITES = 'hors_limites'
+
+# Messages d'erreur par index pour les envois groupés
+MESSAGES_BULK = {
+    MANQUANT: 'Données manquantes',
+    INVALIDE: 'Valeur invalide',
+    HORS_LIMITES: 'Valeur hors limites',
+}
+
+def to_float(value):
+    """Convertit une valeur en float fini, ou None si invalide (NaN/Inf/booléen/texte)"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    try:
+        value = float(value)
+    except (ValueError, OverflowError):
+        return None
+    return value if isfinite(value) else None
+
+def to_local_datetime(value):
+    """Date ISO 8601 en heure locale naïve du serveur (ValueError si invalide)"""
+    instant = datetime.fromisoformat(value)
+    if instant.tzinfo is not None:
+        # Heure locale du serveur, comme les horodatages attribués à la réception
+        instant = instant.astimezone().replace(tzinfo=None)
+    return instant
+
+def _check_id(value, spec):
+    if isinstance(value, bool):
+        return None, INVALIDE
+    if isinstance(value, int):
+        return (value, None) if value > 0 else (None, INVALIDE)
+    if isinstance(value, str) and value.isdigit():
+        return int(value), None
+    return None, INVALIDE
+
+def _check_nombre(value, spec):
+    number = to_float(value)
+    if number is None:
+        return None, INVALIDE
+    if number < spec['min'] or number > spec['max']:
+        return None, HORS_LIMITES
+    return number, None
+
+def _check_timestamp(value, spec):
+    if not isinstance(value, str) or not 0 < len(value) <= 32:
+        return None, INVALIDE
+    try:
+        instant = to_local_datetime(value)
+    except ValueError:
+        return None, INVALIDE
+    if instant < TIMESTAMP_MIN or instant > datetime.now() + TIMESTAMP_MAX_AVANCE:
+        return None, INVALIDE
+    return instant, None
+
+def _check_cle(value, spec):
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        return None, INVALIDE
+    value = str(value)
+    return (value, None) if 0 < len(value) <= spec['max'] else (None, INVALIDE)
+
+def _check_entier(value, spec):
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value, None
+    return None, INVALIDE
+
+def _check_objet(value, spec):
+    return (value, None) if isinstance(value, (dict, list)) else (None, INVALIDE)
+
+_CHECKERS = {
+    'id': _check_id,
+    'nombre': _check_nombre,
+    'timestamp': _check_timestamp,
+    'objet': _check_objet,
+    'cle': _check_cle,
+    'entier': _check_entier,
+}
+
+class IngestValidator:
+    """Validation des mesures entrantes à partir d'un schéma, en une seule passe"""
+
+    def __init__(self, schema=MESURE_SCHEMA):
+        # Pré-résolution des vérificateurs: aucune recherche par type à l'appel
+        self.fields = [
+            (name, spec.get('requis', False), _CHECKERS[spec['type']], spec)
+            for name, spec in schema.items()
+        ]
+
+    def validate(self, mesure):
+        """Valide une mesure; retourne (ligne normalisée, None) ou (None, code d'erreur)"""
+        if not isinstance(mesure, dict):
+            return None, INVALIDE
+        row = {}
+        for name, requis, check, spec in self.fields:
+            value = mesure.get(name)
+            if value is None:
+                if requis:
+                    return None, MANQUANT
+                row[name] = None
+                continue
+            value, error = check(value, spec)
+            if error:
+                return None, error
+            row[name] = value
+        return row, None
+
+    def validate_bulk(self, mesures):
+        """Valide un lot complet; retourne (lignes valides avec leur index, erreurs par index)"""
+        rows = []
+        errors = []
+        validate = self.validate
+        for idx, mesure in enumerate(mesures):
+            row, error = validate(mesure)
+            if error:
+                errors.append({'index': idx, 'error': MESSAGES_BULK[error]})
+            else:
+                row['index'] = idx
+                rows.append(row)
+        return rows, errors
+
+    def validate_arrays(self, timestamps, capteur_ids, valeurs):
+        """
+        Version vectorisée (NumPy) de validate_bulk pour les trames binaires
+
+        Args:
+            timestamps (ndarray): Horodatages epoch (mêmes bornes que _check_timestamp)
+
+        Returns:
+            tuple: (masque des lignes valides, erreurs par index)
+        """
+        import numpy as np
+
+        spec = MESURE_SCHEMA['valeur']
+        debut = TIMESTAMP_MIN.timestamp()
+        fin = (datetime.now() + TIMESTAMP_MAX_AVANCE).timestamp()
+        invalide = ((capteur_ids <= 0) | ~np.isfinite(valeurs)
+                    | (timestamps < debut) | (timestamps > fin))
+        hors_limites = ~invalide & ((valeurs < spec['min']) | (valeurs > spec['max']))
+        errors = [{'index': int(idx), 'error': MESSAGES_BULK[INVALIDE]}
+                  for idx in np.flatnonzero(invalide)]
+        errors += [{'index': int(idx), 'error': MESSAGES_BULK[HORS_LIMITES]}
+                   for idx in np.flatnonzero(hors_limites)]
+        errors.sort(key=lambda e: e['index'])
+        return ~(invalide | hors_limites), errors
 
 class DataValidator:
     """Validation des données entrantes"""
-    
+
     @staticmethod
     def validate_mac_address(mac):
         """Valide une adresse MAC"""
-        pattern = r'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$'
-        return bool(re.match(pattern, mac))
-    
+        return bool(MAC_RE.match(mac))
+
     @staticmethod
     def validate_ip_address(ip):
         """Valide une adresse IP v4"""
-        pattern = r'^(\d{1,3}\.){3}\d{1,3}$'
-        if not re.match(pattern, ip):
+        if not IP_RE.match(ip):
             return False
         parts = ip.split('.')
         return all(0 <= int(part) <= 255 for part in parts)
-    
+
     @staticmethod
-    def validate_sensor_value(value, min_val=None, max_val=None):
-        """Valide une valeur de capteur"""
-        try:
-            val = Decimal(str(value))
-            if min_val is not None and val < Decimal(str(min_val)):
-                return False
-            if max_val is not None and val > Decimal(str(max_val)):
-                return False
+    def validate_coordinates(latitude, longitude):
+        """Valide une position (les deux coordonnées, ou aucune)"""
+        if latitude is None and longitude is None:
             return True
-        except (InvalidOperation, ValueError):
+        return (DataValidator.validate_sensor_value(latitude, -90, 90)
+                and DataValidator.validate_sensor_value(longitude, -180, 180))
+
+    @staticmethod
+    def validate_sensor_value(value, min_val=None, max_val=None):
+        """Valide une valeur de capteur (nombre fini dans les bornes)"""
+        val = to_float(value)
+        if val is None:
             return False
-    
+        if min_val is not None and val < min_val:
+            return False
+        if max_val is not None and val > max_val:
+            return False
+        return True
+
     @staticmethod
     def validate_api_key(api_key):
         """Valide le format d'une clé API"""
         if not api_key or len(api_key) < 20:
             return False
-        return bool(re.match(r'^[a-zA-Z0-9_-]+$', api_key))
-    
+        return bool(API_KEY_RE.match(api_key))
+
     @staticmethod
     def sanitize_string(text, max_length=None):
         """Nettoie une chaîne de caractères"""
         if not isinstance(text, str):
             return ""
         # Supprimer les caractères dangereux
-        cleaned = re.sub(r'[<>"\']', '', text)
+        cleaned = DANGEROUS_CHARS_RE.sub('', text)
         if max_length:
             cleaned = cleaned[:max_length]
         return cleaned.strip()
@@ -0,0 +1,314 @@
+"""
+Tampon d'écriture différée (write-behind) pour l'ingestion des mesures.
+
+Les mesures sont acquittées dès leur ajout dans un journal local durable
+(fichier SQLite en mode WAL), puis un thread de vidage les insère dans la table
+mesures par lots (WRITE_BUFFER_BATCH_SIZE lignes ou WRITE_BUFFER_INTERVAL
+secondes): une seule transaction InnoDB par lot au lieu d'une par mesure.
+
+Plusieurs workers peuvent partager le même journal: chaque vidage réserve ses
+lignes (colonne lot = pid du worker) avant de les insérer. Au démarrage, les
+lignes restantes ou réservées par un worker disparu sont rejouées. La livraison
+est « au moins une fois »: un arrêt brutal entre l'insertion MySQL et la
+suppression locale rejoue le lot.
+
+Un lot refusé par la base compte un essai pour chacune de ses lignes; le
+lot suivant est deux fois plus petit à chaque essai de sa première ligne
+(bissection), jusqu'à isoler la ligne fautive. Une ligne seule qui échoue
+WRITE_BUFFER_MAX_ATTEMPTS fois est déplacée dans la table rejets du journal
+(rejouable par replay_rejects) au lieu de bloquer les suivantes. Les erreurs
+de connexion (base injoignable) ne comptent pas d'essai: le vidage attend
+simplement, avec un délai croissant.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from mysql.connector import errors as mysql_errors
+
+from utils.logger import logger
+from utils import metrics
+
+# Base injoignable ou pool épuisé: le lot n'est pas en cause
+TRANSIENT_ERRORS = (mysql_errors.InterfaceError, mysql_errors.OperationalError,
+                    mysql_errors.PoolError)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tampon (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    noeud_id INTEGER NOT NULL,
+    capteur_id INTEGER NOT NULL,
+    valeur REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    metadata TEXT,
+    client_id TEXT,
+    source TEXT NOT NULL,
+    recu REAL NOT NULL,
+    lot INTEGER,
+    essais INTEGER NOT NULL DEFAULT 0,
+    erreur TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tampon_lot ON tampon (lot);
+CREATE TABLE IF NOT EXISTS rejets (
+    id INTEGER PRIMARY KEY,
+    noeud_id INTEGER NOT NULL,
+    capteur_id INTEGER NOT NULL,
+    valeur REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    metadata TEXT,
+    client_id TEXT,
+    source TEXT NOT NULL,
+    recu REAL NOT NULL,
+    essais INTEGER NOT NULL,
+    erreur TEXT,
+    rejete REAL NOT NULL
+);
+"""
+
+# Colonnes communes au journal et aux rejets
+COLUMNS = "id, noeud_id, capteur_id, valeur, timestamp, metadata, client_id, source, recu"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class WriteBehindBuffer:
+    """Journal local des mesures acquittées mais pas encore insérées en base"""
+
+    def __init__(self, path, persist, batch_size=1000, interval=0.5, synchronous='NORMAL',
+                 max_attempts=15, max_delay=30):
+        """
+        Args:
+            path (str): Fichier SQLite du journal
+            persist (callable): persist(rows, sources) insère un lot dans mesures
+            batch_size (int): Nombre max de lignes par transaction
+            interval (float): Délai max (s) entre deux vidages
+            synchronous (str): NORMAL (survit à un crash du processus) ou FULL (coupure électrique)
+            max_attempts (int): Essais d'une ligne avant son déplacement dans rejets
+            max_delay (float): Délai max (s) entre deux vidages après des échecs
+        """
+        self.path = path
+        self.persist = persist
+        self.batch_size = batch_size
+        self.interval = interval
+        self.synchronous = synchronous
+        self.max_attempts = max_attempts
+        self.max_delay = max_delay
+        self._failures = 0
+        self._delay = interval
+        self._local = threading.local()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._flusher = None
+        self._pid = None
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(tampon)")}
+        if 'client_id' not in columns:
+            # Journal créé avant la déduplication des renvois
+            connection.execute("ALTER TABLE tampon ADD COLUMN client_id TEXT")
+        if 'essais' not in columns:
+            # Journal créé avant le comptage des essais
+            connection.execute("ALTER TABLE tampon ADD COLUMN essais INTEGER NOT NULL DEFAULT 0")
+            connection.execute("ALTER TABLE tampon ADD COLUMN erreur TEXT")
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(f'PRAGMA synchronous={self.synchronous}')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def append(self, params, source):
+        """
+        Ajoute des mesures au journal (acquittement durable)
+
+        Args:
+            params (list): Tuples (noeud_id, capteur_id, valeur, timestamp, metadata, client_id)
+            source (str): Origine des mesures (label des métriques)
+        """
+        if self._pid != os.getpid():
+            # Premier ajout du worker (le thread de vidage ne survit pas au fork)
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self.start()
+        now = time.time()
+        connection = self._connection()
+        connection.execute('BEGIN')
+        try:
+            connection.executemany(
+                """INSERT INTO tampon (noeud_id, capteur_id, valeur, timestamp, metadata,
+                                         client_id, source, recu)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(noeud_id, capteur_id, valeur, str(timestamp), metadata, client_id, source, now)
+                 for noeud_id, capteur_id, valeur, timestamp, metadata, client_id in params]
+            )
+            connection.execute('COMMIT')
+        except sqlite3.Error:
+            connection.execute('ROLLBACK')
+            raise
+        if len(params) >= self.batch_size:
+            self._wakeup.set()
+
+    def release_orphans(self):
+        """Libère les lots réservés par des workers arrêtés (rejoués au prochain vidage)"""
+        connection = self._connection()
+        lots = [row[0] for row in
+                connection.execute("SELECT DISTINCT lot FROM tampon WHERE lot IS NOT NULL")]
+        for lot in lots:
+            if lot == os.getpid() or not _pid_alive(lot):
+                connection.execute("UPDATE tampon SET lot = NULL WHERE lot = ?", (lot,))
+                logger.warning(f"Tampon d'écriture: lot {lot} rejoué")
+
+    def _claim_size(self, connection):
+        """Taille du prochain lot: divisée par deux à chaque essai de la première ligne"""
+        row = connection.execute(
+            "SELECT essais FROM tampon WHERE lot IS NULL ORDER BY id LIMIT 1"
+        ).fetchone()
+        return max(self.batch_size >> min(row[0], 62), 1) if row else self.batch_size
+
+    def _reject(self, connection, lot):
+        """Déplace une ligne seule à bout d'essais dans la table rejets"""
+        connection.execute('BEGIN')
+        try:
+            connection.execute(
+                f"""INSERT INTO rejets ({COLUMNS}, essais, erreur, rejete)
+                    SELECT {COLUMNS}, essais, erreur, ? FROM tampon
+                    WHERE lot = ? AND essais >= ?""",
+                (time.time(), lot, self.max_attempts)
+            )
+            connection.execute("DELETE FROM tampon WHERE lot = ? AND essais >= ?",
+                               (lot, self.max_attempts))
+            connection.execute('COMMIT')
+        except sqlite3.Error:
+            connection.execute('ROLLBACK')
+            raise
+
+    def _failed(self, connection, lot, size, error):
+        """Libère un lot refusé; retourne le délai (s) avant le prochain vidage"""
+        self._failures += 1
+        if isinstance(error, TRANSIENT_ERRORS):
+            connection.execute("UPDATE tampon SET lot = NULL WHERE lot = ?", (lot,))
+            logger.error(f"Erreur vidage du tampon d'écriture (base injoignable): {error}")
+        else:
+            connection.execute(
+                "UPDATE tampon SET essais = essais + 1, erreur = ? WHERE lot = ?",
+                (str(error)[:500], lot)
+            )
+            logger.error(f"Erreur vidage du tampon d'écriture (lot de {size}): {error}")
+            if size == 1:
+                self._reject(connection, lot)
+            connection.execute("UPDATE tampon SET lot = NULL WHERE lot = ?", (lot,))
+        return min(self.interval * 2 ** self._failures, self.max_delay)
+
+    def flush(self):
+        """
+        Insère en base toutes les mesures en attente
+
+        Returns:
+            int: Nombre de lignes insérées (le vidage s'arrête au premier lot refusé)
+        """
+        with self._flush_lock:
+            connection = self._connection()
+            lot = os.getpid()
+            total = 0
+            self._delay = self.interval
+            while True:
+                size = self._claim_size(connection)
+                # Réservation atomique d'un lot (une seule instruction)
+                connection.execute(
+                    """UPDATE tampon SET lot = ? WHERE id IN (
+                           SELECT id FROM tampon WHERE lot IS NULL ORDER BY id LIMIT ?)""",
+                    (lot, size)
+                )
+                rows = connection.execute(
+                    """SELECT noeud_id, capteur_id, valeur, timestamp, metadata, client_id, source
+                       FROM tampon WHERE lot = ? ORDER BY id""", (lot,)
+                ).fetchall()
+                if not rows:
+                    break
+                try:
+                    self.persist([row[:6] for row in rows], [row[6] for row in rows])
+                except Exception as e:
+                    self._delay = self._failed(connection, lot, len(rows), e)
+                    break
+                self._failures = 0
+                connection.execute("DELETE FROM tampon WHERE lot = ?", (lot,))
+                total += len(rows)
+                if len(rows) < size:
+                    break
+            self._update_metrics(connection)
+            return total
+
+    def replay_rejects(self):
+        """Remet les lignes rejetées dans le journal (après correction); retourne leur nombre"""
+        connection = self._connection()
+        connection.execute('BEGIN')
+        try:
+            count = connection.execute(
+                f"""INSERT INTO tampon ({COLUMNS})
+                    SELECT {COLUMNS} FROM rejets ORDER BY id"""
+            ).rowcount
+            connection.execute("DELETE FROM rejets")
+            connection.execute('COMMIT')
+        except sqlite3.Error:
+            connection.execute('ROLLBACK')
+            raise
+        self._wakeup.set()
+        return count
+
+    def _update_metrics(self, connection):
+        pending, oldest = connection.execute(
+            "SELECT COUNT(*), MIN(recu) FROM tampon"
+        ).fetchone()
+        metrics.WRITE_BUFFER_PENDING.set(pending)
+        metrics.WRITE_BUFFER_LAG.set(time.time() - oldest if oldest else 0)
+        metrics.WRITE_BUFFER_REJECTED.set(
+            connection.execute("SELECT COUNT(*) FROM rejets").fetchone()[0]
+        )
+
+    def stats(self):
+        """Nombre de mesures en attente et rejetées, retard (s) de la plus ancienne"""
+        connection = self._connection()
+        pending, oldest = connection.execute(
+            "SELECT COUNT(*), MIN(recu) FROM tampon"
+        ).fetchone()
+        rejets = connection.execute("SELECT COUNT(*) FROM rejets").fetchone()[0]
+        return {'en_attente': pending, 'rejets': rejets,
+                'retard': round(time.time() - oldest, 3) if oldest else 0}
+
+    def _flush_loop(self):
+        self.release_orphans()
+        while not self._stop.is_set():
+            self.flush()
+            # Délai croissant après un lot refusé
+            self._wakeup.wait(self._delay)
+            self._wakeup.clear()
+
+    def start(self):
+        """Démarre le thread de vidage du processus courant (rejoue le journal existant)"""
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, name='write-behind', daemon=True)
+        self._flusher.start()
+
+    def stop(self):
+        """Arrête le thread de vidage après un dernier vidage"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._flusher and self._pid == os.getpid():
+            self._flusher.join()
+        self.flush()
@@ -1,12 +1,14 @@
 import sys
 import os
 
-# Chemin du projet
-project_path = '/home/me/projet_iot'
+# Chemin du projet (dossier de ce fichier)
+project_path = os.path.dirname(os.path.abspath(__file__))
 if project_path not in sys.path:
     sys.path.insert(0, project_path)
+# Les chemins relatifs de config.py (logs/, models/) partent du projet
+os.chdir(project_path)
 
-# Activer l'environnement virtuel
+# Activer l'environnement virtuel (mod_wsgi; inutile avec gunicorn lancé depuis le venv)
 activate_this = os.path.join(project_path, 'venv', 'bin', 'activate_this.py')
 if os.path.exists(activate_this):
     with open(activate_this) as file_: